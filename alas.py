@@ -7,6 +7,7 @@ import os
 import re
 import threading
 import time
+from collections import deque
 from datetime import datetime, timedelta
 
 import inflection
@@ -14,11 +15,15 @@ from cached_property import cached_property
 
 from module.base.decorator import del_cached_property
 from module.base.api_client import ApiClient
-from module.config.config import AzurLaneConfig, TaskEnd
+from module.base.frame import Frame
+from module.base.resource import RESOURCE_MANAGER
+from module.base.status import INSTANCE_STATUS, ExitReason, InstanceState
+from module.config.config import AzurLaneConfig, TaskEnd, flush_configs
 from module.config.deep import deep_get, deep_set
 from module.exception import *
 from module.logger import logger
 from module.notify import handle_notify
+from module.ocr.ocr import OCR_CACHE
 
 
 RESTART_SENSITIVE_TASKS = ['Commission', 'Research']
@@ -91,6 +96,8 @@ class AzurLaneAutoScript:
     @cached_property
     def config(self):
         try:
+            # Write pending modifications of the previous config before reading
+            flush_configs()
             config = AzurLaneConfig(config_name=self.config_name)
             return config
         except RequestHumanTakeover:
@@ -333,24 +340,44 @@ class AzurLaneAutoScript:
             # exit(1)
             raise
 
+    @staticmethod
+    def save_error_screenshots(folder, screenshots):
+        """
+        Args:
+            folder (str):
+            screenshots (iterable[dict]): {'time': datetime, 'image': np.ndarray}
+        """
+        from module.base.utils import save_image
+        from module.handler.sensitive_info import handle_sensitive_image
+        for data in screenshots:
+            image_time = datetime.strftime(data['time'], '%Y-%m-%d_%H-%M-%S-%f')
+            image = handle_sensitive_image(data['image'])
+            save_image(image, f'{folder}/{image_time}.png')
+        logger.info(f'Error screenshots saved: {folder}')
+
     def save_error_log(self):
         """
         Save last 60 screenshots in ./log/error/<timestamp>
         Save logs to ./log/error/<timestamp>/log.txt
         """
-        from module.base.utils import save_image
-        from module.handler.sensitive_info import (handle_sensitive_image,
-                                                   handle_sensitive_logs)
+        from module.handler.sensitive_info import handle_sensitive_logs
         if self.config.Error_SaveError:
             if not os.path.exists('./log/error'):
                 os.mkdir('./log/error')
             folder = f'./log/error/{int(time.time() * 1000)}'
             logger.warning(f'Saving error: {folder}')
             os.mkdir(folder)
-            for data in self.device.screenshot_deque:
-                image_time = datetime.strftime(data['time'], '%Y-%m-%d_%H-%M-%S-%f')
-                image = handle_sensitive_image(data['image'])
-                save_image(image, f'{folder}/{image_time}.png')
+            # Take screenshots now, save them in background.
+            # Raw deque is copied, ScreenshotRing takes a snapshot on iter() and decodes lazily.
+            screenshots = self.device.screenshot_deque
+            if isinstance(screenshots, deque):
+                screenshots = list(screenshots)
+            else:
+                screenshots = iter(screenshots)
+            # Not daemon, so screenshots are still saved if Alas exits after error
+            threading.Thread(
+                target=self.save_error_screenshots, args=(folder, screenshots), name='SaveErrorLog'
+            ).start()
             with open(logger.log_file, 'r', encoding='utf-8') as f:
                 lines = f.readlines()
                 start = 0
@@ -670,23 +697,42 @@ class AzurLaneAutoScript:
             future (datetime):
 
         Returns:
-            bool: True if wait finished, False if config changed.
+            bool: True if wait finished, False if config changed and reloaded.
         """
         future = future + timedelta(seconds=1)
+        self.config.flush()
         self.config.start_watching()
         while 1:
             if datetime.now() > future:
                 return True
+            # Load resources of next task in background, shortly before it starts
+            if future - datetime.now() < timedelta(seconds=RESOURCE_MANAGER.PRELOAD_AHEAD):
+                RESOURCE_MANAGER.preload_async(self.config.task.command)
             if self.stop_event is not None:
                 if self.stop_event.is_set():
                     logger.info("Update event detected")
                     logger.info(f"[{self.config_name}] exited. Reason: Update")
+                    INSTANCE_STATUS.set_exit(ExitReason.UPDATE)
                     exit(0)
 
-            time.sleep(5)
-
-            if self.config.should_reload():
-                return False
+            if self.config.change_queue is not None:
+                # Woken up by GUI immediately, reload modified tasks only
+                timeout = min(5., max((future - datetime.now()).total_seconds(), 0.))
+                keys = self.config.wait_change(timeout=timeout)
+                if keys:
+                    changed = self.config.reload_sections(keys)
+                    self.config.start_watching()
+                    if changed:
+                        return False
+                elif self.config.should_reload():
+                    # Modified by something else than GUI
+                    del_cached_property(self, 'config')
+                    return False
+            else:
+                time.sleep(5)
+                if self.config.should_reload():
+                    del_cached_property(self, 'config')
+                    return False
 
     def get_next_task(self):
         """
@@ -700,10 +746,11 @@ class AzurLaneAutoScript:
 
             from module.base.resource import release_resources
             if self.config.task.command != 'Alas':
-                release_resources(next_task=task.command)
+                release_resources(next_task=task.command, config=self.config)
 
             if task.next_run > datetime.now():
                 logger.info(f'Wait until {task.next_run} for task `{task.command}`')
+                INSTANCE_STATUS.set_state(InstanceState.WAITING, task=task.command)
                 self.is_first_task = False
                 method = self.config.Optimization_WhenTaskQueueEmpty
                 if method == 'close_game':
@@ -712,7 +759,6 @@ class AzurLaneAutoScript:
                     release_resources()
                     self.device.release_during_wait()
                     if not self.wait_until(task.next_run):
-                        del_cached_property(self, 'config')
                         continue
                     if task.command != 'Restart':
                         self.config.task_call('Restart')
@@ -724,21 +770,18 @@ class AzurLaneAutoScript:
                     release_resources()
                     self.device.release_during_wait()
                     if not self.wait_until(task.next_run):
-                        del_cached_property(self, 'config')
                         continue
                 elif method == 'stay_there':
                     logger.info('Stay there during wait')
                     release_resources()
                     self.device.release_during_wait()
                     if not self.wait_until(task.next_run):
-                        del_cached_property(self, 'config')
                         continue
                 else:
                     logger.warning(f'Invalid Optimization_WhenTaskQueueEmpty: {method}, fallback to stay_there')
                     release_resources()
                     self.device.release_during_wait()
                     if not self.wait_until(task.next_run):
-                        del_cached_property(self, 'config')
                         continue
             break
 
@@ -762,6 +805,7 @@ class AzurLaneAutoScript:
                     if self.stop_event.is_set():
                         logger.info("Update event detected")
                         logger.info(f"Alas [{self.config_name}] exited.")
+                        # Returns to run_process(), which exits with reason Finish
                         break
                 # Check game server maintenance
                 self.checker.wait_until_available()
@@ -803,11 +847,16 @@ class AzurLaneAutoScript:
 
                 # Run
                 logger.info(f'Scheduler: Start task `{task}`')
+                INSTANCE_STATUS.set_state(InstanceState.RUNNING, task=task)
                 self.device.stuck_record_clear()
                 self.device.click_record_clear()
                 logger.hr(task, level=0)
+                RESOURCE_MANAGER.task_start(task)
                 success = self.run(inflection.underscore(task))
+                self.config.flush()
                 logger.info(f'Scheduler: End task `{task}`')
+                Frame.stats_show(task)
+                OCR_CACHE.stats_show()
                 self.is_first_task = False
 
                 # Check failures
@@ -0,0 +1,134 @@
+"""
+Build asset packs, decoded assets memory-mapped by module.base.resource.AssetPack
+
+Run this after dev_tools/button_extract.py, or after pulling new assets:
+    python -m dev_tools.asset_pack
+
+Outputs ./assets/pack/{server}.bin and ./assets/pack/{server}.json for each server.
+Buttons are stored pre-cropped, with luma and binarized variants.
+Templates are stored with flipped gif frames, with luma and binarized variants.
+Templates that override pre_process() and Masks are not packed.
+"""
+import importlib
+import json
+import os
+import time
+
+import numpy as np
+
+from module.base.button import Button
+from module.base.mask import Mask
+from module.base.resource import ASSET_PACK_FOLDER, AssetPack, asset_pack_key
+from module.base.template import Template
+from module.config.config_manual import ManualConfig as AzurLaneConfig
+from module.config.server import VALID_SERVER
+from module.logger import logger
+
+# Align arrays to cache lines
+ALIGN = 64
+
+
+def iter_assets():
+    """
+    Yields:
+        Button | Template: Assets defined in module/*/assets.py
+    """
+    for root, _, files in os.walk(AzurLaneConfig.ASSETS_MODULE):
+        if 'assets.py' not in files:
+            continue
+        name = os.path.join(root, 'assets').replace('\\', '/').strip('./').replace('/', '.')
+        module = importlib.import_module(name)
+        for value in module.__dict__.values():
+            if isinstance(value, Mask):
+                continue
+            if isinstance(value, (Button, Template)):
+                yield value
+
+
+def as_list(image):
+    if isinstance(image, list):
+        return image
+    return [image]
+
+
+class AssetPackBuilder:
+    def __init__(self, server):
+        self.server = server
+        self.index = {}
+        self.chunks = []
+        self.offset = 0
+
+    def add(self, key, images):
+        frames = []
+        for image in as_list(images):
+            image = np.ascontiguousarray(image, dtype=np.uint8)
+            pad = -self.offset % ALIGN
+            if pad:
+                self.chunks.append(b'\x00' * pad)
+                self.offset += pad
+            frames.append([self.offset, list(image.shape)])
+            self.chunks.append(image.tobytes())
+            self.offset += image.nbytes
+        self.index[key] = frames
+
+    def add_button(self, button):
+        """
+        Args:
+            button (Button): Button of this server
+        """
+        if button.file in [None, ''] or not os.path.exists(button.file):
+            return
+        button.ensure_template()
+        button.ensure_binary_template()
+        button.ensure_luma_template()
+        self.add(asset_pack_key(button.file, button.area, 'image'), button.image)
+        self.add(asset_pack_key(button.file, button.area, 'binary'), button.image_binary)
+        self.add(asset_pack_key(button.file, button.area, 'luma'), button.image_luma)
+        button.resource_release()
+
+    def add_template(self, template):
+        """
+        Args:
+            template (Template): Template of this server
+        """
+        if type(template).pre_process is not Template.pre_process:
+            return
+        if not os.path.exists(template.file):
+            return
+        self.add(asset_pack_key(template.file, None, 'image'), template.image)
+        self.add(asset_pack_key(template.file, None, 'binary'), template.image_binary)
+        self.add(asset_pack_key(template.file, None, 'luma'), template.image_luma)
+        template.resource_release()
+
+    def build(self, assets):
+        built = time.time()
+        for asset in assets:
+            asset = asset.split_server()[self.server]
+            key = asset_pack_key(asset.file, getattr(asset, 'area', None), 'image')
+            if key in self.index:
+                continue
+            try:
+                if isinstance(asset, Button):
+                    self.add_button(asset)
+                else:
+                    self.add_template(asset)
+            except Exception as e:
+                logger.warning(f'Failed to pack {asset.file}: {e}')
+
+        os.makedirs(ASSET_PACK_FOLDER, exist_ok=True)
+        file_bin = os.path.join(ASSET_PACK_FOLDER, f'{self.server}.bin')
+        file_index = os.path.join(ASSET_PACK_FOLDER, f'{self.server}.json')
+        with open(file_bin, 'wb') as f:
+            for chunk in self.chunks:
+                f.write(chunk)
+        with open(file_index, 'w', encoding='utf-8') as f:
+            json.dump({'built': built, 'assets': self.index}, f)
+        logger.info(f'Asset pack {self.server}: {len(self.index)} entries, {self.offset / 1048576:.1f}MB')
+
+
+if __name__ == '__main__':
+    # Decode from asset files, not from the previous pack
+    AssetPack.enabled = False
+    assets = list(iter_assets())
+    for s in VALID_SERVER:
+        AssetPackBuilder(s).build(assets)
@@ -0,0 +1,144 @@
+"""
+Load time of ConfigUpdater.read_file(), full update versus the schema fingerprint fast path
+
+Usage:
+    Benchmark on an existing config, ./config/alas.json
+        python -m dev_tools.config_load_benchmark --config alas
+    Benchmark on a config generated from template
+        python -m dev_tools.config_load_benchmark
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+from module.config.config_updater import ConfigUpdater
+from module.config.deep import deep_iter, deep_set
+from module.config.utils import atomic_read_bytes, atomic_write, filepath_config, read_file, write_file
+from module.logger import logger
+
+ROUNDS = 50
+# Arguments changed between reads, like saving a few options in GUI
+CHANGES = 3
+TEMP_CONFIG = 'config_load_benchmark'
+
+
+def measure(func):
+    record = []
+    result = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = func()
+        record.append(time.perf_counter() - start)
+    return result, statistics.median(record)
+
+
+def changeable(updater):
+    """
+    Returns:
+        list[tuple[list[str], dict]]: Keys and definitions of arguments that users may change.
+    """
+    out = []
+    for keys, definition in deep_iter(updater.args_index, depth=3):
+        if definition['type'] in ['input', 'select', 'checkbox'] and definition.get('display') != 'hide':
+            out.append((keys, definition))
+    return out
+
+
+def change(data, arguments):
+    """
+    Change a few arguments to another valid value.
+    """
+    for keys, definition in random.sample(arguments, min(CHANGES, len(arguments))):
+        typ = definition['type']
+        if typ == 'checkbox':
+            value = not data[keys[0]][keys[1]][keys[2]]
+        elif typ == 'select':
+            value = random.choice(definition['option'])
+        elif isinstance(definition['value'], int):
+            value = random.randint(0, 100)
+        else:
+            value = str(random.randint(0, 100))
+        deep_set(data, keys=keys, value=value)
+
+
+def benchmark(config_name):
+    file = filepath_config(config_name)
+    backup = atomic_read_bytes(file)
+    try:
+        backup_schema = atomic_read_bytes(f'{file}.schema')
+    except FileNotFoundError:
+        backup_schema = None
+    updater = ConfigUpdater()
+    arguments = changeable(updater)
+    logger.hr(f'Config load benchmark, {file}', level=1)
+
+    def full():
+        # ConfigUpdater.read_file() before the fast path
+        return updater.config_update(read_file(file))
+
+    def cold():
+        ConfigUpdater.config_cache.clear()
+        return updater.read_file(config_name)
+
+    def unchanged():
+        return updater.read_file(config_name)
+
+    rows = []
+    try:
+        expect, cost = measure(full)
+        rows.append(('Full update', cost))
+        updater.write_file(config_name, expect)
+
+        # Validate all arguments without migration, as a new process does
+        result, cost = measure(cold)
+        rows.append(('Fingerprint, new process', cost))
+        assert result == expect, 'Result of fingerprint path is different from full update'
+
+        # Same file as last read
+        result, cost = measure(unchanged)
+        rows.append(('Fingerprint, unchanged', cost))
+        assert result == expect, 'Result of unchanged file is different from full update'
+
+        # A few arguments changed since last read, like saving options in GUI
+        record = []
+        for _ in range(ROUNDS):
+            changed = updater.read_file(config_name)
+            change(changed, arguments)
+            updater.write_file(config_name, changed)
+            start = time.perf_counter()
+            result = updater.read_file(config_name)
+            record.append(time.perf_counter() - start)
+            assert result == full(), 'Result of changed file is different from full update'
+        rows.append((f'Fingerprint, {CHANGES} changed', statistics.median(record)))
+    finally:
+        ConfigUpdater.config_cache.clear()
+        atomic_write(file, backup)
+        if backup_schema is None:
+            if os.path.exists(f'{file}.schema'):
+                os.remove(f'{file}.schema')
+        else:
+            atomic_write(f'{file}.schema', backup_schema)
+
+    logger.hr('Summary', level=2)
+    base = rows[0][1]
+    for name, cost in rows:
+        logger.info(f'{name}: {cost * 1000:.2f}ms, {base / cost:.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Config load benchmark')
+    parser.add_argument('--config', type=str, default='', help='Config name in ./config, default to a temp config')
+    args = parser.parse_args()
+
+    if args.config:
+        benchmark(args.config)
+    else:
+        write_file(filepath_config(TEMP_CONFIG), read_file(filepath_config('template')))
+        try:
+            benchmark(TEMP_CONFIG)
+        finally:
+            for file in [filepath_config(TEMP_CONFIG), f'{filepath_config(TEMP_CONFIG)}.schema']:
+                if os.path.exists(file):
+                    os.remove(file)
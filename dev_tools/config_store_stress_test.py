@@ -0,0 +1,184 @@
+"""
+Stress test of user config storage, simultaneous GUI and scheduler writers on one instance.
+
+GUI writers do what AlasGUI._save_config() does: read, set a few options, write.
+Scheduler writers do what task_delay() does: read, set Scheduler.NextRun, write.
+Each writer owns different arguments, so all their last writes should be in the final config.
+Runs on json files and module.config.store.SqliteConfigStore, reports throughput, latency and lost updates.
+Exits 1 if SqliteConfigStore loses any update, json files are the baseline that loses updates.
+
+Usage:
+    python -m dev_tools.config_store_stress_test
+    python -m dev_tools.config_store_stress_test --gui 2 --scheduler 4 --duration 20
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from module.config.config_manual import ManualConfig
+from module.config.config_updater import ConfigUpdater
+from module.config.deep import deep_get, deep_iter, deep_set
+from module.config.utils import filepath_config, read_file
+from module.logger import logger
+
+INSTANCE = 'config_store_stress_test'
+# Arguments set by a GUI writer in one save
+GUI_CHANGES = 3
+# Seconds between writes, GUI saves after user input, scheduler between task steps
+GUI_INTERVAL = 0.05
+SCHEDULER_INTERVAL = 0.02
+
+
+def setup_store(store, db):
+    ManualConfig.CONFIG_STORE = store
+    if store == 'sqlite':
+        from module.config.store import CONFIG_STORE
+        CONFIG_STORE.file = db
+
+
+def owned_arguments(updater, index, writers):
+    """
+    Split integer inputs among GUI writers.
+
+    Returns:
+        list[str]: Argument paths owned by writer `index`
+    """
+    out = []
+    for keys, data in deep_iter(updater.args_index, depth=3):
+        if data['type'] == 'input' and type(data['value']) is int and data.get('display') != 'hide':
+            out.append('.'.join(keys))
+    return out[index::writers]
+
+
+def owned_tasks(updater, index, writers):
+    """
+    Split tasks among scheduler writers.
+    Tasks with hidden Scheduler.NextRun are skipped, like OpsiScheduling,
+    since hidden arguments are reset to default on every read.
+
+    Returns:
+        list[str]: Tasks owned by writer `index`
+    """
+    tasks = [task for task, groups in updater.args_index.items()
+             if 'NextRun' in groups.get('Scheduler', {})
+             and groups['Scheduler']['NextRun'].get('display') != 'hide']
+    return tasks[index::writers]
+
+
+def writer(kind, index, writers, store, db, duration, queue):
+    setup_store(store, db)
+    updater = ConfigUpdater()
+    rng = random.Random(f'{kind}{index}')
+    if kind == 'gui':
+        paths = owned_arguments(updater, index, writers)
+    else:
+        paths = [f'{task}.Scheduler.NextRun' for task in owned_tasks(updater, index, writers)]
+    latest = {}
+    read_cost, write_cost = [], []
+    base = datetime.now().replace(microsecond=0)
+    end = time.time() + duration
+    while time.time() < end:
+        start = time.perf_counter()
+        config = updater.read_file(INSTANCE)
+        read_cost.append(time.perf_counter() - start)
+
+        if kind == 'gui':
+            modified = {path: rng.randint(1, 10000) for path in rng.sample(paths, min(GUI_CHANGES, len(paths)))}
+        else:
+            path = rng.choice(paths)
+            modified = {path: base + timedelta(minutes=rng.randint(1, 100000))}
+        for path, value in modified.items():
+            deep_set(config, keys=path, value=value)
+
+        start = time.perf_counter()
+        updater.write_file(INSTANCE, config)
+        write_cost.append(time.perf_counter() - start)
+        latest.update(modified)
+        time.sleep(GUI_INTERVAL if kind == 'gui' else SCHEDULER_INTERVAL)
+    queue.put((kind, latest, read_cost, write_cost))
+
+
+def run(store, gui, scheduler, duration):
+    folder = tempfile.mkdtemp()
+    db = os.path.join(folder, 'config.db')
+    setup_store(store, db)
+    updater = ConfigUpdater()
+    template = updater.config_update(read_file(filepath_config('template')))
+    updater.write_file(INSTANCE, template)
+
+    queue = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=writer, args=('gui', i, gui, store, db, duration, queue))
+                 for i in range(gui)]
+    processes += [multiprocessing.Process(target=writer, args=('scheduler', i, scheduler, store, db, duration, queue))
+                  for i in range(scheduler)]
+    for p in processes:
+        p.start()
+    results = [queue.get() for _ in processes]
+    for p in processes:
+        p.join()
+
+    ConfigUpdater.config_cache.clear()
+    final = updater.read_file(INSTANCE)
+    checked, lost = 0, 0
+    for _, latest, _, _ in results:
+        for path, value in latest.items():
+            checked += 1
+            if deep_get(final, keys=path) != value:
+                lost += 1
+    integrity = 'ok'
+    if store == 'sqlite':
+        from module.config.store import CONFIG_STORE
+        integrity = CONFIG_STORE.conn.execute('PRAGMA integrity_check').fetchone()[0]
+        CONFIG_STORE.close()
+
+    for file in [filepath_config(INSTANCE), f'{filepath_config(INSTANCE)}.schema']:
+        if os.path.exists(file):
+            os.remove(file)
+    shutil.rmtree(folder, ignore_errors=True)
+
+    reads = [c for _, _, read_cost, _ in results for c in read_cost]
+    writes = [c for _, _, _, write_cost in results for c in write_cost]
+    return {
+        'store': store,
+        'writes': len(writes),
+        'read_p50': statistics.median(reads),
+        'write_p50': statistics.median(writes),
+        'write_max': max(writes),
+        'checked': checked,
+        'lost': lost,
+        'integrity': integrity,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Config store stress test')
+    parser.add_argument('--gui', type=int, default=2, help='GUI writers')
+    parser.add_argument('--scheduler', type=int, default=2, help='Scheduler writers')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--store', type=str, default='all', choices=['json', 'sqlite', 'all'])
+    args = parser.parse_args()
+
+    stores = ['json', 'sqlite'] if args.store == 'all' else [args.store]
+    rows = []
+    for store in stores:
+        logger.hr(f'Config store: {store}', level=1)
+        rows.append(run(store, args.gui, args.scheduler, args.duration))
+
+    logger.hr('Summary', level=2)
+    logger.info(f'Writers: {args.gui} GUI, {args.scheduler} scheduler, {args.duration}s')
+    for row in rows:
+        logger.info(f'{row["store"]}: {row["writes"] / args.duration:.1f} writes/s, '
+                    f'read p50 {row["read_p50"] * 1000:.2f}ms, '
+                    f'write p50 {row["write_p50"] * 1000:.2f}ms max {row["write_max"] * 1000:.1f}ms, '
+                    f'lost updates {row["lost"]}/{row["checked"]}, integrity {row["integrity"]}')
+    # Json files have no lock between processes and are expected to lose updates
+    if any(row['lost'] for row in rows if row['store'] == 'sqlite'):
+        logger.critical('SqliteConfigStore lost updates')
+        sys.exit(1)
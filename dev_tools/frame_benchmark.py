@@ -0,0 +1,75 @@
+"""
+Measure the per-frame cost of color checks on all pages, with and without module.base.frame.Frame
+
+Usage:
+    Put some screenshots into FOLDER, then
+    python -m dev_tools.frame_benchmark
+"""
+import os
+import time
+
+import numpy as np
+
+import module.config.server as server
+
+server.server = 'cn'  # Edit your server here.
+
+from module.base.frame import Frame
+from module.base.utils import load_image
+from module.logger import logger
+from module.ui.page import Page
+
+FOLDER = './screenshots/frame_benchmark'
+ROUNDS = 50
+
+
+def page_buttons():
+    return [page.check_button for page in Page.iter_pages() if page.check_button is not None]
+
+
+def sweep(buttons, image):
+    for button in buttons:
+        button.appear_on(image)
+
+
+def benchmark(buttons, image, use_frame):
+    record = []
+    for _ in range(ROUNDS):
+        # Every round is a new screenshot, clear first so the table is not inherited
+        Frame.clear()
+        if use_frame:
+            Frame.set(image)
+        start = time.perf_counter()
+        sweep(buttons, image)
+        record.append(time.perf_counter() - start)
+    Frame.clear()
+    return float(np.median(record))
+
+
+def verify(buttons, image):
+    """
+    Colors from summed-area table should be the same as cv2.mean()
+    """
+    frame = Frame(image)
+    frame.color_lookup = Frame.INTEGRAL_THRESHOLD
+    for button in buttons:
+        expect = np.array(Frame(image).get_color(button.area))
+        actual = np.array(frame.get_color(button.area))
+        if not np.allclose(expect, actual):
+            logger.warning(f'Color mismatch on {button}: {expect} != {actual}')
+            return False
+    return True
+
+
+if __name__ == '__main__':
+    buttons = page_buttons()
+    logger.info(f'Pages: {len(buttons)}')
+    files = [os.path.join(FOLDER, f) for f in os.listdir(FOLDER) if f.endswith('.png')]
+    for file in files:
+        image = load_image(file)
+        before = benchmark(buttons, image, use_frame=False)
+        after = benchmark(buttons, image, use_frame=True)
+        logger.info(f'{os.path.basename(file)}: '
+                    f'cv2.mean {before * 1000:.3f}ms, '
+                    f'summed-area table {after * 1000:.3f}ms, '
+                    f'verified={verify(buttons, image)}')
@@ -0,0 +1,158 @@
+"""
+Log transport from Alas processes to GUI, rendered renderables in a Manager queue
+versus StructuredLog batches in a pipe.
+
+Each instance process logs as fast as it can, as a busy Alas does in OCR and combat,
+GUI process receives all lines and renders the last ones displayed.
+Reports lines/s and CPU time of all processes, including the Manager process.
+
+Usage:
+    python -m dev_tools.log_transport_benchmark
+    python -m dev_tools.log_transport_benchmark --instances 10 --lines 5000
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing import Pipe
+
+from rich.console import Console
+
+from module.logger import (RichRenderableHandler, StructuredLogHandler, logger, set_func_logger,
+                           set_structured_logger)
+from module.webui.process_manager import LogBatchSender
+
+# Lines rendered by GUI, as the log area shows
+DISPLAYED = 100
+
+
+def cpu_time():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def chatty(lines):
+    # Transport only, no console and file output
+    logger.handlers = [h for h in logger.handlers if isinstance(h, (RichRenderableHandler, StructuredLogHandler))]
+    for index in range(lines):
+        if index % 100 == 0:
+            logger.hr(f'Round {index // 100}', level=2)
+        elif index % 10 == 0:
+            logger.attr('Index', index)
+        else:
+            logger.info(f'Detect: {index}, result: [{index % 7}, {index % 13}], similarity: 0.{index % 1000:03d}')
+
+
+def worker_queue(q, lines):
+    set_func_logger(func=q.put)
+    chatty(lines)
+    # End of logs
+    q.put(None)
+
+
+def worker_pipe(conn, lines):
+    sender = LogBatchSender(conn)
+    set_structured_logger(func=sender.put)
+    try:
+        chatty(lines)
+    finally:
+        sender.flush()
+
+
+def render(renderables):
+    with open(os.devnull, 'w') as f:
+        console = Console(file=f, width=80, force_terminal=False)
+        for renderable in renderables[-DISPLAYED:]:
+            console.print(renderable)
+
+
+def run_queue(instances, lines):
+    manager = multiprocessing.Manager()
+    queues = [manager.Queue() for _ in range(instances)]
+    received = [[] for _ in range(instances)]
+
+    def receive(index):
+        # Like ProcessManager._thread_log_queue_handler() before batching
+        q, out = queues[index], received[index]
+        while 1:
+            renderable = q.get()
+            if renderable is None:
+                break
+            out.append(renderable)
+
+    processes = [multiprocessing.Process(target=worker_queue, args=(q, lines)) for q in queues]
+    threads = [threading.Thread(target=receive, args=(i,)) for i in range(instances)]
+    for t in threads:
+        t.start()
+    for p in processes:
+        p.start()
+    for t in threads:
+        t.join()
+    for p in processes:
+        p.join()
+    for out in received:
+        render(out)
+    manager.shutdown()
+
+
+def run_pipe(instances, lines):
+    received = [[] for _ in range(instances)]
+    readers = []
+    processes = []
+    for _ in range(instances):
+        reader, writer = Pipe(duplex=False)
+        processes.append(multiprocessing.Process(target=worker_pipe, args=(writer, lines)))
+        readers.append((reader, writer))
+
+    def receive(index):
+        # Like ProcessManager._thread_log_queue_handler()
+        reader, out = readers[index][0], received[index]
+        while 1:
+            try:
+                out.extend(reader.recv())
+            except EOFError:
+                break
+
+    for p in processes:
+        p.start()
+    for _, writer in readers:
+        writer.close()
+    threads = [threading.Thread(target=receive, args=(i,)) for i in range(instances)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for p in processes:
+        p.join()
+    for out in received:
+        # StructuredLog is rendered through __rich__(), displayed lines only
+        render(out)
+
+
+def measure(func, instances, lines):
+    cpu = cpu_time()
+    start = time.perf_counter()
+    func(instances, lines)
+    cost = time.perf_counter() - start
+    cpu = cpu_time() - cpu
+    return cost, cpu
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Log transport benchmark')
+    parser.add_argument('--instances', type=int, default=10)
+    parser.add_argument('--lines', type=int, default=2000, help='Log lines of each instance')
+    args = parser.parse_args()
+
+    rows = []
+    for name, func in [('Manager queue, rendered', run_queue), ('Pipe, structured batches', run_pipe)]:
+        logger.hr(name, level=1)
+        cost, cpu = measure(func, args.instances, args.lines)
+        rows.append((name, cost, cpu))
+
+    logger.hr('Summary', level=2)
+    logger.info(f'Instances: {args.instances}, lines: {args.lines} each')
+    total = args.instances * args.lines
+    for name, cost, cpu in rows:
+        logger.info(f'{name}: {total / cost:.0f} lines/s, {cost:.2f}s, CPU {cpu:.2f}s')
@@ -0,0 +1,269 @@
+"""
+Accuracy and speed of OCR on a versioned corpus of labelled crops,
+running each Ocr subclass through its own pre_process() and after_process(),
+with OCR models in process or through the OCR server.
+
+Corpus:
+    CORPUS_FOLDER/corpus.json, bump `version` when samples or labels change.
+    Version 1 has crops of OCR assets in ./assets/<server>, one for each call site and server,
+    labelled by hand. Benchmark exits with code 1 if a server has no samples.
+    Each sample is an RGB crop taken at an OCR call site:
+    {
+        "server": "cn",
+        "ocr": "module.statistics.item:AMOUNT_OCR",     # An Ocr object, or an Ocr class
+        "kwargs": {"letter": [255, 255, 255]},          # Optional, arguments to create the Ocr class,
+                                                        # `name` defaults to the class name
+        "file": "cn/AMOUNT_OCR/0001.png",               # Relative to CORPUS_FOLDER
+        "expected": "12"                                # Text of result, see result_text()
+    }
+Usage:
+    Add a sample, label is the current result, check it manually:
+        python -m dev_tools.ocr_benchmark --add <screenshot> --area 43,89,113,113 \\
+            --ocr module.statistics.item:AMOUNT_OCR --server cn
+    Run all servers in process and through OCR server:
+        python -m dev_tools.ocr_benchmark --start-server
+    Run one of them:
+        python -m dev_tools.ocr_benchmark --server cn --mode local
+"""
+import argparse
+import copy
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+import numpy as np
+
+import module.config.server as server
+
+CORPUS_FOLDER = './dev_tools/ocr_corpus'
+SERVERS = ['cn', 'en', 'jp', 'tw']
+MODES = ['local', 'rpc']
+ROUNDS = 5
+
+
+def load_corpus():
+    with open(os.path.join(CORPUS_FOLDER, 'corpus.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_corpus(corpus):
+    with open(os.path.join(CORPUS_FOLDER, 'corpus.json'), 'w', encoding='utf-8') as f:
+        json.dump(corpus, f, indent=2, ensure_ascii=False)
+
+
+def load_ocr(path, kwargs=None):
+    """
+    Args:
+        path (str): `module:attribute` of an Ocr object or an Ocr class
+        kwargs (dict): Arguments to create the Ocr class
+
+    Returns:
+        Ocr:
+    """
+    from module.ocr.ocr import Ocr
+    module, name = path.split(':')
+    obj = getattr(importlib.import_module(module), name)
+    if isinstance(obj, type):
+        kwargs = {k: tuple(v) if isinstance(v, list) else v for k, v in (kwargs or {}).items()}
+        kwargs.setdefault('name', name)
+        obj = obj([], **kwargs)
+    if not isinstance(obj, Ocr):
+        raise TypeError(f'{path} is not an Ocr')
+    return obj
+
+
+def result_text(result):
+    """
+    Returns:
+        str: Results of Ocr subclasses in text, such as `12`, `14/15`, `1:30:00`
+    """
+    if isinstance(result, tuple) and len(result) == 3:
+        # DigitCounter, current, remain, total
+        return f'{result[0]}/{result[2]}'
+    if isinstance(result, timedelta):
+        return str(result)
+    if isinstance(result, list):
+        return ','.join(result_text(r) for r in result)
+    return str(result)
+
+
+def run_ocr(ocr, image):
+    """
+    Run a single crop through Ocr.ocr(), as it's called in game.
+    """
+    ocr = copy.copy(ocr)
+    ocr.buttons = [(0, 0, image.shape[1], image.shape[0])]
+    return result_text(ocr.ocr(image))
+
+
+def peak_rss():
+    """
+    Returns:
+        int: Peak resident memory of current process in bytes
+    """
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux in KB, macOS in bytes
+        return rss if sys.platform == 'darwin' else rss * 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+
+
+def benchmark(mode, address):
+    from module.base.utils import load_image
+    from module.logger import logger
+    from module.ocr import ocr as ocr_module
+    from module.ocr.ocr import OCR_CACHE, Ocr
+
+    # Measure OCR models, not cache
+    OCR_CACHE.size = 0
+    Ocr.SHOW_LOG = False
+    if mode == 'rpc':
+        from module.ocr.rpc import ModelProxy, ModelProxyFactory
+        ModelProxy.init(address=address)
+        ocr_module.OCR_MODEL = ModelProxyFactory()
+    else:
+        from module.ocr.models import OCR_MODEL
+        ocr_module.OCR_MODEL = OCR_MODEL
+
+    corpus = load_corpus()
+    samples = [s for s in corpus['samples'] if s['server'] == server.server]
+    logger.hr(f'OCR benchmark, corpus v{corpus["version"]}, server {server.server}, {mode}', level=1)
+    if not samples:
+        # An empty corpus would report nothing and look like a pass
+        logger.critical(f'No samples of server {server.server} in {CORPUS_FOLDER}/corpus.json')
+        sys.exit(1)
+
+    # Key: ocr path, value: [Ocr, list of (file, image, expected)]
+    groups = {}
+    for sample in samples:
+        key = sample['ocr'] + json.dumps(sample.get('kwargs', {}), sort_keys=True)
+        if key not in groups:
+            groups[key] = [load_ocr(sample['ocr'], sample.get('kwargs')), []]
+        image = load_image(os.path.join(CORPUS_FOLDER, sample['file']))
+        groups[key][1].append((sample['file'], image, sample['expected']))
+
+    # Load models before timing
+    for ocr, data in groups.values():
+        run_ocr(ocr, data[0][1])
+
+    total, correct, costs = 0, 0, []
+    for ocr, data in groups.values():
+        group_correct, group_costs = 0, []
+        for file, image, expected in data:
+            record = []
+            actual = ''
+            for _ in range(ROUNDS):
+                start = time.perf_counter()
+                actual = run_ocr(ocr, image)
+                record.append(time.perf_counter() - start)
+            group_costs.append(float(np.median(record)))
+            if actual == expected:
+                group_correct += 1
+            else:
+                logger.warning(f'{file}: {actual}, expected {expected}')
+
+        # All crops of a call site in one batch
+        images = [image for _, image, _ in data]
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            ocr._ocr(images, direct_ocr=True)
+        throughput = len(images) * ROUNDS / (time.perf_counter() - start)
+
+        logger.info(f'{ocr.name} ({type(ocr).__name__}): '
+                    f'{group_correct}/{len(data)} correct, '
+                    f'{np.mean(group_costs) * 1000:.2f}ms/crop, '
+                    f'batch {throughput:.1f} crops/s')
+        total += len(data)
+        correct += group_correct
+        costs += group_costs
+
+    covered = {type(ocr) for ocr, _ in groups.values()}
+    uncovered = sorted({cls.__name__ for cls in all_subclasses(Ocr)} - {cls.__name__ for cls in covered})
+
+    logger.hr('Summary', level=2)
+    logger.info(f'Corpus: v{corpus["version"]}, server: {server.server}, mode: {mode}')
+    logger.info(f'Accuracy: {correct}/{total} ({correct / total:.1%})')
+    logger.info(f'Latency: {np.mean(costs) * 1000:.2f}ms/crop, p99 {np.percentile(costs, 99) * 1000:.2f}ms')
+    logger.info(f'Peak RSS: {peak_rss() / 1048576:.1f}MB')
+    if uncovered:
+        logger.info(f'Ocr subclasses imported but not in corpus: {uncovered}')
+
+
+def all_subclasses(cls):
+    out = set()
+    for sub in cls.__subclasses__():
+        out.add(sub)
+        out |= all_subclasses(sub)
+    return out
+
+
+def add_sample(file, area, path, kwargs):
+    from module.base.utils import crop, load_image, save_image
+    from module.logger import logger
+
+    image = crop(load_image(file), area)
+    ocr = load_ocr(path, kwargs)
+    expected = run_ocr(ocr, image)
+
+    corpus = load_corpus()
+    folder = os.path.join(server.server, path.split(':')[1])
+    os.makedirs(os.path.join(CORPUS_FOLDER, folder), exist_ok=True)
+    index = sum(1 for s in corpus['samples'] if s['file'].startswith(folder.replace('\\', '/') + '/')) + 1
+    name = f'{folder}/{index:04d}.png'.replace('\\', '/')
+    save_image(image, os.path.join(CORPUS_FOLDER, name))
+    sample = {'server': server.server, 'ocr': path, 'file': name, 'expected': expected}
+    if kwargs:
+        sample['kwargs'] = kwargs
+    corpus['samples'].append(sample)
+    save_corpus(corpus)
+    logger.info(f'Sample added: {sample}, check the label manually and bump corpus version')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='OCR benchmark')
+    parser.add_argument('--server', type=str, default='all', choices=SERVERS + ['all'])
+    parser.add_argument('--mode', type=str, default='all', choices=MODES + ['all'])
+    parser.add_argument('--address', type=str, default='127.0.0.1:22268')
+    parser.add_argument('--start-server', action='store_true', help='Start an OCR server on the port of address')
+    parser.add_argument('--add', type=str, help='Screenshot to add a sample from')
+    parser.add_argument('--area', type=str, help='Crop area of sample, x1,y1,x2,y2')
+    parser.add_argument('--ocr', type=str, help='`module:attribute` of the Ocr of sample')
+    parser.add_argument('--kwargs', type=str, default='', help='Arguments to create the Ocr class, in json')
+    args = parser.parse_args()
+
+    if args.add:
+        server.server = args.server if args.server != 'all' else 'cn'
+        area = tuple(int(x) for x in args.area.split(','))
+        add_sample(args.add, area, args.ocr, json.loads(args.kwargs) if args.kwargs else None)
+    elif args.server != 'all' and args.mode != 'all':
+        # Run in a separate process for each server and mode, so are OCR assets and peak RSS
+        server.server = args.server
+        benchmark(args.mode, args.address)
+    else:
+        process = None
+        servers = SERVERS if args.server == 'all' else [args.server]
+        modes = MODES if args.mode == 'all' else [args.mode]
+        if 'rpc' in modes and args.start_server:
+            port = args.address.rsplit(':', 1)[1]
+            process = subprocess.Popen([sys.executable, '-m', 'module.ocr.rpc', '--port', port])
+            # Wait for models to be ready
+            time.sleep(5)
+        failed = []
+        for s in servers:
+            for mode in modes:
+                result = subprocess.run([sys.executable, '-m', 'dev_tools.ocr_benchmark',
+                                         '--server', s, '--mode', mode, '--address', args.address])
+                if result.returncode != 0:
+                    failed.append(f'{s} {mode}')
+        if process is not None:
+            process.kill()
+        if failed:
+            print(f'OCR benchmark failed: {failed}')
+            sys.exit(1)
@@ -0,0 +1,231 @@
+"""
+Harvest glyph templates of module.ocr.glyph.GlyphClassifier,
+and compare its accuracy and speed with OCR model azur_lane on a labelled corpus
+
+Corpus:
+    Pre_processed images of Digit and DigitCounter, the input of Ocr._ocr_model(),
+    saved as png into FOLDER/<server>.
+    Labels are in FOLDER/<server>/label.json, key: filename, value: text such as `14/15`.
+    Images are collected from the labelled crops of dev_tools.ocr_benchmark,
+    other screenshots can be added and labelled by OCR model.
+Usage:
+    python -m dev_tools.ocr_glyph_test --collect
+        Pre_process crops in the corpus of dev_tools.ocr_benchmark, labels are copied.
+    python -m dev_tools.ocr_glyph_test --label
+        Label new images by OCR model, check label.json manually after it.
+    python -m dev_tools.ocr_glyph_test --harvest
+        Generate templates into ./assets/ocr_glyph/<server>
+    python -m dev_tools.ocr_glyph_test
+        Test accuracy and speed.
+    python -m dev_tools.ocr_glyph_test --no-model
+        Test accuracy and speed of glyph templates only, if cnocr is not installed.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+import module.config.server as server
+
+server.server = 'cn'  # Edit your server here.
+
+from dev_tools import ocr_benchmark
+from module.base.utils import load_image, rgb2gray, save_image
+from module.logger import logger
+from module.ocr.glyph import GLYPH_FOLDER, GlyphClassifier, glyph_canvas, glyph_segment, glyph_vector
+from module.ocr.models import OCR_MODEL
+from module.ocr.ocr import Digit, DigitCounter
+
+FOLDER = './dev_tools/ocr_corpus/glyph'
+ALPHABET = '0123456789/'
+# Glyphs correlated above it are in the same font, and averaged into one template
+CLUSTER_SCORE = 0.9
+
+
+def corpus_folder():
+    return os.path.join(FOLDER, server.server)
+
+
+def load_labels():
+    file = os.path.join(corpus_folder(), 'label.json')
+    try:
+        with open(file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_labels(labels):
+    file = os.path.join(corpus_folder(), 'label.json')
+    with open(file, 'w', encoding='utf-8') as f:
+        json.dump(labels, f, indent=2, sort_keys=True)
+
+
+def load_corpus():
+    """
+    Yields:
+        str, np.ndarray: Filename, pre_processed image.
+    """
+    folder = corpus_folder()
+    for file in sorted(os.listdir(folder)):
+        if not file.endswith('.png'):
+            continue
+        image = load_image(os.path.join(folder, file))
+        if image.ndim == 3:
+            image = rgb2gray(image)
+        yield file, image
+
+
+def model_ocr(image):
+    result = OCR_MODEL.azur_lane.atomic_ocr_for_single_lines([image], ALPHABET)
+    return ''.join(result[0])
+
+
+def collect():
+    labels = load_labels()
+    os.makedirs(corpus_folder(), exist_ok=True)
+    new = 0
+    for sample in ocr_benchmark.load_corpus()['samples']:
+        if sample['server'] != server.server:
+            continue
+        ocr = ocr_benchmark.load_ocr(sample['ocr'], sample.get('kwargs'))
+        # Glyph classifier is opt-in, collect every candidate in the digit font of the game
+        if not isinstance(ocr, (Digit, DigitCounter)) or not ocr.lang.startswith('azur_lane'):
+            continue
+        image = load_image(os.path.join(ocr_benchmark.CORPUS_FOLDER, sample['file']))
+        # `cn/MEOWFFICER/0001.png` -> `MEOWFFICER_0001.png`
+        file = sample['file'].split('/', 1)[1].replace('/', '_')
+        save_image(ocr.pre_process(image), os.path.join(corpus_folder(), file))
+        labels[file] = sample['expected']
+        new += 1
+    save_labels(labels)
+    logger.info(f'Collected {new} images from {ocr_benchmark.CORPUS_FOLDER}')
+
+
+def label():
+    labels = load_labels()
+    new = 0
+    for file, image in load_corpus():
+        if file in labels:
+            continue
+        labels[file] = model_ocr(image)
+        logger.info(f'{file}: {labels[file]}')
+        new += 1
+    save_labels(labels)
+    logger.info(f'Labelled {new} new images, check them manually')
+
+
+def harvest():
+    labels = load_labels()
+    canvases = {}
+    for file, image in load_corpus():
+        text = labels.get(file)
+        if not text:
+            continue
+        glyphs = glyph_segment(image)
+        if len(glyphs) != len(text):
+            logger.info(f'{file}: {len(glyphs)} glyphs segmented, label is {text}, skip')
+            continue
+        for char, glyph in zip(text, glyphs):
+            canvases.setdefault(char, []).append(glyph_canvas(glyph))
+
+    folder = os.path.join(GLYPH_FOLDER, server.server)
+    if os.path.exists(folder):
+        for file in os.listdir(folder):
+            if file.endswith('.png'):
+                os.remove(os.path.join(folder, file))
+    for char, data in sorted(canvases.items()):
+        clusters = cluster(data)
+        for index, group in enumerate(clusters):
+            suffix = f'_{index + 1}' if index else ''
+            GlyphClassifier.save_template(np.mean(group, axis=0), folder, char, suffix=suffix)
+        logger.info(f'Glyph {char}: {len(data)} samples, {len(clusters)} templates')
+    logger.info(f'Templates saved to {folder}')
+
+
+def cluster(canvases):
+    """
+    Group glyphs of a character by font, an average of different fonts matches none of them.
+
+    Args:
+        canvases (list[np.ndarray]): Outputs of glyph_canvas()
+
+    Returns:
+        list[list[np.ndarray]]:
+    """
+    groups = []
+    for canvas in canvases:
+        vector = glyph_vector(canvas)
+        for group in groups:
+            if vector @ glyph_vector(np.mean(group, axis=0)) >= CLUSTER_SCORE:
+                group.append(canvas)
+                break
+        else:
+            groups.append([canvas])
+    return groups
+
+
+def test(model=True):
+    labels = load_labels()
+    classifier = GlyphClassifier.from_folder(os.path.join(GLYPH_FOLDER, server.server))
+    if not classifier:
+        logger.error('No glyph templates, run --harvest first')
+        return
+
+    total, accepted, wrong, model_wrong = 0, 0, 0, 0
+    glyph_cost, model_cost = [], []
+    for file, image in load_corpus():
+        text = labels.get(file)
+        if text is None:
+            continue
+        total += 1
+
+        start = time.perf_counter()
+        result = classifier.classify(image, ALPHABET)
+        glyph_cost.append(time.perf_counter() - start)
+        if model:
+            start = time.perf_counter()
+            model_result = model_ocr(image)
+            model_cost.append(time.perf_counter() - start)
+            if model_result != text:
+                model_wrong += 1
+        else:
+            model_result = None
+        if result is None:
+            continue
+        accepted += 1
+        if result != text:
+            wrong += 1
+            logger.warning(f'{file}: glyph {result}, label {text}, model {model_result}')
+
+    if not total:
+        logger.error('No labelled images')
+        return
+    logger.hr('Summary', level=2)
+    logger.info(f'Images: {total}, accepted by glyph: {accepted} ({accepted / total:.1%}), '
+                f'fall back to model: {total - accepted}')
+    logger.info(f'Glyph errors: {wrong}/{accepted}')
+    logger.info(f'Glyph: {np.median(glyph_cost) * 1000:.3f}ms')
+    if model:
+        logger.info(f'Model errors: {model_wrong}/{total}')
+        logger.info(f'Model: {np.median(model_cost) * 1000:.3f}ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Glyph classifier test')
+    parser.add_argument('--collect', action='store_true', help='Collect images from OCR benchmark corpus')
+    parser.add_argument('--label', action='store_true', help='Label new images by OCR model')
+    parser.add_argument('--harvest', action='store_true', help='Generate glyph templates from labelled images')
+    parser.add_argument('--no-model', action='store_true', help='Test glyph templates without OCR model')
+    args = parser.parse_args()
+
+    if args.collect:
+        collect()
+    elif args.label:
+        label()
+    elif args.harvest:
+        harvest()
+    else:
+        test(model=not args.no_model)
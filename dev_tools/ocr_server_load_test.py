@@ -0,0 +1,118 @@
+"""
+Load test of OCR server, simulating multiple Alas instances calling atomic_ocr_for_single_lines()
+
+Usage:
+    Start an OCR server first, or use --start-server, then
+    python -m dev_tools.ocr_server_load_test --clients 6 --duration 20
+    python -m dev_tools.ocr_server_load_test --clients 6 --start-server --batch-latency 0
+"""
+import argparse
+import multiprocessing
+import time
+
+import cv2
+import numpy as np
+
+from module.logger import logger
+from module.ocr.rpc import BATCH_LATENCY, BATCH_SIZE, start_ocr_server
+
+# Typical requests from Alas: a counter like oil/coins, and a list of commission durations
+DIGIT_SHAPE = (22, 96)
+LIST_LENGTH = 4
+
+
+def text_image(text, shape):
+    """
+    Returns:
+        np.ndarray: Pre_processed-like image, dark text on white background
+    """
+    image = np.full(shape, 255, dtype=np.uint8)
+    cv2.putText(image, text, (2, shape[0] - 4), cv2.FONT_HERSHEY_SIMPLEX, 0.6, 0, 2)
+    return image
+
+
+def requests():
+    """
+    Yields:
+        tuple[str, list[np.ndarray], str]: lang, images, alphabet
+    """
+    rng = np.random.default_rng()
+    while 1:
+        number = str(rng.integers(0, 100000))
+        yield 'azur_lane', [text_image(number, DIGIT_SHAPE)], '0123456789IDSB'
+        durations = [f'{rng.integers(0, 24):02d}:{rng.integers(0, 60):02d}:{rng.integers(0, 60):02d}'
+                     for _ in range(LIST_LENGTH)]
+        yield 'azur_lane', [text_image(d, DIGIT_SHAPE) for d in durations], '0123456789:IDSB'
+
+
+def client(address, duration, queue):
+    import zerorpc
+    rpc = zerorpc.Client(timeout=30)
+    rpc.connect(f'tcp://{address}')
+    rpc.hello()
+    record = []
+    images = 0
+    end = time.time() + duration
+    for lang, img_list, alphabet in requests():
+        if time.time() > end:
+            break
+        img_str_list = [image.dumps() for image in img_list]
+        start = time.perf_counter()
+        rpc('atomic_ocr_for_single_lines', lang, img_str_list, alphabet)
+        record.append(time.perf_counter() - start)
+        images += len(img_list)
+    rpc.close()
+    queue.put((record, images))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='OCR server load test')
+    parser.add_argument('--address', type=str, default='127.0.0.1:22268')
+    parser.add_argument('--clients', type=int, default=6)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--start-server', action='store_true', help='Start an OCR server on the port of address')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--batch-latency', type=float, default=BATCH_LATENCY)
+    args = parser.parse_args()
+
+    server = None
+    if args.start_server:
+        port = int(args.address.rsplit(':', 1)[1])
+        server = multiprocessing.Process(target=start_ocr_server, args=(port, args.batch_size, args.batch_latency))
+        server.start()
+        # Wait for models to be ready
+        time.sleep(5)
+
+    # Warm up models
+    import zerorpc
+    warmup = zerorpc.Client(timeout=60)
+    warmup.connect(f'tcp://{args.address}')
+    for _,(lang, img_list, alphabet) in zip(range(2), requests()):
+        warmup('atomic_ocr_for_single_lines', lang, [image.dumps() for image in img_list], alphabet)
+
+    queue = multiprocessing.Queue()
+    clients = [multiprocessing.Process(target=client, args=(args.address, args.duration, queue))
+               for _ in range(args.clients)]
+    for c in clients:
+        c.start()
+    results = [queue.get() for _ in clients]
+    for c in clients:
+        c.join()
+
+    latency = np.concatenate([np.array(record) for record, _ in results])
+    images = sum(images for _, images in results)
+    logger.hr('Summary', level=2)
+    logger.info(f'Clients: {args.clients}, duration: {args.duration}s')
+    logger.info(f'Requests: {len(latency)}, images: {images}')
+    logger.info(f'Throughput: {len(latency) / args.duration:.1f} requests/s, {images / args.duration:.1f} images/s')
+    logger.info(f'Latency: p50 {np.percentile(latency, 50) * 1000:.1f}ms, '
+                f'p99 {np.percentile(latency, 99) * 1000:.1f}ms')
+    try:
+        logger.info(f'Server batches: {warmup.batch_stats()}')
+    except Exception:
+        # Server without batching
+        pass
+    warmup.close()
+
+    if server is not None:
+        server.kill()
@@ -0,0 +1,113 @@
+"""
+Compare image transports of OCR server on the same host,
+pickles of ndarray.dumps() versus module.ocr.rpc.SharedMemoryArena
+
+Usage:
+    Start an OCR server first, or use --start-server, then
+    python -m dev_tools.ocr_transport_benchmark
+    python -m dev_tools.ocr_transport_benchmark --start-server --ocr
+"""
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+from module.logger import logger
+from module.ocr.rpc import SharedMemoryArena, start_ocr_server
+
+ROUNDS = 200
+# name, image shape, images in one request
+PAYLOADS = [
+    ('digit', (22, 96), 1),
+    ('list', (22, 96), 4),
+    ('long list', (22, 96), 16),
+    ('line', (30, 400), 1),
+]
+
+
+def payload(shape, count):
+    rng = np.random.default_rng()
+    return [rng.integers(0, 256, size=shape, dtype=np.uint8) for _ in range(count)]
+
+
+def measure(func):
+    record = []
+    result = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = func()
+        record.append(time.perf_counter() - start)
+    return result, float(np.median(record)), float(np.percentile(record, 99))
+
+
+def transports(rpc, arena, img_list, ocr):
+    """
+    Returns:
+        tuple[callable, callable]: Request through pickle, request through shared memory
+    """
+    if ocr:
+        def pickled():
+            return rpc('atomic_ocr_for_single_lines', 'azur_lane', [image.dumps() for image in img_list], None)
+
+        def shared():
+            with arena.lock:
+                descriptors = arena.write(img_list)
+                return rpc('atomic_ocr_for_single_lines_shm', 'azur_lane', arena.name, descriptors, None)
+    else:
+        def pickled():
+            return rpc('transport_echo', [image.dumps() for image in img_list])
+
+        def shared():
+            with arena.lock:
+                descriptors = arena.write(img_list)
+                return rpc('transport_echo_shm', arena.name, descriptors)
+
+    return pickled, shared
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='OCR server transport benchmark')
+    parser.add_argument('--address', type=str, default='127.0.0.1:22268')
+    parser.add_argument('--start-server', action='store_true', help='Start an OCR server on the port of address')
+    parser.add_argument('--ocr', action='store_true', help='Run OCR on server, instead of loading images only')
+    args = parser.parse_args()
+
+    server = None
+    if args.start_server:
+        port = int(args.address.rsplit(':', 1)[1])
+        server = multiprocessing.Process(target=start_ocr_server, args=(port,))
+        server.start()
+        # Wait for models to be ready
+        time.sleep(5)
+
+    import zerorpc
+    rpc = zerorpc.Client(timeout=60)
+    rpc.connect(f'tcp://{args.address}')
+    rpc.hello()
+    arena = SharedMemoryArena()
+    if not rpc('shm_attach', arena.name):
+        logger.error('OCR server failed to attach shared memory')
+    else:
+        rows = []
+        for name, shape, count in PAYLOADS:
+            img_list = payload(shape, count)
+            pickled, shared = transports(rpc, arena, img_list, ocr=args.ocr)
+            # Warm up
+            pickled(), shared()
+            expect, pickle_p50, pickle_p99 = measure(pickled)
+            actual, shm_p50, shm_p99 = measure(shared)
+            mark = '' if expect == actual else ' MISMATCH'
+            logger.info(f'{name} {count}x{shape}: '
+                        f'pickle p50 {pickle_p50 * 1000:.3f}ms p99 {pickle_p99 * 1000:.3f}ms, '
+                        f'shared memory p50 {shm_p50 * 1000:.3f}ms p99 {shm_p99 * 1000:.3f}ms{mark}')
+            rows.append((name, pickle_p50, shm_p50))
+
+        logger.hr('Summary', level=2)
+        for name, pickle_p50, shm_p50 in rows:
+            logger.info(f'{name}: {pickle_p50 / shm_p50:.2f}x')
+
+    rpc.close()
+    arena.close()
+    if server is not None:
+        server.kill()
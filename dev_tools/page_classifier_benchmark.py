@@ -0,0 +1,96 @@
+"""
+Measure the latency of getting current page on saved screenshots,
+sequential matching in the order of Page.iter_pages() versus module.ui.page.PageClassifier
+
+Usage:
+    Put screenshots of pages into FOLDER, then
+    python -m dev_tools.page_classifier_benchmark
+"""
+import os
+import time
+
+import numpy as np
+
+import module.config.server as server
+
+server.server = 'cn'  # Edit your server here.
+
+from module.base.frame import Frame
+from module.base.utils import load_image
+from module.logger import logger
+from module.ui.page import Page, PageClassifier, page_main, page_main_white
+
+FOLDER = './screenshots/page_classifier_benchmark'
+ROUNDS = 20
+
+
+def page_appear(page, image):
+    """
+    The same as UI.ui_page_appear() without interval
+    """
+    if page == page_main:
+        if page_main_white.check_button.match(image, offset=(30, 30)):
+            return True
+        if page_main.check_button.match(image, offset=(5, 5)):
+            return True
+        return False
+    return page.check_button.match(image, offset=(30, 30))
+
+
+def sequential(image):
+    for page in Page.iter_pages():
+        if page.check_button is None:
+            continue
+        if page_appear(page, image):
+            return page
+    return None
+
+
+def classified(image, classifier, prior=None):
+    for page in classifier.candidates(image, prior=prior):
+        if page_appear(page, image):
+            return page
+    return None
+
+
+def measure(func, image, *args):
+    record = []
+    result = None
+    for _ in range(ROUNDS):
+        # Every round is a new screenshot, clear first so derived data are not inherited
+        Frame.clear()
+        Frame.set(image)
+        start = time.perf_counter()
+        result = func(image, *args)
+        record.append(time.perf_counter() - start)
+    Frame.clear()
+    return result, float(np.median(record))
+
+
+if __name__ == '__main__':
+    classifier = PageClassifier.from_pages()
+    files = sorted([os.path.join(FOLDER, f) for f in os.listdir(FOLDER) if f.endswith('.png')])
+    # Load templates before timing
+    for file in files[:1]:
+        sequential(load_image(file))
+
+    total_before, total_after, total_prior = [], [], []
+    for file in files:
+        image = load_image(file)
+        expect, before = measure(sequential, image)
+        actual, after = measure(classified, image, classifier)
+        _, prior = measure(classified, image, classifier, expect)
+        total_before.append(before)
+        total_after.append(after)
+        total_prior.append(prior)
+        mark = '' if expect == actual else ' MISMATCH'
+        logger.info(f'{os.path.basename(file)}: {expect} -> {actual}{mark}, '
+                    f'sequential {before * 1000:.2f}ms, '
+                    f'classifier {after * 1000:.2f}ms, '
+                    f'classifier with prior {prior * 1000:.2f}ms')
+
+    if files:
+        logger.hr('Summary', level=2)
+        logger.info(f'Sequential: {np.mean(total_before) * 1000:.2f}ms')
+        logger.info(f'Classifier: {np.mean(total_after) * 1000:.2f}ms')
+        logger.info(f'Classifier with prior: {np.mean(total_prior) * 1000:.2f}ms')
@@ -0,0 +1,197 @@
+"""
+Randomized equivalence test of module.config.scheduler.TaskScheduler,
+against sorting all tasks on each call, which AzurLaneConfig.get_next_task() did before.
+
+Each round generates a random config and SCHEDULER_PRIORITY, then applies random modifications
+as task_delay(), task_call(), opsi_task_delay() and GUI do, checking the next task after each of them.
+
+Usage:
+    python -m dev_tools.scheduler_equivalence_test
+    python -m dev_tools.scheduler_equivalence_test --rounds 2000 --seed 1
+"""
+import argparse
+import copy
+import operator
+import random
+import time
+from datetime import datetime, timedelta
+
+from module.base.filter import Filter
+from module.config.config_manual import ManualConfig
+from module.config.scheduler import Function, TaskScheduler
+from module.config.utils import filepath_args, read_file
+from module.logger import logger
+
+STEPS = 50
+HOARDING = timedelta(minutes=20)
+
+
+def reference(data, priority, now):
+    """
+    AzurLaneConfig.get_next_task() before TaskScheduler.
+
+    Returns:
+        tuple[list[Function], list[Function]]: pending, waiting
+    """
+    pending = []
+    waiting = []
+    error = []
+    for func in data.values():
+        func = Function(func)
+        if not func.enable:
+            continue
+        if not isinstance(func.next_run, datetime):
+            error.append(func)
+        elif func.next_run < now:
+            pending.append(func)
+        else:
+            waiting.append(func)
+
+    f = Filter(regex=r"(.*)", attr=["command"])
+    f.load(priority)
+    if pending:
+        pending = f.apply(pending)
+    if waiting:
+        waiting = f.apply(waiting)
+        waiting = sorted(waiting, key=operator.attrgetter("next_run"))
+    if error:
+        pending = error + pending
+    return pending, waiting
+
+
+class RandomConfig:
+    def __init__(self, tasks, rng):
+        """
+        Args:
+            tasks (list[str]): Task names that have Scheduler
+            rng (random.Random):
+        """
+        self.tasks = tasks
+        self.rng = rng
+        self.now = datetime.now().replace(microsecond=0)
+        # Few distinct times, so there are ties of next_run
+        self.times = [self.now + timedelta(minutes=rng.randint(-600, 600)) for _ in range(len(tasks) // 3 + 1)]
+        self.data = {}
+        for task in rng.sample(tasks, rng.randint(1, len(tasks))):
+            self.data[task] = {'Scheduler': {
+                'Enable': rng.random() < 0.5,
+                'NextRun': self.random_time(),
+                'Command': task,
+            }}
+        # Sections without scheduler
+        self.data['Alas'] = {'Emulator': {'Serial': 'auto'}}
+
+    def random_time(self):
+        r = self.rng.random()
+        if r < 0.03:
+            # Invalid time from broken config
+            return '2020-01-01 00:00:00'
+        if r < 0.5:
+            return self.rng.choice(self.times)
+        return self.now + timedelta(minutes=self.rng.randint(-600, 600), seconds=self.rng.randint(0, 59))
+
+    def random_priority(self):
+        default = ManualConfig._DEFAULT_SCHEDULER_PRIORITY
+        r = self.rng.random()
+        if r < 0.6:
+            return default
+        tasks = [t for t in self.data if t != 'Alas']
+        adjust = self.rng.sample(tasks, self.rng.randint(0, len(tasks)))
+        if r < 0.8:
+            # TaskPriorityAdjustment before default
+            return ' > '.join(adjust) + '\n' + default
+        # Custom priority that misses some tasks, with duplicates and invalid ones
+        adjust += self.rng.sample(tasks, min(3, len(tasks)))
+        adjust.append('NotATask')
+        self.rng.shuffle(adjust)
+        return ' > '.join(adjust)
+
+    def modify(self):
+        """
+        Returns:
+            str: Task modified
+        """
+        task = self.rng.choice(list(self.data))
+        scheduler = self.data[task].get('Scheduler')
+        if scheduler is None:
+            return task
+        r = self.rng.random()
+        if r < 0.6:
+            # task_delay(), opsi_task_delay()
+            scheduler['NextRun'] = self.random_time()
+        elif r < 0.8:
+            # task_call()
+            scheduler['Enable'] = True
+            scheduler['NextRun'] = self.now - timedelta(minutes=self.rng.randint(0, 60))
+        else:
+            # GUI
+            scheduler['Enable'] = not scheduler['Enable']
+        return task
+
+
+def same(a, b):
+    return [(f.command, f.next_run) for f in a] == [(f.command, f.next_run) for f in b]
+
+
+def run(rounds, seed):
+    tasks = [task for task, groups in read_file(filepath_args()).items() if 'Scheduler' in groups]
+    rng = random.Random(seed)
+    checks, failures = 0, 0
+    cost_reference, cost_scheduler = 0., 0.
+    for index in range(rounds):
+        config = RandomConfig(tasks, rng)
+        priority = config.random_priority()
+        scheduler = TaskScheduler()
+        scheduler.sync(config.data, priority)
+        hoarding = True
+        for _ in range(STEPS):
+            r = rng.random()
+            if r < 0.1:
+                # Config modified by GUI and reloaded
+                priority = config.random_priority()
+                config.data = copy.deepcopy(config.data)
+                for _ in range(rng.randint(0, 3)):
+                    config.modify()
+                scheduler.sync(config.data, priority)
+            else:
+                # Modifications notified one by one
+                task = config.modify()
+                if 'Scheduler' in config.data[task]:
+                    scheduler.set(task, config.data[task])
+
+            now = config.now - HOARDING if hoarding else config.now
+            start = time.perf_counter()
+            pending, waiting = reference(config.data, priority, now)
+            cost_reference += time.perf_counter() - start
+            start = time.perf_counter()
+            task, is_pending = scheduler.next(now)
+            cost_scheduler += time.perf_counter() - start
+
+            expect = pending[0] if pending else waiting[0] if waiting else None
+            checks += 1
+            ok = (expect is None and task is None) \
+                 or (task is not None and expect is not None and same([task], [expect])
+                     and is_pending == bool(pending))
+            ok = ok and same(scheduler.pending_tasks(now), pending) and same(scheduler.waiting_tasks(now), waiting)
+            if not ok:
+                failures += 1
+                logger.warning(f'Round {index}: expected {expect}, got {task}, pending={is_pending}')
+                logger.warning(f'Priority: {priority!r}')
+                break
+            hoarding = not is_pending
+
+    logger.hr('Summary', level=2)
+    logger.info(f'Rounds: {rounds}, checks: {checks}, failures: {failures}')
+    logger.info(f'Next task: sort all {cost_reference / checks * 1e6:.1f}us, '
+                f'scheduler {cost_scheduler / checks * 1e6:.1f}us')
+    return failures == 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scheduler equivalence test')
+    parser.add_argument('--rounds', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if not run(args.rounds, args.seed):
+        exit(1)
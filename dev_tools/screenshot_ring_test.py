@@ -0,0 +1,71 @@
+"""
+Regression test of module.device.screenshot.ScreenshotRing
+
+Screenshots decoded from the ring must be pixel-identical to the ones appended,
+and memory usage must stay within budget.
+Usage:
+    Put some screenshots into FOLDER, then
+    python -m dev_tools.screenshot_ring_test
+"""
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from module.base.utils import load_image
+from module.device.screenshot import ScreenshotRing
+from module.logger import logger
+
+FOLDER = './screenshots/screenshot_ring_test'
+BUDGET_MB = 20
+
+
+def wait_encoded(ring, timeout=30):
+    start = time.time()
+    while time.time() - start < timeout:
+        with ring.cond:
+            if not ring.pending:
+                return True
+        time.sleep(0.05)
+    return False
+
+
+if __name__ == '__main__':
+    files = sorted([os.path.join(FOLDER, f) for f in os.listdir(FOLDER) if f.endswith('.png')])
+    images = [load_image(file) for file in files]
+    # Repeat the first one to test references to identical screenshots
+    if images:
+        images.insert(1, images[0].copy())
+
+    ring = ScreenshotRing(budget=BUDGET_MB * 1048576)
+    expect = []
+    start = time.time()
+    for image in images:
+        data = {'time': datetime.now(), 'image': image}
+        expect.append(data)
+        ring.append(data)
+        # Don't overrun PENDING_LIMIT
+        wait_encoded(ring)
+    cost = time.time() - start
+    logger.info(f'Encoded {len(images)} screenshots in {cost:.3f}s, {ring}')
+
+    failed = 0
+    if ring.size > ring.budget and len(ring.entries) > 1:
+        failed += 1
+        logger.warning(f'Ring exceeds memory budget: {ring.size} > {ring.budget}')
+    actual = list(ring)
+    # Only the latest ones are kept
+    expect = expect[-len(actual):] if actual else []
+    for e, a in zip(expect, actual):
+        if e['time'] != a['time']:
+            failed += 1
+            logger.warning(f'Time mismatch: {e["time"]} != {a["time"]}')
+        elif e['image'].shape != a['image'].shape or not np.array_equal(e['image'], a['image']):
+            failed += 1
+            logger.warning(f'Image at {e["time"]} is not lossless')
+
+    raw = sum(image.nbytes for image in images[-len(actual):]) if actual else 0
+    logger.hr('Summary', level=2)
+    logger.info(f'Screenshots: {len(images)}, kept: {len(actual)}, mismatches: {failed}')
+    logger.info(f'Memory: {ring.size / 1048576:.1f}MB encoded, {raw / 1048576:.1f}MB raw')
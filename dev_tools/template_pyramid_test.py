@@ -0,0 +1,101 @@
+"""
+Regression test of coarse-to-fine matching in Template.match_multi(pyramid=...)
+
+Results with pyramid must be the same as full resolution matching.
+Screenshots in FOLDER are composed of cn assets, with templates pasted at random positions,
+under brightness shift, noise and blur, so similarities are close to the thresholds.
+Put recorded screenshots into FOLDER to test more.
+
+Usage:
+    python -m dev_tools.template_pyramid_test
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+import module.config.server as server
+
+server.server = 'cn'  # Edit your server here.
+
+from module.base.utils import load_image, rgb2gray
+from module.event_hospital.assets import TEMPLATE_INVEST, TEMPLATE_INVEST2
+from module.handler.assets import TEMPLATE_MANJUU
+from module.logger import logger
+from module.sos.assets import TEMPLATE_SIGNAL_GOTO, TEMPLATE_SIGNAL_SEARCH
+from module.template.assets import TEMPLATE_DORM_COIN, TEMPLATE_DORM_LOVE
+
+FOLDER = './dev_tools/template_pyramid_corpus'
+# Templates that run match_multi() on full screenshots, and the similarity they use
+TEMPLATES = [
+    (TEMPLATE_INVEST, 0.85),
+    (TEMPLATE_INVEST2, 0.85),
+    (TEMPLATE_MANJUU, 0.8),
+    (TEMPLATE_SIGNAL_GOTO, 0.85),
+    (TEMPLATE_SIGNAL_SEARCH, 0.85),
+    (TEMPLATE_DORM_COIN, 0.85),
+    (TEMPLATE_DORM_LOVE, 0.85),
+]
+LEVELS = [1, 2]
+ROUNDS = 5
+
+
+def points(buttons):
+    return sorted([tuple(button.area[:2]) for button in buttons])
+
+
+def prepare(template, image):
+    """
+    Grayscale templates are matched on grayscale images, like TEMPLATE_INVEST in event_hospital.
+    """
+    first = template.image[0] if template.is_gif else template.image
+    if first.ndim == 2:
+        return rgb2gray(image)
+    return image
+
+
+def measure(template, image, similarity, pyramid):
+    record = []
+    result = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = template.match_multi(image, similarity=similarity, pyramid=pyramid)
+        record.append(time.perf_counter() - start)
+    return points(result), float(np.median(record))
+
+
+if __name__ == '__main__':
+    files = sorted([os.path.join(FOLDER, f) for f in os.listdir(FOLDER) if f.endswith('.png')])
+    failed = 0
+    matched = 0
+    # Key: (template name, level), value: list of time cost
+    cost = {}
+    for file in files:
+        screenshot = load_image(file)
+        for template, similarity in TEMPLATES:
+            image = prepare(template, screenshot)
+            expect, base = measure(template, image, similarity, pyramid=0)
+            cost.setdefault((template.name, 0), []).append(base)
+            matched += len(expect)
+            for level in LEVELS:
+                actual, t = measure(template, image, similarity, pyramid=level)
+                cost.setdefault((template.name, level), []).append(t)
+                if actual != expect:
+                    failed += 1
+                    logger.warning(f'{os.path.basename(file)} {template.name} pyramid={level}: '
+                                   f'{actual} != {expect}')
+
+    logger.hr('Summary', level=2)
+    logger.info(f'Screenshots: {len(files)}, templates: {len(TEMPLATES)}, '
+                f'matches at full resolution: {matched}, mismatches: {failed}')
+    if files:
+        for template, _ in TEMPLATES:
+            base = np.mean(cost[(template.name, 0)])
+            text = [f'full {base * 1000:.2f}ms']
+            for level in LEVELS:
+                t = np.mean(cost[(template.name, level)])
+                text.append(f'level {level} {t * 1000:.2f}ms ({base / t:.2f}x)')
+            logger.info(f'{template.name}: {", ".join(text)}')
+    if failed:
+        sys.exit(1)
@@ -1,5 +1,6 @@
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.frame import Frame, get_frame_color
 # 此文件定义了 Alas 逻辑模块的最高基类 ModuleBase。
 # 作为所有具体功能模块（如出击、大世界、每日任务等）的公共祖先，它整合了 UI 导航、任务循环控制及基本异常处理逻辑。
 from module.base.timer import Timer
@@ -185,6 +186,34 @@ class ModuleBase:
                 self.device.dump_hierarchy()
             yield self.device.image, self.device.hierarchy
 
+    def _button_memo(self, button, key, func):
+        """
+        Memoise detection results of a button on the current frame and identical frames after it.
+        Button offset is restored on memo hit, since click position depends on it.
+
+        Args:
+            button (Button):
+            key (tuple): Detection method and its arguments
+            func (callable): Detection to run if not memoised
+
+        Returns:
+            bool: If appear
+        """
+        frame = Frame.of(self.device.image)
+        if frame is None or not isinstance(button, Button):
+            return func()
+        # Button color and image may be changed by load_color()
+        image = button.image
+        key = (id(button), id(image), button.area, button.color) + key
+
+        def detect():
+            # Keep references of button and image, so their ids won't be reused while memoised
+            return button, image, func(), button._button_offset
+
+        _, _, appear, button_offset = frame.memo(key, detect)
+        button._button_offset = button_offset
+        return appear
+
     def appear(self, button, offset=0, interval=0, similarity=0.85, threshold=10):
         """
         Args:
@@ -228,9 +257,13 @@ class ModuleBase:
         elif offset:
             if isinstance(offset, bool):
                 offset = self.config.BUTTON_OFFSET
-            appear = button.match(self.device.image, offset=offset, similarity=similarity)
+            appear = self._button_memo(
+                button, ('match', offset, similarity),
+                lambda: button.match(self.device.image, offset=offset, similarity=similarity))
         else:
-            appear = button.appear_on(self.device.image, threshold=threshold)
+            appear = self._button_memo(
+                button, ('appear_on', threshold),
+                lambda: button.appear_on(self.device.image, threshold=threshold))
 
         if appear and interval:
             self.interval_timer[button.name].reset()
@@ -261,8 +294,10 @@ class ModuleBase:
             if not self.interval_timer[button.name].reached():
                 return False
 
-        appear = button.match_template_color(
-            self.device.image, offset=offset, similarity=similarity, threshold=threshold)
+        appear = self._button_memo(
+            button, ('match_template_color', offset, similarity, threshold),
+            lambda: button.match_template_color(
+                self.device.image, offset=offset, similarity=similarity, threshold=threshold))
 
         if appear and interval:
             self.interval_timer[button.name].reset()
@@ -378,7 +413,7 @@ class ModuleBase:
         point = fit_points(points, mod=image_size(image), encourage=encourage)
         point = ensure_int(point + area[:2])
         button_area = area_offset((-encourage, -encourage, encourage, encourage), offset=point)
-        color = get_color(self.device.image, button_area)
+        color = get_frame_color(self.device.image, button_area)
         return Button(area=button_area, color=color, button=button_area, name=name)
 
     def get_interval_timer(self, button, interval=5, renew=False) -> Timer:
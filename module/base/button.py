@@ -8,6 +8,7 @@ import imageio
 from PIL import ImageDraw
 
 from module.base.decorator import cached_property
+from module.base.frame import get_frame_binary, get_frame_color, get_frame_luma
 from module.base.resource import Resource
 from module.base.utils import *
 from module.config.server import VALID_SERVER
@@ -115,7 +116,7 @@ class Button(Resource):
             bool: True if button appears on screenshot.
         """
         return color_similar(
-            color1=get_color(image, self.area),
+            color1=get_frame_color(image, self.area),
             color2=self.color,
             threshold=threshold
         )
@@ -154,7 +155,10 @@ class Button(Resource):
         If needs to call self.match, call this first.
         """
         if not self._match_init:
-            if self.is_gif:
+            packed = self.resource_packed(area=self.area)
+            if packed is not None:
+                self.image = packed if self.is_gif else packed[0]
+            elif self.is_gif:
                 self.image = []
                 for image in imageio.mimread(self.file):
                     image = image[:, :, :3].copy() if len(image.shape) == 3 else image
@@ -170,7 +174,10 @@ class Button(Resource):
         If needs to call self.match, call this first.
         """
         if not self._match_binary_init:
-            if self.is_gif:
+            packed = self.resource_packed(area=self.area, variant='binary')
+            if packed is not None:
+                self.image_binary = packed if self.is_gif else packed[0]
+            elif self.is_gif:
                 self.image_binary = []
                 for image in self.image:
                     image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
@@ -183,7 +190,10 @@ class Button(Resource):
 
     def ensure_luma_template(self):
         if not self._match_luma_init:
-            if self.is_gif:
+            packed = self.resource_packed(area=self.area, variant='luma')
+            if packed is not None:
+                self.image_luma = packed if self.is_gif else packed[0]
+            elif self.is_gif:
                 self.image_luma = []
                 for image in self.image:
                     luma = rgb2luma(image)
@@ -192,6 +202,10 @@ class Button(Resource):
                 self.image_luma = rgb2luma(self.image)
             self._match_luma_init = True
 
+    def resource_preload(self):
+        if self.file:
+            self.ensure_template()
+
     def resource_release(self):
         super().resource_release()
         self.image = None
@@ -259,14 +273,10 @@ class Button(Resource):
                 offset = np.array(offset)
         else:
             offset = np.array((-3, -offset, 3, offset))
-        image = crop(image, offset + self.area, copy=False)
+        image_binary = get_frame_binary(image, offset + self.area)
 
         if self.is_gif:
             for template in self.image_binary:
-                # graying
-                image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-                # binarization
-                _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
                 # template matching
                 res = cv2.matchTemplate(template, image_binary, cv2.TM_CCOEFF_NORMED)
                 _, sim, _, point = cv2.minMaxLoc(res)
@@ -275,10 +285,6 @@ class Button(Resource):
                     return True
             return False
         else:
-            # graying
-            image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            # binarization
-            _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
             # template matching
             res = cv2.matchTemplate(self.image_binary, image_binary, cv2.TM_CCOEFF_NORMED)
             _, sim, _, point = cv2.minMaxLoc(res)
@@ -307,10 +313,9 @@ class Button(Resource):
                 offset = np.array(offset)
         else:
             offset = np.array((-3, -offset, 3, offset))
-        image = crop(image, offset + self.area, copy=False)
+        image_luma = get_frame_luma(image, offset + self.area)
 
         if self.is_gif:
-            image_luma = rgb2luma(image)
             for template in self.image_luma:
                 res = cv2.matchTemplate(template, image_luma, cv2.TM_CCOEFF_NORMED)
                 _, sim, _, point = cv2.minMaxLoc(res)
@@ -318,7 +323,6 @@ class Button(Resource):
                 if sim > similarity:
                     return True
         else:
-            image_luma = rgb2luma(image)
             res = cv2.matchTemplate(self.image_luma, image_luma, cv2.TM_CCOEFF_NORMED)
             _, sim, _, point = cv2.minMaxLoc(res)
             self._button_offset = area_offset(self._button, offset[:2] + np.array(point))
@@ -340,7 +344,7 @@ class Button(Resource):
         if self.match_luma(image, offset=offset, similarity=similarity):
             diff = np.subtract(self.button, self._button)[:2]
             area = area_offset(self.area, offset=diff)
-            color = get_color(image, area)
+            color = get_frame_color(image, area)
             return color_similar(color1=color, color2=self.color, threshold=threshold)
         else:
             return False
@@ -0,0 +1,329 @@
+import cv2
+import numpy as np
+
+from module.base.decorator import cached_property, has_cached_property, set_cached_property
+from module.base.utils import crop, get_color, rgb2hsv, rgb2luma, rgb2yuv
+
+
+class Frame:
+    """
+    A screenshot and the data derived from it.
+
+    Screenshot.screenshot() registers every new screenshot as the current frame,
+    derived data are computed once and shared by all the assets checked on it.
+    Images that are not the current frame, such as crops or images loaded from local files,
+    fall back to the plain functions in module.base.utils.
+
+    If a new screenshot is pixel-identical to the previous one, the new frame is marked as `unchanged`
+    and inherits derived data and memoised detection results from the previous frame.
+    """
+    # Class property, the frame of the latest screenshot
+    current: "Frame" = None
+    # Class property, counters of frames and memoised results, reset by stats_show()
+    stats = {'frame': 0, 'unchanged': 0, 'hit': 0, 'miss': 0}
+
+    # Size of the downsampled fingerprint to compare frames
+    FINGERPRINT_SIZE = (64, 36)
+    # Cached properties that are inherited by an unchanged frame
+    INHERIT = ['integral', 'gray', 'yuv', 'luma', 'hsv']
+
+    # Build the summed-area table after this amount of color lookups on one frame.
+    # cv2.integral() on a 1280x720 RGB image takes about 2ms,
+    # while cv2.mean() on a button sized area takes about 10us,
+    # so the table won't pay off when there are only a few buttons to check.
+    INTEGRAL_THRESHOLD = 32
+
+    def __init__(self, image):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+        """
+        self.image = image
+        self.color_lookup = 0
+        # Key: (x1, y1, x2, y2), value: binarized image of that area
+        self._binary = {}
+        # Key: any hashable, value: memoised detection results on this frame
+        self.results = {}
+        # If this frame is pixel-identical to the previous one
+        self.unchanged = False
+
+    @classmethod
+    def set(cls, image):
+        """
+        Register a new screenshot as current frame.
+        Data derived from the previous frame are dropped, unless the new screenshot is identical.
+
+        Args:
+            image (np.ndarray):
+
+        Returns:
+            Frame:
+        """
+        prev = cls.current
+        frame = cls(image)
+        cls.stats['frame'] += 1
+        # A reused buffer can't be compared with itself
+        if prev is not None and prev.image is not image and frame.same_as(prev):
+            frame.inherit(prev)
+            cls.stats['unchanged'] += 1
+        cls.current = frame
+        return frame
+
+    @classmethod
+    def of(cls, image):
+        """
+        Args:
+            image (np.ndarray):
+
+        Returns:
+            Frame: Current frame if `image` is the current screenshot itself, or None.
+        """
+        frame = cls.current
+        if frame is not None and frame.image is image:
+            return frame
+        return None
+
+    @classmethod
+    def clear(cls):
+        cls.current = None
+
+    @classmethod
+    def stats_show(cls, name=''):
+        """
+        Log counters since last call and reset them.
+
+        Args:
+            name (str): Task name
+        """
+        stats = cls.stats
+        if stats['frame']:
+            from module.logger import logger
+            total = stats['hit'] + stats['miss']
+            hit_rate = stats['hit'] / total if total else 0.
+            logger.info(f'Frame stats {name}: {stats["unchanged"]}/{stats["frame"]} frames unchanged, '
+                        f'{stats["hit"]}/{total} results memoised ({hit_rate:.1%})')
+        cls.stats = {'frame': 0, 'unchanged': 0, 'hit': 0, 'miss': 0}
+
+    @cached_property
+    def fingerprint(self):
+        return cv2.resize(self.image, self.FINGERPRINT_SIZE, interpolation=cv2.INTER_AREA)
+
+    def same_as(self, other):
+        """
+        Args:
+            other (Frame):
+
+        Returns:
+            bool: If two frames are pixel-identical
+        """
+        if self.image.shape != other.image.shape:
+            return False
+        if not np.array_equal(self.fingerprint, other.fingerprint):
+            return False
+        # Downsampling may hide tiny changes, confirm on the full image
+        return cv2.norm(self.image, other.image, cv2.NORM_INF) == 0
+
+    def inherit(self, other):
+        """
+        Reuse derived data and memoised results of an identical frame.
+
+        Args:
+            other (Frame):
+        """
+        self.unchanged = True
+        for name in self.INHERIT:
+            if has_cached_property(other, name):
+                set_cached_property(self, name, other.__dict__[name])
+        self.color_lookup = other.color_lookup
+        self._binary = other._binary
+        self.results = other.results
+
+    def memo(self, key, func):
+        """
+        Memoise a detection result on this frame and the identical frames after it.
+
+        Args:
+            key: Hashable, should include everything that affects the result
+            func (callable): Function to call if not memoised
+
+        Returns:
+            Result of func
+        """
+        try:
+            result = self.results[key]
+            Frame.stats['hit'] += 1
+            return result
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable key
+            return func()
+        result = func()
+        self.results[key] = result
+        Frame.stats['miss'] += 1
+        return result
+
+    @cached_property
+    def integral(self):
+        """
+        Summed-area table of the screenshot.
+
+        Returns:
+            np.ndarray: Shape (height + 1, width + 1, channel), dtype int32.
+                1280x720x255 won't overflow int32.
+        """
+        return cv2.integral(self.image)
+
+    @cached_property
+    def gray(self):
+        """
+        Returns:
+            np.ndarray: Shape (height, width).
+                Channels are taken as BGR, the same as template matching under binarization.
+        """
+        return cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+
+    @cached_property
+    def yuv(self):
+        return rgb2yuv(self.image)
+
+    @cached_property
+    def luma(self):
+        """
+        Returns:
+            np.ndarray: Y channel of YUV, shape (height, width)
+        """
+        luma, _, _ = cv2.split(self.yuv)
+        return luma
+
+    @cached_property
+    def hsv(self):
+        """
+        Returns:
+            np.ndarray: Hue (0~360), Saturation (0~100), Value (0~100).
+        """
+        return rgb2hsv(self.image)
+
+    def binary(self, area):
+        """
+        OTSU threshold depends on the pixels inside the area,
+        so binarized images are cached per area instead of being cropped from a full one.
+
+        Args:
+            area (tuple): (upper_left_x, upper_left_y, bottom_right_x, bottom_right_y)
+
+        Returns:
+            np.ndarray: Shape (height, width)
+        """
+        key = tuple(round(x) for x in area)
+        try:
+            return self._binary[key]
+        except KeyError:
+            pass
+        image = binarize(crop(self.gray, key, copy=False))
+        self._binary[key] = image
+        return image
+
+    def get_color(self, area):
+        """
+        Same as module.base.utils.get_color() but in O(1) once the summed-area table is built.
+
+        Args:
+            area (tuple): (upper_left_x, upper_left_y, bottom_right_x, bottom_right_y)
+
+        Returns:
+            tuple: (r, g, b)
+        """
+        self.color_lookup += 1
+        if self.color_lookup < self.INTEGRAL_THRESHOLD and not has_cached_property(self, 'integral'):
+            return get_color(self.image, area)
+        image = self.image
+        if len(image.shape) != 3 or image.shape[2] != 3:
+            return get_color(image, area)
+
+        x1, y1, x2, y2 = area
+        x1 = round(x1)
+        y1 = round(y1)
+        x2 = round(x2)
+        y2 = round(y2)
+        total = (x2 - x1) * (y2 - y1)
+        if total <= 0:
+            return get_color(image, area)
+        # Pixels outside the image are counted as black, the same as crop()
+        h, w = image.shape[:2]
+        x1 = min(max(x1, 0), w)
+        y1 = min(max(y1, 0), h)
+        x2 = min(max(x2, 0), w)
+        y2 = min(max(y2, 0), h)
+        s = self.integral
+        color = s[y2, x2].astype(np.int64) - s[y1, x2] - s[y2, x1] + s[y1, x1]
+        color = color / total
+        return color[0], color[1], color[2]
+
+
+def get_frame_color(image, area):
+    """
+    Calculate the average color of a particular area of the image,
+    use the summed-area table if image is the current frame.
+
+    Args:
+        image (np.ndarray): Screenshot.
+        area (tuple): (upper_left_x, upper_left_y, bottom_right_x, bottom_right_y)
+
+    Returns:
+        tuple: (r, g, b)
+    """
+    frame = Frame.of(image)
+    if frame is None:
+        return get_color(image, area)
+    return frame.get_color(area)
+
+
+def binarize(image):
+    """
+    Args:
+        image (np.ndarray): Grayscale image.
+
+    Returns:
+        np.ndarray: Binarized image with OTSU threshold.
+    """
+    _, image = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return image
+
+
+def get_frame_luma(image, area=None):
+    """
+    Args:
+        image (np.ndarray): Screenshot.
+        area (tuple): Area to crop, or None for the entire image.
+
+    Returns:
+        np.ndarray: Luma of the area, a view of the cached luma if image is the current frame.
+    """
+    frame = Frame.of(image)
+    if frame is None:
+        if area is not None:
+            image = crop(image, area, copy=False)
+        return rgb2luma(image)
+    if area is None:
+        return frame.luma
+    return crop(frame.luma, area, copy=False)
+
+
+def get_frame_binary(image, area=None):
+    """
+    Args:
+        image (np.ndarray): Screenshot.
+        area (tuple): Area to crop, or None for the entire image.
+
+    Returns:
+        np.ndarray: Binarized image of the area, cached if image is the current frame.
+    """
+    frame = Frame.of(image)
+    if frame is None:
+        if area is not None:
+            image = crop(image, area, copy=False)
+        return binarize(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+    if area is None:
+        area = (0, 0, image.shape[1], image.shape[0])
+    return frame.binary(area)
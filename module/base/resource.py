@@ -1,4 +1,10 @@
+import json
+import os
 import re
+import threading
+import time
+
+import numpy as np
 
 import module.config.server as server
 from module.base.decorator import cached_property, del_cached_property
@@ -37,6 +43,112 @@ class PreservedAssets:
 
 _preserved_assets = PreservedAssets()
 
+ASSET_PACK_FOLDER = './assets/pack'
+
+
+def asset_pack_key(file, area=None, variant='image'):
+    """
+    Args:
+        file (str): Asset file
+        area (tuple): Area cropped from asset file, or None for the entire image
+        variant (str): 'image', 'luma' or 'binary'
+
+    Returns:
+        str: Key in asset pack index
+    """
+    if area is None:
+        area = '-'
+    else:
+        area = ','.join([str(int(x)) for x in area])
+    return f'{file}|{area}|{variant}'
+
+
+class AssetPack:
+    """
+    Decoded assets of a server, built by dev_tools/asset_pack.py
+
+    Images are stored as uint8 arrays in `{server}.bin`, indexed by `{server}.json`.
+    The binary file is memory-mapped, so loading an asset is a zero-copy view
+    and multiple Alas instances on the same host share the pages through OS page cache.
+    Assets modified after the pack was built, or assets not in the pack, are decoded from files as usual.
+    """
+    # Key: server, value: AssetPack or None if pack not available
+    instances = {}
+    # Set False to decode all assets from files, dev_tools/asset_pack.py needs this
+    enabled = True
+
+    def __init__(self, server):
+        self.server = server
+        self.file_bin = os.path.join(ASSET_PACK_FOLDER, f'{server}.bin')
+        self.file_index = os.path.join(ASSET_PACK_FOLDER, f'{server}.json')
+        with open(self.file_index, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        self.built = index['built']
+        self.index = index['assets']
+        self.data = np.memmap(self.file_bin, dtype=np.uint8, mode='r')
+        # Key: asset file, value: bool, if asset file is not modified after pack built
+        self._fresh = {}
+
+    @classmethod
+    def get(cls, s=None):
+        """
+        Args:
+            s (str): Server, or None for current server
+
+        Returns:
+            AssetPack: Or None if pack not available
+        """
+        if s is None:
+            s = server.server
+        try:
+            return cls.instances[s]
+        except KeyError:
+            pass
+        pack = None
+        try:
+            pack = cls(s)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            from module.logger import logger
+            logger.warning(f'Failed to load asset pack of server {s}: {e}')
+        cls.instances[s] = pack
+        return pack
+
+    def is_fresh(self, file):
+        try:
+            return self._fresh[file]
+        except KeyError:
+            pass
+        try:
+            fresh = os.stat(file).st_mtime <= self.built
+        except OSError:
+            fresh = False
+        self._fresh[file] = fresh
+        return fresh
+
+    def load(self, file, area=None, variant='image'):
+        """
+        Args:
+            file (str): Asset file
+            area (tuple): Area cropped from asset file, or None for the entire image
+            variant (str): 'image', 'luma' or 'binary'
+
+        Returns:
+            list[np.ndarray]: Read-only views of all frames, or None if not in pack
+        """
+        try:
+            frames = self.index[asset_pack_key(file, area, variant)]
+        except KeyError:
+            return None
+        if not self.is_fresh(file):
+            return None
+        out = []
+        for offset, shape in frames:
+            size = int(np.prod(shape))
+            out.append(self.data[offset:offset + size].reshape(shape))
+        return out
+
 
 class Resource:
     # Class property, record all button and templates
@@ -51,6 +163,37 @@ class Resource:
         for cache in self.cached:
             del_cached_property(self, cache)
 
+    def resource_packed(self, area=None, variant='image'):
+        """
+        Load decoded asset from asset pack.
+
+        Args:
+            area (tuple): Area cropped from asset file, or None for the entire image
+            variant (str): 'image', 'luma' or 'binary'
+
+        Returns:
+            list[np.ndarray]: Read-only views of all frames, or None if not in pack
+        """
+        if not AssetPack.enabled:
+            return None
+        pack = AssetPack.get()
+        if pack is None:
+            return None
+        return pack.load(self.file, area=area, variant=variant)
+
+    def is_loaded_any(self):
+        """
+        Returns:
+            bool: If any image of this asset is loaded
+        """
+        return any(self.__dict__.get(attr) is not None for attr in ['image', '_image'])
+
+    def resource_preload(self):
+        """
+        Load asset images before they are used, subclasses should override.
+        """
+        pass
+
     @classmethod
     def is_loaded(cls, obj):
         if hasattr(obj, '_image') and obj._image is None:
@@ -86,59 +229,356 @@ class Resource:
             return data
 
 
-def release_resources(next_task=''):
-    # Release all OCR models
-    # Usually to have 2 models loaded and each model takes about 20MB
-    # This will release 20-40MB
-    from module.webui.setting import State
-    if State.deploy_config.UseOcrServer:
-        if not next_task:
-            # Disconnect OCR server on idle
-            from module.ocr.ocr import OCR_MODEL
-            try:
-                OCR_MODEL.close()
-            except AttributeError:
-                pass
-    else:
-        # Release only when using per-instance OCR
-        from module.ocr.ocr import OCR_MODEL
-        if 'Opsi' in next_task or 'commission' in next_task:
-            # OCR models will be used soon, don't release
-            models = []
-        elif next_task:
-            # Release OCR models except 'azur_lane'
-            models = ['cnocr', 'jp', 'tw']
-        else:
-            models = ['azur_lane', 'cnocr', 'jp', 'tw']
-        for model in models:
-            del_cached_property(OCR_MODEL, model)
-
-    # Release assets cache
-    # module.ui has about 80 assets and takes about 3MB
-    # Alas has about 800 assets, but they are not all loaded.
-    # Template images take more, about 6MB each
-    for key, obj in Resource.instances.items():
-        # Preserve assets for ui switching
-        if next_task and str(obj) in _preserved_assets.ui:
+# OCR models and asset groups used by each task, the first matched regex of task command is used.
+# OCR models are the attributes of module.ocr.models.OcrModel,
+# `azur_lane` is azur_lane_jp on server jp, `text` is the model of in-game text of current server.
+# Asset groups are folder names in ./assets/<server>/
+# Every task with Scheduler in args.json should be listed here.
+# Tasks not listed here, such as new ones, may use any asset, so assets are kept before them,
+# OCR models are still released and loaded on demand.
+_CAMPAIGN_ASSETS = ['campaign', 'combat', 'combat_ui', 'map', 'template', 'statistics', 'event', 'sos']
+TASK_RESOURCE_MANIFEST = {
+    r'^Restart$': ([], []),
+    r'^Commission$': (['azur_lane', 'text'], ['commission', 'reward']),
+    r'^Tactical$': (['azur_lane', 'cnocr'], ['tactical']),
+    r'^Research$': (['azur_lane'], ['research']),
+    r'^Exercise$': (['azur_lane', 'cnocr'], ['exercise', 'combat', 'combat_ui', 'template']),
+    r'^Dorm$': (['azur_lane'], ['dorm', 'template']),
+    r'^Meowfficer$': (['azur_lane'], ['meowfficer']),
+    r'^Guild$': (['azur_lane'], ['guild']),
+    r'^Gacha$': (['azur_lane'], ['gacha', 'retire']),
+    r'^Reward$': (['azur_lane'], ['reward']),
+    r'^(ShopFrequent|ShopOnce)$': (['azur_lane', 'cnocr'], ['shop', 'statistics']),
+    r'^EventShop$': (['azur_lane', 'cnocr'], ['shop_event', 'shop', 'statistics']),
+    r'^Shipyard$': (['azur_lane'], ['shipyard']),
+    r'^Freebies$': (['azur_lane'], ['freebies']),
+    r'^Island': (['azur_lane', 'cnocr'], ['island']),
+    r'^PrivateQuarters$': ([], ['private_quarters']),
+    r'^Minigame$': ([], ['minigame']),
+    r'^Awaken$': (['azur_lane'], ['awaken']),
+    r'^OpsiAsh': (['azur_lane', 'text'], ['os_ash', 'os', 'os_handler', 'os_combat', 'combat', 'combat_ui', 'map']),
+    r'^Opsi': (['azur_lane', 'cnocr', 'text'],
+               ['os', 'os_handler', 'os_combat', 'os_shop', 'combat', 'combat_ui', 'map', 'template', 'statistics']),
+    r'^(Raid|RaidDaily|RaidScuttle)$': (['azur_lane', 'cnocr'], ['raid', 'combat', 'combat_ui', 'statistics']),
+    r'^Coalition': (['azur_lane', 'cnocr'], ['coalition', 'combat', 'combat_ui', 'statistics']),
+    r'^Hospital': (['azur_lane'], ['event_hospital'] + _CAMPAIGN_ASSETS),
+    r'^WarArchives$': (['azur_lane'], ['war_archives'] + _CAMPAIGN_ASSETS),
+    r'^(Main|Main2|Main3|Event|Event2|EventA|EventB|EventC|EventD|EventSp|Sos|Hard|MaritimeEscort|'
+    r'GemsFarming|ThreeOilLowCost)$': (['azur_lane'], _CAMPAIGN_ASSETS + ['hard', 'retire']),
+    r'^Daily$': (['azur_lane'], ['daily', 'combat', 'combat_ui', 'statistics']),
+}
+# Asset groups kept before any task, for ui switching and popups
+RESOURCE_PRESERVED_GROUPS = ['ui', 'ui_white', 'handler']
+OCR_MODELS = ['azur_lane', 'azur_lane_jp', 'cnocr', 'jp', 'tw']
+
+
+def resource_group(file):
+    """
+    Args:
+        file (str): Asset file, such as ./assets/cn/ui/MAIN_CHECK.png
+
+    Returns:
+        str: Asset group, such as `ui`, or empty string
+    """
+    parts = file.replace('\\', '/').split('/')
+    try:
+        index = parts.index('assets')
+    except ValueError:
+        return ''
+    parts = parts[index + 1:-1]
+    if parts and parts[0] in server.VALID_SERVER:
+        parts = parts[1:]
+    return parts[0] if parts else ''
+
+
+def resource_nbytes(obj):
+    """
+    Returns:
+        int: Bytes of images loaded by a Button or Template, excluding views of asset pack
+    """
+    total = 0
+    for attr in ['image', 'image_binary', 'image_luma', '_image', '_image_binary', '_image_luma']:
+        value = obj.__dict__.get(attr)
+        if value is None:
             continue
-        # if Resource.is_loaded(obj):
-        #     logger.info(f'Release {obj}')
-        obj.resource_release()
-
-    # Release cached images for map detection
-    from module.map_detection.utils_assets import ASSETS
-    attr_list = [
-        'ui_mask',
-        'ui_mask_os',
-        'ui_mask_stroke',
-        'ui_mask_in_map',
-        'ui_mask_os_in_map',
-        'tile_center_image',
-        'tile_corner_image',
-        'tile_corner_image_list'
-    ]
-    for attr in attr_list:
-        del_cached_property(ASSETS, attr)
-
-    # Useless in most cases, but just call it
-    # gc.collect()
+        for image in (value if isinstance(value, list) else [value]):
+            if isinstance(image, np.ndarray) and not isinstance(image, np.memmap):
+                total += image.nbytes
+    return total
+
+
+def process_rss():
+    """
+    Returns:
+        int: Resident memory of current process in bytes, or 0 if unknown
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+class ResourceManager:
+    """
+    Release OCR models and assets that no upcoming task needs,
+    and preload the ones of next task in background before it starts.
+
+    Upcoming tasks are AzurLaneConfig.pending_task and waiting_task within LOOKAHEAD seconds,
+    their resources are looked up in TASK_RESOURCE_MANIFEST.
+    """
+    # Seconds to look ahead in waiting tasks
+    LOOKAHEAD = 600
+    # Seconds before next task to start preloading during wait
+    PRELOAD_AHEAD = 60
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.preload_thread = None
+        # Key: OCR model or asset group, value: seconds spent on preloading it
+        self.preloaded = {}
+
+    @staticmethod
+    def manifest(command):
+        """
+        Args:
+            command (str): Task command
+
+        Returns:
+            tuple[set[str], set[str]]: OCR models and asset groups, or None if task not in manifest
+        """
+        for regex, (models, groups) in TASK_RESOURCE_MANIFEST.items():
+            if re.search(regex, command):
+                return set(ResourceManager.model_names(models)), set(groups)
+        return None
+
+    @staticmethod
+    def model_names(models):
+        """
+        Convert model aliases in TASK_RESOURCE_MANIFEST to attributes of OcrModel.
+        """
+        for model in models:
+            if model == 'azur_lane':
+                yield 'azur_lane_jp' if server.server == 'jp' else 'azur_lane'
+            elif model == 'text':
+                yield server.server if server.server in ['jp', 'tw'] else 'cnocr'
+            else:
+                yield model
+
+    def upcoming(self, config=None, next_task=''):
+        """
+        Args:
+            config (AzurLaneConfig): Config after get_next_task(), or None
+            next_task (str): Command of next task, or empty string on idle
+
+        Returns:
+            list[str]: Commands of upcoming tasks
+        """
+        tasks = []
+        if next_task:
+            tasks.append(next_task)
+        if config is not None:
+            from datetime import datetime, timedelta
+            limit = datetime.now() + timedelta(seconds=self.LOOKAHEAD)
+            for func in config.pending_task:
+                tasks.append(func.command)
+            for func in config.waiting_task:
+                if func.next_run < limit:
+                    tasks.append(func.command)
+        return [task for task in dict.fromkeys(tasks) if task.lower() not in ['alas', 'template']]
+
+    def required(self, tasks):
+        """
+        Args:
+            tasks (list[str]): Commands of upcoming tasks
+
+        Returns:
+            tuple[set[str], set[str], list[str]]:
+                OCR models and asset groups to keep, and tasks not in manifest that keep all assets
+        """
+        models, groups, unknown = set(), set(), []
+        for task in tasks:
+            manifest = self.manifest(task)
+            if manifest is None:
+                unknown.append(task)
+                continue
+            models |= manifest[0]
+            groups |= manifest[1]
+        if tasks:
+            groups |= set(RESOURCE_PRESERVED_GROUPS)
+        return models, groups, unknown
+
+    def release(self, config=None, next_task=''):
+        """
+        Release resources that no upcoming task needs.
+
+        Args:
+            config (AzurLaneConfig): Config after get_next_task(), or None
+            next_task (str): Command of next task, or empty string on idle
+        """
+        from module.logger import logger
+        from module.webui.setting import State
+        self.preload_join()
+        tasks = self.upcoming(config, next_task=next_task)
+        models, groups, unknown = self.required(tasks)
+        if unknown:
+            logger.info(f'Release resources: tasks not in manifest {unknown}, keep all assets')
+        rss = process_rss()
+
+        released_models = []
+        if State.deploy_config.UseOcrServer:
+            if not tasks:
+                # Disconnect OCR server on idle
+                from module.ocr.ocr import OCR_MODEL
+                try:
+                    OCR_MODEL.close()
+                except AttributeError:
+                    pass
+        else:
+            # Release only when using per-instance OCR
+            # Usually to have 2 models loaded and each model takes about 20MB
+            from module.ocr.models import OCR_MODEL
+            for model in OCR_MODELS:
+                if model in models:
+                    continue
+                if model in OCR_MODEL.__dict__:
+                    released_models.append(model)
+                del_cached_property(OCR_MODEL, model)
+
+        # Release assets cache
+        # module.ui has about 80 assets and takes about 3MB
+        # Alas has about 800 assets, but they are not all loaded.
+        # Template images take more, about 6MB each
+        released_assets, released_bytes = 0, 0
+        for key, obj in Resource.instances.items():
+            if unknown:
+                break
+            if tasks and str(obj) in _preserved_assets.ui:
+                continue
+            if resource_group(key) in groups:
+                continue
+            nbytes = resource_nbytes(obj)
+            if nbytes:
+                released_assets += 1
+                released_bytes += nbytes
+            obj.resource_release()
+
+        # Release cached images for map detection
+        if not unknown and not groups & {'map', 'os'}:
+            from module.map_detection.utils_assets import ASSETS
+            attr_list = [
+                'ui_mask',
+                'ui_mask_os',
+                'ui_mask_stroke',
+                'ui_mask_in_map',
+                'ui_mask_os_in_map',
+                'tile_center_image',
+                'tile_corner_image',
+                'tile_corner_image_list'
+            ]
+            for attr in attr_list:
+                del_cached_property(ASSETS, attr)
+
+        with self.lock:
+            for name in list(self.preloaded.keys()):
+                if name not in models and name not in groups:
+                    self.preloaded.pop(name)
+
+        saved = rss - process_rss() if rss else 0
+        logger.info(f'Release resources for {tasks if tasks else "idle"}: '
+                    f'OCR models {released_models}, {released_assets} assets {released_bytes / 1048576:.1f}MB, '
+                    f'RSS {saved / 1048576:+.1f}MB')
+
+    def preload(self, command):
+        """
+        Load OCR models and assets of a task, in the current thread.
+
+        Args:
+            command (str): Task command
+        """
+        from module.logger import logger
+        from module.webui.setting import State
+        manifest = self.manifest(command)
+        if manifest is None:
+            return
+        models, groups = manifest
+        if not State.deploy_config.UseOcrServer:
+            from module.ocr.models import OCR_MODEL
+            for model in models:
+                start = time.perf_counter()
+                try:
+                    if not getattr(OCR_MODEL, model).load():
+                        continue
+                except Exception as e:
+                    logger.warning(f'Failed to preload OCR model {model}: {e}')
+                    continue
+                with self.lock:
+                    self.preloaded[model] = time.perf_counter() - start
+
+        groups = set(groups) | set(RESOURCE_PRESERVED_GROUPS)
+        for group in sorted(groups):
+            start = time.perf_counter()
+            count = 0
+            for key, obj in list(Resource.instances.items()):
+                if resource_group(key) != group or obj.is_loaded_any():
+                    continue
+                try:
+                    obj.resource_preload()
+                    count += 1
+                except Exception as e:
+                    logger.warning(f'Failed to preload {obj}: {e}')
+            if count:
+                with self.lock:
+                    self.preloaded[group] = time.perf_counter() - start
+        logger.info(f'Preloaded resources for {command}: {self.preloaded_show()}')
+
+    def preload_async(self, command):
+        """
+        Preload resources of a task in background, call preload_join() before the task runs.
+        """
+        if self.preload_thread is not None:
+            return
+        self.preload_thread = threading.Thread(
+            target=self.preload, args=(command,), name='ResourcePreload', daemon=True)
+        self.preload_thread.start()
+
+    def preload_join(self):
+        thread = self.preload_thread
+        if thread is not None:
+            thread.join()
+            self.preload_thread = None
+
+    def preloaded_show(self):
+        with self.lock:
+            return ', '.join(f'{name} {cost:.2f}s' for name, cost in self.preloaded.items())
+
+    def task_start(self, command):
+        """
+        Call before running a task, log the cold start time avoided by preloading.
+
+        Args:
+            command (str): Task command
+        """
+        from module.logger import logger
+        self.preload_join()
+        manifest = self.manifest(command)
+        with self.lock:
+            preloaded, self.preloaded = self.preloaded, {}
+        if manifest is None or not preloaded:
+            return
+        models, groups = manifest
+        groups = groups | set(RESOURCE_PRESERVED_GROUPS)
+        avoided = sum(cost for name, cost in preloaded.items() if name in models or name in groups)
+        logger.info(f'Resources preloaded for {command}, cold start avoided: {avoided:.2f}s')
+
+
+RESOURCE_MANAGER = ResourceManager()
+
+
+def release_resources(next_task='', config=None):
+    """
+    Args:
+        next_task (str): Command of next task, or empty string on idle
+        config (AzurLaneConfig): Config after get_next_task(), to look ahead in pending and waiting tasks
+    """
+    RESOURCE_MANAGER.release(config=config, next_task=next_task)
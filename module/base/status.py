@@ -0,0 +1,123 @@
+import ctypes
+from enum import IntEnum
+from multiprocessing.sharedctypes import RawValue
+
+
+class InstanceState(IntEnum):
+    # Not started
+    NONE = 0
+    STARTING = 1
+    # Running a task
+    RUNNING = 2
+    # Waiting for the next task
+    WAITING = 3
+    EXITED = 4
+
+
+class ExitReason(IntEnum):
+    # Not exited, or exited without telling, such as being killed
+    NONE = 0
+    FINISH = 1
+    MANUAL_STOP = 2
+    UPDATE = 3
+    ERROR = 4
+
+
+class StatusData(ctypes.Structure):
+    _fields_ = [
+        ('state', ctypes.c_int),
+        ('reason', ctypes.c_int),
+        # Seconds of the last screenshot
+        ('screenshot_latency', ctypes.c_double),
+        ('task', ctypes.c_char * 64),
+    ]
+
+
+class InstanceStatus:
+    """
+    Status of an Alas instance, written by Alas process, read by GUI in O(1).
+
+    GUI creates it in shared memory and passes `data` to Alas process.
+    Alas process is the only writer except manual stop, so there is no lock,
+    readers may see a half written task name for a moment.
+    Without GUI, status is written to local memory and nobody reads it.
+    """
+
+    def __init__(self, shared=False):
+        self.data = RawValue(StatusData) if shared else StatusData()
+
+    def bind(self, data):
+        """
+        Args:
+            data (StatusData): Shared status from GUI
+        """
+        self.data = data
+
+    def reset(self):
+        ctypes.memset(ctypes.addressof(self.data), 0, ctypes.sizeof(StatusData))
+
+    def set_state(self, state, task=''):
+        """
+        Args:
+            state (InstanceState):
+            task (str): Task running, or the next task when waiting
+        """
+        data = self.data
+        data.task = task.encode('utf-8')[:63]
+        data.state = state
+
+    def set_exit(self, reason):
+        """
+        Args:
+            reason (ExitReason):
+        """
+        data = self.data
+        # Keep the first reason, GUI may record manual stop while process is exiting
+        if data.state != InstanceState.EXITED or not data.reason:
+            data.reason = reason
+        data.state = InstanceState.EXITED
+
+    def set_screenshot_latency(self, latency):
+        """
+        Args:
+            latency (float): Seconds
+        """
+        self.data.screenshot_latency = latency
+
+    @property
+    def state(self):
+        """
+        Returns:
+            InstanceState:
+        """
+        return InstanceState(self.data.state)
+
+    @property
+    def reason(self):
+        """
+        Returns:
+            ExitReason:
+        """
+        return ExitReason(self.data.reason)
+
+    @property
+    def task(self):
+        """
+        Returns:
+            str:
+        """
+        return self.data.task.decode('utf-8', errors='ignore')
+
+    @property
+    def screenshot_latency(self):
+        """
+        Returns:
+            float: Seconds
+        """
+        return self.data.screenshot_latency
+
+    def __str__(self):
+        return f'{self.state.name} ({self.task}, {self.reason.name})'
+
+
+INSTANCE_STATUS = InstanceStatus()
@@ -4,12 +4,73 @@ import imageio
 
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.frame import get_frame_binary, get_frame_luma
 from module.base.resource import Resource
 from module.base.utils import *
 from module.config.server import VALID_SERVER
 from module.map_detection.utils import Points
 
 
+# Minimum template size in pixels after downscaling, smaller templates are matched at full resolution
+PYRAMID_MIN_SIZE = 8
+# Candidates at coarse level are accepted with a lower similarity,
+# since downscaling blurs details and reduces similarity.
+# Small templates like texts drop the most when a match is off the downscaling grid,
+# up to 0.34 on dev_tools/template_pyramid_corpus (TEMPLATE_INVEST at level 1),
+# and 0.4 keeps candidates under 4% of the coarse result.
+PYRAMID_MARGIN = 0.4
+
+
+def match_template_pyramid(image, template, similarity, level=1):
+    """
+    Coarse-to-fine template matching.
+    Match at 1/2^level scale to propose candidates,
+    then run cv2.matchTemplate() at full resolution only around the candidates.
+
+    TM_CCOEFF_NORMED on a position only depends on the pixels under the template,
+    so similarities of the refined positions are the same as a full resolution match.
+
+    Args:
+        image (np.ndarray):
+        template (np.ndarray):
+        similarity (float): 0 to 1.
+        level (int): 1 for 1/2 scale, 2 for 1/4 scale.
+
+    Returns:
+        np.ndarray: The same shape as cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED),
+            positions not refined are filled with -1.
+    """
+    ih, iw = image.shape[:2]
+    th, tw = template.shape[:2]
+    scale = 2 ** level
+    if th // scale < PYRAMID_MIN_SIZE or tw // scale < PYRAMID_MIN_SIZE:
+        return cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+
+    small_image = cv2.resize(image, (iw // scale, ih // scale), interpolation=cv2.INTER_AREA)
+    small_template = cv2.resize(template, (tw // scale, th // scale), interpolation=cv2.INTER_AREA)
+    small = cv2.matchTemplate(small_image, small_template, cv2.TM_CCOEFF_NORMED)
+    mask = (small > similarity - PYRAMID_MARGIN).astype(np.uint8)
+
+    result = np.full((ih - th + 1, iw - tw + 1), -1, dtype=np.float32)
+    if not mask.any():
+        return result
+    # Merge nearby candidates into regions, so each region is matched once
+    mask = cv2.dilate(mask, np.ones((3, 3), dtype=np.uint8))
+    _, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+    rh, rw = result.shape
+    for x, y, w, h, _ in stats[1:]:
+        # Region on full resolution result, padded for rounding in downscaling
+        x1 = max(x * scale - scale, 0)
+        y1 = max(y * scale - scale, 0)
+        x2 = min((x + w) * scale + scale, rw)
+        y2 = min((y + h) * scale + scale, rh)
+        if x1 >= x2 or y1 >= y2:
+            continue
+        res = cv2.matchTemplate(image[y1:y2 + th - 1, x1:x2 + tw - 1], template, cv2.TM_CCOEFF_NORMED)
+        result[y1:y2, x1:x2] = res
+    return result
+
+
 class Template(Resource):
     def __init__(self, file):
         """
@@ -37,8 +98,26 @@ class Template(Resource):
     def is_gif(self):
         return os.path.splitext(self.file)[1] == '.gif'
 
+    def _load_packed(self, variant='image'):
+        """
+        Args:
+            variant (str): 'image', 'luma' or 'binary'
+
+        Returns:
+            np.ndarray | list[np.ndarray]: Or None if not in asset pack
+        """
+        # Asset pack stores images without pre_process()
+        if type(self).pre_process is not Template.pre_process:
+            return None
+        packed = self.resource_packed(variant=variant)
+        if packed is None:
+            return None
+        return packed if self.is_gif else packed[0]
+
     @property
     def image(self):
+        if self._image is None:
+            self._image = self._load_packed()
         if self._image is None:
             if self.is_gif:
                 self._image = []
@@ -61,6 +140,8 @@ class Template(Resource):
 
     @property
     def image_binary(self):
+        if self._image_binary is None:
+            self._image_binary = self._load_packed('binary')
         if self._image_binary is None:
             if self.is_gif:
                 self._image_binary = []
@@ -76,6 +157,8 @@ class Template(Resource):
 
     @property
     def image_luma(self):
+        if self._image_luma is None:
+            self._image_luma = self._load_packed('luma')
         if self._image_luma is None:
             if self.is_gif:
                 self._image_luma = []
@@ -91,6 +174,9 @@ class Template(Resource):
     def image(self, value):
         self._image = value
 
+    def resource_preload(self):
+        _ = self.image
+
     def resource_release(self):
         super().resource_release()
         self._image = None
@@ -155,11 +241,8 @@ class Template(Resource):
         Returns:
             bool: If matches.
         """
+        image_binary = get_frame_binary(image)
         if self.is_gif:
-            # graying
-            image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            # binarization
-            _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
             for template in self.image_binary:
                 # template matching
                 res = cv2.matchTemplate(template, image_binary, cv2.TM_CCOEFF_NORMED)
@@ -171,10 +254,6 @@ class Template(Resource):
             return False
 
         else:
-            # graying
-            image_gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            # binarization
-            _, image_binary = cv2.threshold(image_gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
             # template matching
             res = cv2.matchTemplate(self.image_binary, image_binary, cv2.TM_CCOEFF_NORMED)
             _, sim, _, _ = cv2.minMaxLoc(res)
@@ -183,7 +262,7 @@ class Template(Resource):
 
     def match_luma(self, image, similarity=0.85):
         if self.is_gif:
-            image = rgb2luma(image)
+            image = get_frame_luma(image)
             for template in self.image_luma:
                 res = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
                 _, sim, _, _ = cv2.minMaxLoc(res)
@@ -235,7 +314,7 @@ class Template(Resource):
         return sim, button
 
     def match_luma_result(self, image, name=None):
-        image = rgb2luma(image)
+        image = get_frame_luma(image)
         res = cv2.matchTemplate(image, self.image_luma, cv2.TM_CCOEFF_NORMED)
         _, sim, _, point = cv2.minMaxLoc(res)
         # print(self.file, sim)
@@ -243,7 +322,14 @@ class Template(Resource):
         button = self._point_to_button(point, image=image, name=name)
         return sim, button
 
-    def match_multi(self, image, scaling=1.0, similarity=0.85, threshold=3, name=None):
+    @staticmethod
+    def _match_multi_result(image, template, similarity, pyramid=0):
+        if pyramid:
+            return match_template_pyramid(image, template, similarity=similarity, level=pyramid)
+        else:
+            return cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+
+    def match_multi(self, image, scaling=1.0, similarity=0.85, threshold=3, name=None, pyramid=0):
         """
         Args:
             image:
@@ -251,6 +337,9 @@ class Template(Resource):
             similarity (float): 0 to 1.
             threshold (int): Distance to delete nearby results.
             name (str):
+            pyramid (int): Levels of coarse-to-fine matching, 0 to match at full resolution.
+                1 for proposing candidates at 1/2 scale, 2 for 1/4 scale.
+                Faster on large images such as full screenshots, see match_template_pyramid().
 
         Returns:
             list[Button]:
@@ -263,12 +352,12 @@ class Template(Resource):
         if self.is_gif:
             result = []
             for template in self.image:
-                res = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+                res = self._match_multi_result(image, template, similarity, pyramid)
                 res = np.array(np.where(res > similarity)).T[:, ::-1].tolist()
                 result += res
             result = np.array(result)
         else:
-            result = cv2.matchTemplate(image, self.image, cv2.TM_CCOEFF_NORMED)
+            result = self._match_multi_result(image, self.image, similarity, pyramid)
             result = np.array(np.where(result > similarity)).T[:, ::-1]
 
         # result: np.array([[x0, y0], [x1, y1], ...)
@@ -1,15 +1,16 @@
+import atexit
 import copy
-import operator
 import threading
+import weakref
 from datetime import datetime, timedelta
 
 import pywebio
 
-from module.base.filter import Filter
 from module.config.config_generated import GeneratedConfig
 from module.config.config_manual import ManualConfig, OutputConfig
 from module.config.config_updater import ConfigUpdater, ensure_time, get_server_next_update, nearest_future
 from module.config.deep import deep_get, deep_set
+from module.config.scheduler import Function, TaskScheduler, name_to_function
 from module.config.utils import DEFAULT_TIME, dict_to_kv, filepath_config, get_os_reset_remain, path_to_arg
 from module.config.watcher import ConfigWatcher
 from module.exception import RequestHumanTakeover, ScriptError
@@ -21,55 +22,29 @@ class TaskEnd(Exception):
     pass
 
 
-class Function:
-    def __init__(self, data):
-        self.enable = deep_get(data, keys="Scheduler.Enable", default=False)
-        self.command = deep_get(data, keys="Scheduler.Command", default="Unknown")
-        self.next_run = deep_get(data, keys="Scheduler.NextRun", default=DEFAULT_TIME)
-
-    def __str__(self):
-        enable = "Enable" if self.enable else "Disable"
-        return f"{self.command} ({enable}, {str(self.next_run)})"
-
-    __repr__ = __str__
-
-    def __eq__(self, other):
-        if not isinstance(other, Function):
-            return False
-
-        if self.command == other.command and self.next_run == other.next_run:
-            return True
-        else:
-            return False
-
-
-def name_to_function(name):
-    """
-    Args:
-        name (str):
-
-    Returns:
-        Function:
-    """
-    function = Function({})
-    function.command = name
-    function.enable = True
-    return function
-
-
 class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher):
     stop_event: threading.Event = None
     bound = {}
 
     # Class property
     is_hoarding_task = True
+    # Lock of update() and flush(), flush() is called from timer thread
+    flush_lock = threading.RLock()
+    # Key: AzurLaneConfig with pending modifications, value: threading.Timer to flush it
+    flush_timers = weakref.WeakKeyDictionary()
 
     def __setattr__(self, key, value):
         if key in self.bound:
             path = self.bound[key]
             self.modified[path] = value
             if self.auto_update:
-                self.update()
+                if self.is_write_behind:
+                    super().__setattr__(key, value)
+                    deep_set(self.data, keys=path, value=value)
+                    self.scheduler_notify(path)
+                    self.write_behind()
+                else:
+                    self.update()
         else:
             super().__setattr__(key, value)
 
@@ -89,11 +64,10 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         # Force override variables
         # Key: Argument name in GeneratedConfig. Value: Modified value.
         self.overridden = {}
-        # Scheduler queue, will be updated in `get_next_task()`, list of Function objects
-        # pending_task: Run time has been reached, but haven't been run due to task scheduling.
-        # waiting_task: Run time haven't been reached, wait needed.
-        self.pending_task = []
-        self.waiting_task = []
+        # Scheduler queue, updated incrementally when config loaded or Scheduler arguments modified.
+        # pending_task and waiting_task are calculated at the time of last `get_next_task()`
+        self.scheduler = TaskScheduler()
+        self.scheduler_now = datetime.now()
         # Task to run and bind.
         # Task means the name of the function to run in AzurLaneAutoScript class.
         self.task: Function
@@ -129,6 +103,38 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
 
         for path, value in self.modified.items():
             deep_set(self.data, keys=path, value=value)
+        self.scheduler.sync(self.data, self.SCHEDULER_PRIORITY)
+
+    def reload_sections(self, keys):
+        """
+        Reload tasks modified by GUI, instead of reloading the whole config.
+
+        Args:
+            keys (list[str]): Modified key paths, such as `Commission.Scheduler.Enable`
+
+        Returns:
+            bool: If scheduler or arguments of the bound tasks are changed
+        """
+        tasks = {key.split(".")[0] for key in keys}
+        data = self.read_file(self.config_name)
+        for task in tasks:
+            if task in data:
+                self.data[task] = data[task]
+        self.config_override()
+        for path, value in self.modified.items():
+            if path.split(".")[0] in tasks:
+                deep_set(self.data, keys=path, value=value)
+        priority = self.scheduler.priority_raw
+        self.scheduler.sync(self.data, self.SCHEDULER_PRIORITY)
+
+        bound = {path.split(".")[0] for path in self.bound.values()}
+        if tasks & bound:
+            logger.info(f"Bound tasks modified: {sorted(tasks & bound)}")
+            self.bind(self.task)
+            return True
+        if self.scheduler.priority_raw != priority:
+            return True
+        return any(key.split(".")[1:2] == ["Scheduler"] for key in keys)
 
     def bind(self, func, func_list=None):
         """
@@ -200,39 +206,43 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
     def is_actual_task(self):
         return self.task.command.lower() not in ['alas', 'template']
 
+    @property
+    def pending_task(self):
+        """
+        Returns:
+            list[Function]: Run time has been reached, but haven't been run due to task scheduling.
+        """
+        return self.scheduler.pending_tasks(self.scheduler_now)
+
+    @property
+    def waiting_task(self):
+        """
+        Returns:
+            list[Function]: Run time haven't been reached, wait needed.
+        """
+        return self.scheduler.waiting_tasks(self.scheduler_now)
+
     def get_next_task(self):
         """
-        Calculate tasks, set pending_task and waiting_task
+        Calculate tasks, set the time of pending_task and waiting_task
         """
-        pending = []
-        waiting = []
-        error = []
         now = datetime.now()
         if AzurLaneConfig.is_hoarding_task:
             now -= self.hoarding
-        for func in self.data.values():
-            func = Function(func)
-            if not func.enable:
-                continue
-            if not isinstance(func.next_run, datetime):
-                error.append(func)
-            elif func.next_run < now:
-                pending.append(func)
-            else:
-                waiting.append(func)
+        self.scheduler_now = now
+        self.scheduler.sync(self.data, self.SCHEDULER_PRIORITY)
 
-        f = Filter(regex=r"(.*)", attr=["command"])
-        f.load(self.SCHEDULER_PRIORITY)
-        if pending:
-            pending = f.apply(pending)
-        if waiting:
-            waiting = f.apply(waiting)
-            waiting = sorted(waiting, key=operator.attrgetter("next_run"))
-        if error:
-            pending = error + pending
+    def scheduler_notify(self, keys):
+        """
+        Update scheduler if Scheduler.Enable or Scheduler.NextRun is modified without reloading config.
 
-        self.pending_task = pending
-        self.waiting_task = waiting
+        Args:
+            keys (str, list[str]): Such as `{task}.Scheduler.NextRun`
+        """
+        if isinstance(keys, str):
+            keys = keys.split(".")
+        if len(keys) == 3 and keys[1] == "Scheduler" and keys[0] in self.data:
+            self.scheduler.set(keys[0], self.data[keys[0]])
 
     def get_next(self):
         """
@@ -240,19 +250,19 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             Function: Command to run
         """
         self.get_next_task()
+        task, is_pending = self.scheduler.next(self.scheduler_now)
 
-        if self.pending_task:
+        if is_pending:
             AzurLaneConfig.is_hoarding_task = False
             logger.info(f"Pending tasks: {[f.command for f in self.pending_task]}")
-            task = self.pending_task[0]
             logger.attr("Task", task)
             return task
         else:
             AzurLaneConfig.is_hoarding_task = True
 
-        if self.waiting_task:
+        if task is not None:
             logger.info("No task pending")
-            task = copy.deepcopy(self.waiting_task[0])
+            task = copy.deepcopy(task)
             task.next_run = (task.next_run + self.hoarding).replace(microsecond=0)
             logger.attr("Task", task)
             return task
@@ -276,10 +286,58 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         self.write_file(self.config_name, data=self.data)
 
     def update(self):
-        self.load()
-        self.config_override()
-        self.bind(self.task)
-        self.save()
+        with self.flush_lock:
+            self.flush_cancel()
+            self.load()
+            self.config_override()
+            self.bind(self.task)
+            self.save()
+
+    @property
+    def is_write_behind(self):
+        return self.CONFIG_WRITE_BEHIND > 0 and not self.is_template_config
+
+    def write_behind(self):
+        """
+        Schedule a flush() after CONFIG_WRITE_BEHIND seconds, if not scheduled yet.
+        """
+        with self.flush_lock:
+            if self in self.flush_timers:
+                return
+            timer = threading.Timer(self.CONFIG_WRITE_BEHIND, self.flush)
+            timer.daemon = True
+            timer.name = 'ConfigFlush'
+            self.flush_timers[self] = timer
+            timer.start()
+
+    def flush_cancel(self):
+        with self.flush_lock:
+            timer = self.flush_timers.pop(self, None)
+            if timer is not None:
+                timer.cancel()
+
+    def flush(self):
+        """
+        Write pending modifications into file.
+        Unlike update(), arguments are not re-bound, so this is safe to call from other threads.
+        Changes from GUI are loaded at next update().
+        """
+        with self.flush_lock:
+            self.flush_cancel()
+            if not self.modified:
+                return
+            modified = dict(self.modified)
+            data = self.read_file(self.config_name)
+            for path, value in modified.items():
+                deep_set(data, keys=path, value=value)
+            logger.info(
+                f"Save config {filepath_config(self.config_name)}, {dict_to_kv(modified)}"
+            )
+            self.write_file(self.config_name, data=data)
+            # Keep the ones modified again during writing
+            for path, value in modified.items():
+                if self.modified.get(path, None) is value:
+                    self.modified.pop(path, None)
 
     def override(self, **kwargs):
         now = datetime.now().replace(microsecond=0)
@@ -363,7 +421,12 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         """
         self.modified[keys] = value
         if self.auto_update:
-            self.update()
+            if self.is_write_behind:
+                deep_set(self.data, keys=keys, value=value)
+                self.scheduler_notify(keys)
+                self.write_behind()
+            else:
+                self.update()
 
     def task_delay(self, success=None, server_update=None, target=None, minute=None, task=None):
         """
@@ -764,6 +827,15 @@ class ConfigBackup:
         self.recover()
 
 
+@atexit.register
+def flush_configs():
+    for config in list(AzurLaneConfig.flush_timers.keys()):
+        try:
+            config.flush()
+        except Exception as e:
+            logger.exception(e)
+
+
 class MultiSetWrapper:
     def __init__(self, main):
         """
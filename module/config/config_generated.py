@@ -102,6 +102,7 @@ class GeneratedConfig:
     Error_StrictRestart = False
     Error_OnePushConfig = 'provider: null'
     Error_ScreenshotLength = 1
+    Error_ScreenshotMemory = 0
     Error_GameStuckRestart = False
     Error_GameStuckThreshold = 3
     Error_AdbOfflineRestart = False
@@ -90,6 +90,18 @@ class ManualConfig:
     module.campaign
     """
     MAP_CLEAR_ALL_THIS_TIME = False
+
+    """
+    module.config
+    """
+    # Seconds to delay writing user config after setting arguments outside multi_set(),
+    # modifications in between are written at once. Pending ones are written at task end and on exit,
+    # but lost if Alas is killed. 0 to write on every modification.
+    CONFIG_WRITE_BEHIND = 0
+    # Storage of user configs, "json" for ./config/<instance>.json,
+    # "sqlite" for module.config.store.SqliteConfigStore, a single ./config/config.db for all instances.
+    # Instances are imported from json files at first read, use `python -m module.config.store export` to go back.
+    CONFIG_STORE = 'json'
     # From chapter_template.lua
     STAR_REQUIRE_1 = 1
     STAR_REQUIRE_2 = 2
@@ -116,6 +128,15 @@ class ManualConfig:
     module.device
     """
     DEVICE_OVER_HTTP = False
+    # Capture the next screenshot in background while the current one is being analysed.
+    # Hides screenshot latency on slow methods, but keeps the emulator busy one frame ahead.
+    SCREENSHOT_PREFETCH = False
+    # Stretch screenshot interval up to 1.5s while screen stays unchanged, back to normal once it changes.
+    # Reduces CPU and emulator load on waiting, such as auto search and loading.
+    SCREENSHOT_ADAPTIVE_INTERVAL = False
+    # Record latency and failures of screenshot and control methods into ./config/telemetry/<serial>.json,
+    # probe other screenshot methods during idle, and switch to a consistently faster one with rollback.
+    DEVICE_METHOD_TELEMETRY = False
     FORWARD_PORT_RANGE = (20000, 21000)
     REVERSE_SERVER_PORT = 7903
 
@@ -133,10 +154,20 @@ class ManualConfig:
 
     SCRCPY_FILEPATH_LOCAL = './bin/scrcpy/scrcpy-server-v1.20.jar'
     SCRCPY_FILEPATH_REMOTE = '/data/local/tmp/scrcpy-server-v1.20.jar'
+    # Decode video stream only when a screenshot is waiting, packets in between are dropped at each keyframe.
+    # Lowers CPU usage of scrcpy decoding thread, since scrcpy streams all keyframes.
+    SCRCPY_LAZY_DECODE = False
 
     MAATOUCH_FILEPATH_LOCAL = './bin/MaaTouch/maatouchsync'
     MAATOUCH_FILEPATH_REMOTE = '/data/local/tmp/maatouchsync'
 
+    """
+    module.ocr
+    """
+    # Max entries of OCR result cache, model results are cached by the hash of pre_processed images.
+    # 0 to disable.
+    OCR_CACHE_SIZE = 256
+
     """
     module.campaign.gems_farming
     """
@@ -1,3 +1,5 @@
+import hashlib
+import json
 import re
 import typing as t
 from copy import deepcopy
@@ -6,11 +8,16 @@ from cached_property import cached_property
 
 from deploy.utils import DEPLOY_TEMPLATE, poor_yaml_read, poor_yaml_write
 from module.base.timer import timer
-from module.config.deep import deep_default, deep_get, deep_iter, deep_set
+from module.config.deep import deep_default, deep_get, deep_iter, deep_iter_diff, deep_set
 from module.config.env import IS_ON_PHONE_CLOUD
 from module.config.server import VALID_CHANNEL_PACKAGE, VALID_PACKAGE, VALID_SERVER_LIST, to_package, to_server
 from module.config.utils import *
 from module.config.redirect_utils.utils import *
+from module.config.store import CONFIG_STORE, is_store_enabled
+
+# Bump this if config_update() or config_finalize() changes,
+# so config files written before will go through the full update.
+CONFIG_SCHEMA_VERSION = 1
 
 CONFIG_IMPORT = '''
 # 此文件是配置系统的更新器。
@@ -578,7 +585,28 @@ class ConfigGenerator:
         self.generate_deploy_template()
 
 
+def config_copy(data):
+    """
+    Copy a config of 3 levels, faster than deepcopy.
+    Argument values are immutable, except lists which are copied.
+    """
+    return {
+        task: {
+            group: {
+                arg: list(value) if isinstance(value, list) else value
+                for arg, value in arguments.items()
+            } if isinstance(arguments, dict) else deepcopy(arguments)
+            for group, arguments in groups.items()
+        } if isinstance(groups, dict) else deepcopy(groups)
+        for task, groups in data.items()
+    }
+
+
 class ConfigUpdater:
+    # Key: config file, value: (digest of content, raw config, validated config) of the last read in this process
+    config_cache = {}
+    _schema_fingerprint = None
+
     # source, target, (optional)convert_func
     redirection = [
         # ('OpsiDaily.OpsiDaily.BuySupply', 'OpsiShop.Scheduler.Enable'),
@@ -642,6 +670,56 @@ class ConfigUpdater:
     def args(self):
         return read_file(filepath_args())
 
+    @cached_property
+    def args_index(self):
+        """
+        Returns:
+            dict: <task>.<group>.<argument> to argument definitions in args.json,
+                the same as self.args but without non-argument items.
+        """
+        index = {}
+        for keys, data in deep_iter(self.args, depth=3):
+            if not isinstance(data, dict):
+                continue
+            deep_set(index, keys=keys, value=data)
+        return index
+
+    @property
+    def schema_fingerprint(self):
+        """
+        Returns:
+            str: Fingerprint of args.json and config updating rules.
+                Config files written under the same fingerprint need no migration.
+        """
+        fingerprint = ConfigUpdater._schema_fingerprint
+        if fingerprint is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(atomic_read_bytes(filepath_args()))
+            h.update(str(CONFIG_SCHEMA_VERSION).encode())
+            h.update(str([row[:2] for row in self.redirection]).encode())
+            h.update(str(IS_ON_PHONE_CLOUD).encode())
+            fingerprint = h.hexdigest()
+            ConfigUpdater._schema_fingerprint = fingerprint
+        return fingerprint
+
+    @staticmethod
+    def config_leaf(value, data, is_template=False):
+        """
+        Args:
+            value: Argument value in user config
+            data (dict): Argument definition in args.json
+            is_template (bool):
+
+        Returns:
+            Any: Validated value
+        """
+        typ = data['type']
+        display = data.get('display')
+        if is_template or value is None or value == '' \
+                or typ in ['lock', 'state'] or (display == 'hide' and typ != 'stored'):
+            value = data['value']
+        return parse_value(value, data=data)
+
     def config_update(self, old, is_template=False):
         """
         Args:
@@ -658,14 +736,23 @@ class ConfigUpdater:
             if not isinstance(data, dict):
                 continue
             value = deep_get(old, keys=keys, default=data['value'])
-            typ = data['type']
-            display = data.get('display')
-            if is_template or value is None or value == '' \
-                    or typ in ['lock', 'state'] or (display == 'hide' and typ != 'stored'):
-                value = data['value']
-            value = parse_value(value, data=data)
+            value = self.config_leaf(value, data, is_template=is_template)
             deep_set(new, keys=keys, value=value)
 
+        return self.config_finalize(old, new, is_template=is_template)
+
+    def config_finalize(self, old, new, is_template=False):
+        """
+        Rules across arguments, applied after validating each argument.
+
+        Args:
+            old (dict): User config
+            new (dict): Validated config
+            is_template (bool):
+
+        Returns:
+            dict:
+        """
         # AzurStatsID
         if is_template:
             deep_set(new, 'Alas.DropRecord.AzurStatsID', None)
@@ -704,6 +791,60 @@ class ConfigUpdater:
 
         return new
 
+    def config_validate(self, old):
+        """
+        Validate each argument of a config file written under the same schema_fingerprint,
+        without migration.
+
+        Args:
+            old (dict): User config
+
+        Returns:
+            dict: Validated config, or None if arguments in file are not the same as args.json
+        """
+        index = self.args_index
+        if old.keys() != index.keys():
+            return None
+        new = {}
+        for task, groups in index.items():
+            old_groups = old[task]
+            if not isinstance(old_groups, dict) or old_groups.keys() != groups.keys():
+                return None
+            new_groups = {}
+            for group, arguments in groups.items():
+                old_arguments = old_groups[group]
+                if not isinstance(old_arguments, dict) or old_arguments.keys() != arguments.keys():
+                    return None
+                new_groups[group] = {
+                    arg: self.config_leaf(old_arguments[arg], data) for arg, data in arguments.items()}
+            new[task] = new_groups
+        return self.config_finalize(old, new)
+
+    def config_patch(self, cache, old):
+        """
+        Validate the arguments changed since the last read in this process.
+
+        Args:
+            cache (tuple): (digest, raw config, validated config) of the last read
+            old (dict): User config
+
+        Returns:
+            dict: Validated config, or None if arguments are added or removed
+        """
+        _, raw, data = cache
+        new = config_copy(data)
+        index = self.args_index
+        for keys, before, after in deep_iter_diff(raw, old):
+            if len(keys) != 3:
+                return None
+            try:
+                definition = index[keys[0]][keys[1]][keys[2]]
+                value = old[keys[0]][keys[1]][keys[2]]
+            except (KeyError, TypeError):
+                return None
+            new[keys[0]][keys[1]][keys[2]] = self.config_leaf(value, definition)
+        return self.config_finalize(old, new)
+
     def config_redirect(self, old, new):
         """
         Convert old settings to the new.
@@ -813,6 +954,9 @@ class ConfigUpdater:
         """
         Read and update config file.
 
+        If the file was written under the same schema_fingerprint,
+        only the arguments changed since last read are validated, or all arguments without migration.
+
         Args:
             config_name (str): ./config/{file}.json
             is_template (bool):
@@ -820,15 +964,85 @@ class ConfigUpdater:
         Returns:
             dict:
         """
-        old = read_file(filepath_config(config_name))
-        new = self.config_update(old, is_template=is_template)
+        if not is_template and is_store_enabled(config_name):
+            return self.read_store(config_name)
+
+        file = filepath_config(config_name)
+        print(f'read: {file}')
+        content = atomic_read_bytes(file)
+        old = json.loads(content) if content else {}
+        if is_template or not old:
+            return self.config_update(old, is_template=is_template)
+
+        digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+        new = self.config_cached(
+            file, digest, old, lambda: self.schema_fingerprint_read(file) == [self.schema_fingerprint, digest])
         # The updated config did not write into file, although it doesn't matters.
         # Commented for performance issue
         # self.write_file(config_name, new)
         return new
 
+    def read_store(self, config_name):
+        """
+        Read and update config from SqliteConfigStore.
+        Rows are not read if revision is the same as last read in this process.
+
+        Args:
+            config_name (str):
+
+        Returns:
+            dict:
+        """
+        key = f'{CONFIG_STORE.file}:{config_name}'
+        revision, _ = CONFIG_STORE.revision(config_name)
+        cache = ConfigUpdater.config_cache.get(key)
+        if revision and cache is not None and cache[0] == revision:
+            return config_copy(cache[2])
+
+        print(f'read: {key}')
+        old, revision, fingerprint = CONFIG_STORE.read(config_name)
+        if not old:
+            return self.config_update(old)
+        return self.config_cached(key, revision, old, lambda: fingerprint == self.schema_fingerprint)
+
+    def config_cached(self, key, digest, old, is_migrated):
+        """
+        Args:
+            key (str): Config file, or instance in config store
+            digest: Digest or revision of raw config
+            old (dict): Raw config
+            is_migrated (callable): Returns if raw config was written under the same schema_fingerprint
+
+        Returns:
+            dict: Validated config
+        """
+        cache = ConfigUpdater.config_cache.get(key)
+        new = None
+        if cache is not None and cache[0] == digest:
+            new = config_copy(cache[2])
+        elif is_migrated():
+            if cache is not None:
+                new = self.config_patch(cache, old)
+            if new is None:
+                new = self.config_validate(old)
+        if new is None:
+            new = self.config_update(old)
+        ConfigUpdater.config_cache[key] = (digest, old, config_copy(new))
+        return new
+
     @staticmethod
-    def write_file(config_name, data, mod_name='alas'):
+    def schema_fingerprint_read(file):
+        """
+        Returns:
+            list[str]: [schema_fingerprint, digest of file content] when file was written, or None
+        """
+        try:
+            with open(f'{file}.schema', 'r', encoding='utf-8') as f:
+                return f.read().split()
+        except (FileNotFoundError, OSError):
+            return None
+
+    def write_file(self, config_name, data, mod_name='alas'):
         """
         Write config file.
 
@@ -837,7 +1051,57 @@ class ConfigUpdater:
             data (dict):
             mod_name (str):
         """
-        write_file(filepath_config(config_name, mod_name), data)
+        if is_store_enabled(config_name, mod_name):
+            return self.write_store(config_name, data)
+
+        file = filepath_config(config_name, mod_name)
+        content = json.dumps(data, indent=2, ensure_ascii=False, sort_keys=False, default=str)
+        print(f'write: {file}')
+        atomic_write(file, content)
+        if mod_name != 'alas' or config_name == 'template':
+            return
+        # Mark the schema config written under
+        digest = hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+        try:
+            atomic_write(f'{file}.schema', f'{self.schema_fingerprint} {digest}')
+        except Exception as e:
+            print(f'Failed to write schema fingerprint of {file}: {e}')
+
+    def write_store(self, config_name, data):
+        """
+        Write config into SqliteConfigStore.
+        Only upsert the arguments different from last read in this process,
+        so writers modifying different arguments won't overwrite each other.
+
+        Args:
+            config_name (str):
+            data (dict):
+        """
+        key = f'{CONFIG_STORE.file}:{config_name}'
+        cache = ConfigUpdater.config_cache.get(key)
+        if cache is None:
+            print(f'write: {key}')
+            CONFIG_STORE.write(config_name, data, fingerprint=self.schema_fingerprint)
+            return
+
+        base = cache[2]
+        modified = {}
+        for keys, value in deep_iter(data, depth=3):
+            try:
+                if base[keys[0]][keys[1]][keys[2]] == value:
+                    continue
+            except (KeyError, TypeError):
+                # Arguments added, write all
+                print(f'write: {key}')
+                CONFIG_STORE.write(config_name, data, fingerprint=self.schema_fingerprint)
+                return
+            modified['.'.join(keys)] = value
+        if modified:
+            print(f'write: {key}, {len(modified)} arguments')
+            CONFIG_STORE.upsert(config_name, modified)
+            # So setting them back is not taken as unchanged
+            for path, value in modified.items():
+                deep_set(base, keys=path, value=value)
 
     @timer
     def update_file(self, config_name, is_template=False):
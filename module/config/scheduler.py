@@ -0,0 +1,230 @@
+import heapq
+from datetime import datetime
+
+from module.base.filter import Filter
+from module.config.deep import deep_get
+from module.config.utils import DEFAULT_TIME
+
+
+class Function:
+    def __init__(self, data):
+        self.enable = deep_get(data, keys="Scheduler.Enable", default=False)
+        self.command = deep_get(data, keys="Scheduler.Command", default="Unknown")
+        self.next_run = deep_get(data, keys="Scheduler.NextRun", default=DEFAULT_TIME)
+
+    def __str__(self):
+        enable = "Enable" if self.enable else "Disable"
+        return f"{self.command} ({enable}, {str(self.next_run)})"
+
+    __repr__ = __str__
+
+    def __eq__(self, other):
+        if not isinstance(other, Function):
+            return False
+
+        if self.command == other.command and self.next_run == other.next_run:
+            return True
+        else:
+            return False
+
+
+def name_to_function(name):
+    """
+    Args:
+        name (str):
+
+    Returns:
+        Function:
+    """
+    function = Function({})
+    function.command = name
+    function.enable = True
+    return function
+
+
+class TaskScheduler:
+    """
+    Enabled tasks in priority heaps, updated incrementally when Scheduler.Enable or Scheduler.NextRun changes.
+
+    Same results as sorting all tasks on each call:
+    - Tasks with invalid NextRun are pending, in the order of config.
+    - Then tasks with NextRun < now, in the order of SCHEDULER_PRIORITY.
+    - Tasks with NextRun >= now are waiting, ordered by (NextRun, SCHEDULER_PRIORITY).
+    - Tasks not in SCHEDULER_PRIORITY are never scheduled.
+
+    Entries are removed lazily, an entry is outdated if its sequence is not the latest of its task.
+    """
+
+    def __init__(self):
+        self.priority_raw = None
+        # Key: lowercase command, value: index in SCHEDULER_PRIORITY
+        self.priority = {}
+        # Key: task name, value: index in config
+        self.order = {}
+        # Key: task name, value: (enable, next_run, command) in config
+        self.state = {}
+        # Key: task name, value: Function, enabled tasks in SCHEDULER_PRIORITY with valid next_run
+        self.tasks = {}
+        # Key: task name, value: Function, enabled tasks with invalid next_run
+        self.error = {}
+        # Key: task name, value: sequence of its latest entry
+        self.seq = {}
+        self._seq = 0
+        # Heap of (next_run, priority, seq, task)
+        self.waiting = []
+        # Heap of (priority, next_run, seq, task), tasks moved from waiting when next_run reached
+        self.pending = []
+
+    def load_priority(self, string):
+        """
+        Args:
+            string (str): SCHEDULER_PRIORITY
+
+        Returns:
+            bool: If priority changed
+        """
+        if string == self.priority_raw:
+            return False
+        f = Filter(regex=r"(.*)", attr=["command"])
+        f.load(string)
+        priority = {}
+        for index, (raw, filter_) in enumerate(zip(f.filter_raw, f.filter)):
+            if f.is_preset(raw):
+                continue
+            priority.setdefault(filter_[0], index)
+        self.priority_raw = string
+        self.priority = priority
+        return True
+
+    def sync(self, data, priority):
+        """
+        Update tasks changed in config.
+
+        Args:
+            data (dict): AzurLaneConfig.data
+            priority (str): SCHEDULER_PRIORITY
+        """
+        if self.load_priority(priority):
+            self.state.clear()
+            self.tasks.clear()
+            self.error.clear()
+            self.waiting.clear()
+            self.pending.clear()
+        if len(self.order) != len(data) or any(a != b for a, b in zip(self.order, data)):
+            self.order = {task: index for index, task in enumerate(data)}
+            for task in list(self.state):
+                if task not in data:
+                    self.remove(task)
+        for task, section in data.items():
+            scheduler = section.get("Scheduler") if isinstance(section, dict) else None
+            if scheduler is None:
+                if task in self.state:
+                    self.remove(task)
+                continue
+            state = (scheduler.get("Enable", False), scheduler.get("NextRun", DEFAULT_TIME),
+                     scheduler.get("Command", "Unknown"))
+            if self.state.get(task) != state:
+                self.set(task, section)
+
+    def set(self, task, section):
+        """
+        Args:
+            task (str): Task name
+            section (dict): Config of this task
+        """
+        func = Function(section)
+        self.state[task] = (func.enable, func.next_run, func.command)
+        self.tasks.pop(task, None)
+        self.error.pop(task, None)
+        self._seq += 1
+        self.seq[task] = self._seq
+        if not func.enable:
+            return
+        if not isinstance(func.next_run, datetime):
+            self.error[task] = func
+            return
+        priority = self.priority.get(str(func.command).lower())
+        if priority is None:
+            return
+        self.tasks[task] = func
+        heapq.heappush(self.waiting, (func.next_run, priority, self._seq, task))
+        self.compact()
+
+    def remove(self, task):
+        self.state.pop(task, None)
+        self.tasks.pop(task, None)
+        self.error.pop(task, None)
+        self.seq.pop(task, None)
+
+    def compact(self):
+        """
+        Drop outdated entries when heaps grow too large.
+        """
+        if len(self.waiting) + len(self.pending) <= 2 * len(self.tasks) + 16:
+            return
+        seq = self.seq
+        self.waiting = [entry for entry in self.waiting if seq.get(entry[3]) == entry[2]]
+        self.pending = [entry for entry in self.pending if seq.get(entry[3]) == entry[2]]
+        heapq.heapify(self.waiting)
+        heapq.heapify(self.pending)
+
+    def _promote(self, now):
+        """
+        Move tasks reached next_run from waiting to pending,
+        and back if now goes backward, which happens when task hoarding toggles.
+        """
+        waiting, pending, seq = self.waiting, self.pending, self.seq
+        while waiting and waiting[0][0] < now:
+            next_run, priority, s, task = heapq.heappop(waiting)
+            if seq.get(task) == s:
+                heapq.heappush(pending, (priority, next_run, s, task))
+        while pending:
+            priority, next_run, s, task = pending[0]
+            if seq.get(task) != s:
+                heapq.heappop(pending)
+            elif next_run >= now:
+                heapq.heappop(pending)
+                heapq.heappush(waiting, (next_run, priority, s, task))
+            else:
+                break
+        while waiting and seq.get(waiting[0][3]) != waiting[0][2]:
+            heapq.heappop(waiting)
+
+    def next(self, now):
+        """
+        Args:
+            now (datetime):
+
+        Returns:
+            tuple[Function, bool]: The first task and if it's pending, or (None, False) if no tasks.
+        """
+        if self.error:
+            task = min(self.error, key=lambda t: self.order.get(t, 0))
+            return self.error[task], True
+        self._promote(now)
+        if self.pending:
+            return self.tasks[self.pending[0][3]], True
+        if self.waiting:
+            return self.tasks[self.waiting[0][3]], False
+        return None, False
+
+    def pending_tasks(self, now):
+        """
+        Returns:
+            list[Function]: Pending tasks, in the order to run.
+        """
+        self._promote(now)
+        error = sorted(self.error, key=lambda t: self.order.get(t, 0))
+        pending = sorted(entry for entry in self.pending if self.seq.get(entry[3]) == entry[2] and entry[1] < now)
+        return [self.error[task] for task in error] + [self.tasks[entry[3]] for entry in pending]
+
+    def waiting_tasks(self, now):
+        """
+        Returns:
+            list[Function]: Waiting tasks, sorted by next_run.
+        """
+        self._promote(now)
+        waiting = [entry for entry in self.waiting if self.seq.get(entry[3]) == entry[2]]
+        waiting += [(entry[1], entry[0], entry[2], entry[3]) for entry in self.pending
+                    if self.seq.get(entry[3]) == entry[2] and entry[1] >= now]
+        return [self.tasks[entry[3]] for entry in sorted(waiting)]
@@ -0,0 +1,272 @@
+import json
+import os
+import sqlite3
+import threading
+
+from module.config.config_manual import ManualConfig
+from module.config.deep import deep_iter
+from module.config.utils import filepath_config, read_file, write_file
+from module.logger import logger
+
+STORE_FILE = './config/config.db'
+# `INSERT ... ON CONFLICT DO UPDATE` requires SQLite 3.24.0,
+# Python 3.7 on Windows ships with an older one, configs remain in json files there.
+SQLITE_UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+if ManualConfig.CONFIG_STORE == 'sqlite' and not SQLITE_UPSERT:
+    logger.warning(f'SQLite {sqlite3.sqlite_version} does not support upsert, requires 3.24.0, '
+                   f'config store falls back to json files')
+
+
+def is_store_enabled(config_name, mod_name='alas'):
+    """
+    Args:
+        config_name (str):
+        mod_name (str):
+
+    Returns:
+        bool: If config is stored in SQLite instead of ./config/{config_name}.json
+    """
+    return ManualConfig.CONFIG_STORE == 'sqlite' and SQLITE_UPSERT \
+        and mod_name == 'alas' and not config_name.startswith('template')
+
+
+def encode(value):
+    # Same as values in json files
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class SqliteConfigStore:
+    """
+    User configs in a single SQLite database in WAL mode, one row per argument.
+
+    Writers only upsert arguments that changed, readers don't block writers.
+    Each instance has a revision, increased on every write, so reader can skip reading rows if unchanged.
+    Instances not in database are imported from json files at first read.
+    """
+    # Seconds to wait for the write lock held by other processes
+    TIMEOUT = 10
+
+    def __init__(self, file=STORE_FILE):
+        self.file = file
+        self.local = threading.local()
+        self.init_lock = threading.Lock()
+        # Database file that tables are created in
+        self.initialized = ''
+
+    @property
+    def conn(self):
+        """
+        Returns:
+            sqlite3.Connection: Connection of current thread
+        """
+        conn = getattr(self.local, 'conn', None)
+        # Connections can't be shared with forked processes
+        if conn is not None and self.local.pid != os.getpid():
+            conn = None
+        if conn is None:
+            conn = sqlite3.connect(self.file, timeout=self.TIMEOUT, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Durable enough for WAL, fsync on checkpoint only
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with self.init_lock:
+                if self.initialized != self.file:
+                    conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS config (
+                        instance TEXT NOT NULL, task TEXT NOT NULL, grp TEXT NOT NULL, arg TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        PRIMARY KEY (instance, task, grp, arg)
+                    ) WITHOUT ROWID;
+                    CREATE TABLE IF NOT EXISTS instance (
+                        name TEXT PRIMARY KEY, revision INTEGER NOT NULL, fingerprint TEXT NOT NULL
+                    );
+                    """)
+                    self.initialized = self.file
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+    def instances(self):
+        """
+        Returns:
+            list[str]: Name of instances in database
+        """
+        return [row[0] for row in self.conn.execute('SELECT name FROM instance ORDER BY name')]
+
+    def revision(self, instance):
+        """
+        Returns:
+            tuple[int, str]: Revision and schema fingerprint of an instance, or (0, '') if not exist
+        """
+        row = self.conn.execute('SELECT revision, fingerprint FROM instance WHERE name=?', (instance,)).fetchone()
+        if row is None:
+            return 0, ''
+        return row
+
+    def read(self, instance):
+        """
+        Args:
+            instance (str):
+
+        Returns:
+            tuple[dict, int, str]: Config, revision, schema fingerprint
+        """
+        conn = self.conn
+        # Rows and revision in the same snapshot
+        conn.execute('BEGIN')
+        try:
+            revision, fingerprint = self.revision(instance)
+            data = {}
+            for task, group, arg, value in conn.execute(
+                    'SELECT task, grp, arg, value FROM config WHERE instance=?', (instance,)):
+                data.setdefault(task, {}).setdefault(group, {})[arg] = json.loads(value)
+        finally:
+            conn.execute('COMMIT')
+        if not revision and os.path.exists(filepath_config(instance)):
+            data = self.import_json(instance)
+            revision, fingerprint = self.revision(instance)
+        return data, revision, fingerprint
+
+    def write(self, instance, data, fingerprint=''):
+        """
+        Write arguments that changed.
+
+        Args:
+            instance (str):
+            data (dict): Full config
+            fingerprint (str): Schema fingerprint that data is written under
+
+        Returns:
+            int: New revision
+        """
+        rows = {}
+        for keys, value in deep_iter(data, depth=3):
+            rows[tuple(keys)] = encode(value)
+
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            stored = {
+                (task, group, arg): value for task, group, arg, value in conn.execute(
+                    'SELECT task, grp, arg, value FROM config WHERE instance=?', (instance,))
+            }
+            upsert = [(instance, *keys, value) for keys, value in rows.items() if stored.get(keys) != value]
+            delete = [(instance, *keys) for keys in stored if keys not in rows]
+            if upsert:
+                conn.executemany(
+                    'INSERT INTO config (instance, task, grp, arg, value) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT (instance, task, grp, arg) DO UPDATE SET value=excluded.value', upsert)
+            if delete:
+                conn.executemany('DELETE FROM config WHERE instance=? AND task=? AND grp=? AND arg=?', delete)
+            revision = self.revision(instance)[0] + 1
+            conn.execute(
+                'INSERT INTO instance (name, revision, fingerprint) VALUES (?, ?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET revision=excluded.revision, fingerprint=excluded.fingerprint',
+                (instance, revision, fingerprint))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return revision
+
+    def upsert(self, instance, modified):
+        """
+        Write some arguments, without reading the whole config.
+
+        Args:
+            instance (str):
+            modified (dict): Key: argument path such as `Commission.Scheduler.Enable`, value: argument value.
+
+        Returns:
+            int: New revision
+        """
+        rows = []
+        for path, value in modified.items():
+            keys = path.split('.') if isinstance(path, str) else list(path)
+            if len(keys) != 3:
+                raise ValueError(f'Invalid argument path: {path}')
+            rows.append((instance, *keys, encode(value)))
+
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT INTO config (instance, task, grp, arg, value) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (instance, task, grp, arg) DO UPDATE SET value=excluded.value', rows)
+            revision = self.revision(instance)[0] + 1
+            # Arguments are not added or removed, schema fingerprint remains
+            conn.execute(
+                'INSERT INTO instance (name, revision, fingerprint) VALUES (?, ?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET revision=excluded.revision',
+                (instance, revision, ''))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return revision
+
+    def delete(self, instance):
+        conn = self.conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM config WHERE instance=?', (instance,))
+            conn.execute('DELETE FROM instance WHERE name=?', (instance,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def import_json(self, instance, file=None):
+        """
+        Args:
+            instance (str):
+            file (str): Default to ./config/{instance}.json
+
+        Returns:
+            dict: Config imported
+        """
+        if file is None:
+            file = filepath_config(instance)
+        data = read_file(file)
+        self.write(instance, data)
+        logger.info(f'Config imported from {file} to {self.file}')
+        return data
+
+    def export_json(self, instance, file=None):
+        """
+        Args:
+            instance (str):
+            file (str): Default to ./config/{instance}.json
+        """
+        if file is None:
+            file = filepath_config(instance)
+        data, _, _ = self.read(instance)
+        write_file(file, data)
+        logger.info(f'Config exported from {self.file} to {file}')
+
+
+CONFIG_STORE = SqliteConfigStore()
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Import or export user configs of SQLite config store')
+    parser.add_argument('action', choices=['import', 'export'])
+    parser.add_argument('instances', nargs='*', help='Instance names, default to all')
+    args = parser.parse_args()
+
+    if not SQLITE_UPSERT:
+        logger.critical(f'SQLite {sqlite3.sqlite_version} does not support upsert, requires 3.24.0')
+        exit(1)
+    if args.action == 'import':
+        from module.config.utils import alas_instance
+        for name in args.instances or [name for name in alas_instance() if os.path.exists(filepath_config(name))]:
+            CONFIG_STORE.import_json(name)
+    else:
+        for name in args.instances or CONFIG_STORE.instances():
+            CONFIG_STORE.export_json(name)
@@ -176,6 +176,11 @@ def alas_instance():
         if name != 'template' and extension == '.json' and mod_name == '':
             out.append(name)
 
+    from module.config.store import CONFIG_STORE, is_store_enabled
+    if is_store_enabled('alas'):
+        # Instances created after switching to config store have no json files
+        out.extend([name for name in CONFIG_STORE.instances() if name not in out])
+
     out.extend(list_mod_instance())
 
     if not len(out):
@@ -1,6 +1,8 @@
 import os
+import queue
 from datetime import datetime
 
+from module.config.store import CONFIG_STORE, is_store_enabled
 from module.config.utils import filepath_config, DEFAULT_TIME
 from module.logger import logger
 
@@ -8,9 +10,16 @@ from module.logger import logger
 class ConfigWatcher:
     config_name = 'alas'
     start_mtime = DEFAULT_TIME
+    start_revision = 0
+    # Queue of modified key paths published by GUI, set in ProcessManager.run_process()
+    # None if Alas is not started by GUI, then file mtime is polled.
+    change_queue: queue.Queue = None
 
     def start_watching(self) -> None:
-        self.start_mtime = self.get_mtime()
+        if is_store_enabled(self.config_name):
+            self.start_revision = CONFIG_STORE.revision(self.config_name)[0]
+        else:
+            self.start_mtime = self.get_mtime()
 
     def get_mtime(self) -> datetime:
         """
@@ -25,9 +34,43 @@ class ConfigWatcher:
         Returns:
             bool: Whether the file has been modified and configs should reload
         """
+        if is_store_enabled(self.config_name):
+            revision = CONFIG_STORE.revision(self.config_name)[0]
+            if revision > self.start_revision:
+                logger.info(f'Config "{self.config_name}" changed, revision {revision}')
+                return True
+            else:
+                return False
+
         mtime = self.get_mtime()
         if mtime > self.start_mtime:
             logger.info(f'Config "{self.config_name}" changed at {mtime}')
             return True
         else:
             return False
+
+    def wait_change(self, timeout) -> list:
+        """
+        Block until GUI publishes modifications of this config, or timeout.
+
+        Args:
+            timeout (float): Seconds
+
+        Returns:
+            list[str]: Modified key paths, such as `Commission.Scheduler.Enable`.
+                Empty list if timeout.
+        """
+        keys = []
+        try:
+            keys += self.change_queue.get(timeout=timeout)
+            while 1:
+                keys += self.change_queue.get_nowait()
+        except queue.Empty:
+            pass
+        except Exception as e:
+            # GUI exited, manager process is gone
+            logger.warning(f'Config change channel lost, fall back to polling: {e}')
+            type(self).change_queue = None
+        if keys:
+            logger.info(f'Config "{self.config_name}" changed: {sorted(set(keys))}')
+        return keys
@@ -1,4 +1,5 @@
 import time
+import tracemalloc
 import typing as t
 
 import numpy as np
@@ -64,6 +65,31 @@ class Benchmark(DaemonBase, CampaignUI):
         logger.info(f'Time cost {float2str(average)} ({self.TEST_BEST} best results out of {self.TEST_TOTAL} tests)')
         return average
 
+    @staticmethod
+    def benchmark_alloc(func, *args, **kwargs):
+        """
+        Args:
+            func: Function to test.
+            *args: Passes to func.
+            **kwargs: Passes to func.
+
+        Returns:
+            float: Peak memory allocated in one call in MB, or 'Failed'.
+                Buffers reused between calls are not counted if func has been called before.
+        """
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        except Exception as e:
+            logger.exception(e)
+            return 'Failed'
+        finally:
+            tracemalloc.stop()
+        peak = peak / 1048576
+        logger.info(f'Memory allocated {peak:.2f}MB')
+        return peak
+
     @staticmethod
     def evaluate_screenshot(cost):
         if not isinstance(cost, (float, int)):
@@ -101,13 +127,15 @@ class Benchmark(DaemonBase, CampaignUI):
     @staticmethod
     def show(test, data, evaluate_func):
         """
-        +--------------+--------+--------+
-        |  Screenshot  |  time  | Speed  |
-        +--------------+--------+--------+
-        |     ADB      | 0.319s |  Fast  |
-        | uiautomator2 | 0.476s | Medium |
-        |  aScreenCap  | Failed | Failed |
-        +--------------+--------+--------+
+        +--------------+--------+--------+--------+
+        |  Screenshot  |  time  | Speed  | Memory |
+        +--------------+--------+--------+--------+
+        |     ADB      | 0.319s |  Fast  | 5.27MB |
+        | uiautomator2 | 0.476s | Medium | 8.79MB |
+        |  aScreenCap  | Failed | Failed | Failed |
+        +--------------+--------+--------+--------+
+
+        Memory column is shown if rows have a third element.
         """
         # table = PrettyTable()
         # table.field_names = [test, 'Time', 'Speed']
@@ -122,12 +150,18 @@ class Benchmark(DaemonBase, CampaignUI):
         )
         table.add_column("Time", style="magenta")
         table.add_column("Speed", style="green")
+        memory = all(len(row) >= 3 for row in data)
+        if memory:
+            table.add_column("Memory", style="blue")
         for row in data:
-            table.add_row(
+            cells = [
                 row[0],
                 float2str(row[1]),
                 evaluate_func(row[1]),
-            )
+            ]
+            if memory:
+                cells.append(f'{row[2]:.2f}MB' if isinstance(row[2], (int, float)) else str(row[2]))
+            table.add_row(*cells)
         logger.print(table, justify='center')
 
     def benchmark(self, screenshot: t.Tuple[str] = (), click: t.Tuple[str] = ()):
@@ -138,7 +172,10 @@ class Benchmark(DaemonBase, CampaignUI):
         screenshot_result = []
         for method in screenshot:
             result = self.benchmark_test(self.device.screenshot_methods[method])
-            screenshot_result.append([method, result])
+            alloc = 'Failed'
+            if isinstance(result, (int, float)):
+                alloc = self.benchmark_alloc(self.device.screenshot_methods[method])
+            screenshot_result.append([method, result, alloc])
 
         area = (124, 4, 649, 106)  # Somewhere safe to click.
         click_result = []
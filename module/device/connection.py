@@ -19,9 +19,9 @@ from module.config.server import VALID_CHANNEL_PACKAGE, VALID_PACKAGE, set_serve
 from module.device.connection_attr import ConnectionAttr
 from module.device.env import IS_LINUX, IS_MACINTOSH, IS_WINDOWS
 from module.device.method.pool import WORKER_POOL
-from module.device.method.utils import (PackageNotInstalled, RETRY_TRIES, get_serial_pair, handle_adb_error,
-                                        handle_unknown_host_service, possible_reasons, random_port, recv_all,
-                                        remove_shell_warning, retry_sleep)
+from module.device.method.utils import (PackageNotInstalled, RETRY_TRIES, RecvBuffer, get_serial_pair,
+                                        handle_adb_error, handle_unknown_host_service, possible_reasons, random_port,
+                                        recv_all, remove_shell_warning, retry_sleep)
 from module.exception import EmulatorNotRunningError, RequestHumanTakeover
 from module.logger import logger
 from module.map.map_grids import SelectedGrids
@@ -200,8 +200,15 @@ class Connection(ConnectionAttr):
         logger.info(stdout)
         return stdout
 
+    @cached_property
+    def screenshot_buffer(self):
+        """
+        Receive buffer reused by screenshot methods that transfer large data.
+        """
+        return RecvBuffer()
+
     @Config.when(DEVICE_OVER_HTTP=False)
-    def adb_shell(self, cmd, stream=False, recvall=True, timeout=10, rstrip=True):
+    def adb_shell(self, cmd, stream=False, recvall=True, timeout=10, rstrip=True, buffer=None):
         """
         Equivalent to `adb -s <serial> shell <*cmd>`
 
@@ -211,10 +218,12 @@ class Connection(ConnectionAttr):
             recvall (bool): Receive all data when stream=True (Default: True)
             timeout (int): (Default: 10)
             rstrip (bool): Strip the last empty line (Default: True)
+            buffer (RecvBuffer): Receive into this buffer when stream=True and recvall=True
 
         Returns:
             str if stream=False
             bytes if stream=True and recvall=True
+            memoryview if stream=True and recvall=True and buffer is given
             socket if stream=True and recvall=False
         """
         if not isinstance(cmd, str):
@@ -223,6 +232,9 @@ class Connection(ConnectionAttr):
         if stream:
             result = self.adb.shell(cmd, stream=stream, timeout=timeout, rstrip=rstrip)
             if recvall:
+                if buffer is not None:
+                    # memoryview
+                    return buffer.recv_all(result)
                 # bytes
                 return recv_all(result)
             else:
@@ -235,7 +247,7 @@ class Connection(ConnectionAttr):
             return result
 
     @Config.when(DEVICE_OVER_HTTP=True)
-    def adb_shell(self, cmd, stream=False, recvall=True, timeout=10, rstrip=True):
+    def adb_shell(self, cmd, stream=False, recvall=True, timeout=10, rstrip=True, buffer=None):
         """
         Equivalent to http://127.0.0.1:7912/shell?command={command}
 
@@ -245,6 +257,7 @@ class Connection(ConnectionAttr):
             recvall (bool): Receive all data when stream=True (Default: True)
             timeout (int): (Default: 10)
             rstrip (bool): Strip the last empty line (Default: True)
+            buffer (RecvBuffer): Ignored, response is already received
 
         Returns:
             str if stream=False
@@ -533,15 +546,16 @@ class Connection(ConnectionAttr):
         logger.error('No `netcat` command available, please use screenshot methods without `_nc` suffix')
         raise RequestHumanTakeover
 
-    def adb_shell_nc(self, cmd, timeout=5, chunk_size=262144):
+    def adb_shell_nc(self, cmd, timeout=5, chunk_size=262144, buffer=None):
         """
         Args:
             cmd (list):
             timeout (int):
             chunk_size (int): Default to 262144
+            buffer (RecvBuffer): Receive into this buffer
 
         Returns:
-            bytes:
+            bytes, or memoryview if buffer is given
         """
         # Server start listening
         server = self.reverse_server
@@ -559,7 +573,10 @@ class Connection(ConnectionAttr):
             raise AdbTimeout('reverse server accept timeout')
 
         # Server receive data
-        data = recv_all(conn, chunk_size=chunk_size, recv_interval=0.001)
+        if buffer is not None:
+            data = buffer.recv_all(conn, chunk_size=chunk_size, recv_interval=0.001)
+        else:
+            data = recv_all(conn, chunk_size=chunk_size, recv_interval=0.001)
 
         # Server close connection
         conn.close()
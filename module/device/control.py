@@ -15,6 +15,14 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
         # Will be overridden in Device
         pass
 
+    def screenshot_on_control(self):
+        # Will be overridden in Screenshot
+        pass
+
+    def control_telemetry_call(self, name, method, *args, **kwargs):
+        # Will be overridden in Device
+        return method(*args, **kwargs)
+
     @cached_property
     def click_methods(self):
         return {
@@ -40,11 +48,10 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
         logger.info(
             'Click %s @ %s' % (point2str(x, y), button)
         )
-        method = self.click_methods.get(
-            self.config.Emulator_ControlMethod,
-            self.click_adb
-        )
-        method(x, y)
+        name = self.config.Emulator_ControlMethod
+        method = self.click_methods.get(name, self.click_adb)
+        self.control_telemetry_call(name, method, x, y)
+        self.screenshot_on_control()
 
     def multi_click(self, button, n, interval=(0.1, 0.2)):
         self.handle_control_check(button)
@@ -72,18 +79,20 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             'Click %s @ %s, %s' % (point2str(x, y), button, duration)
         )
         method = self.config.Emulator_ControlMethod
+        name = f'{method} long_click'
         if method == 'minitouch':
-            self.long_click_minitouch(x, y, duration)
+            self.control_telemetry_call(name, self.long_click_minitouch, x, y, duration)
         elif method == 'uiautomator2':
-            self.long_click_uiautomator2(x, y, duration)
+            self.control_telemetry_call(name, self.long_click_uiautomator2, x, y, duration)
         elif method == 'scrcpy':
-            self.long_click_scrcpy(x, y, duration)
+            self.control_telemetry_call(name, self.long_click_scrcpy, x, y, duration)
         elif method == 'MaaTouch':
-            self.long_click_maatouch(x, y, duration)
+            self.control_telemetry_call(name, self.long_click_maatouch, x, y, duration)
         elif method == 'nemu_ipc':
-            self.long_click_nemu_ipc(x, y, duration)
+            self.control_telemetry_call(name, self.long_click_nemu_ipc, x, y, duration)
         else:
-            self.swipe_adb((x, y), (x, y), duration)
+            self.control_telemetry_call('ADB long_click', self.swipe_adb, (x, y), (x, y), duration)
+        self.screenshot_on_control()
 
     def swipe(self, p1, p2, duration=(0.1, 0.2), name='SWIPE', distance_check=True):
         self.handle_control_check(name)
@@ -106,18 +115,20 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
                 logger.info('Swipe distance < 10px, dropped')
                 return
 
+        name = f'{method} swipe'
         if method == 'minitouch':
-            self.swipe_minitouch(p1, p2)
+            self.control_telemetry_call(name, self.swipe_minitouch, p1, p2)
         elif method == 'uiautomator2':
-            self.swipe_uiautomator2(p1, p2, duration=duration)
+            self.control_telemetry_call(name, self.swipe_uiautomator2, p1, p2, duration=duration)
         elif method == 'scrcpy':
-            self.swipe_scrcpy(p1, p2)
+            self.control_telemetry_call(name, self.swipe_scrcpy, p1, p2)
         elif method == 'MaaTouch':
-            self.swipe_maatouch(p1, p2)
+            self.control_telemetry_call(name, self.swipe_maatouch, p1, p2)
         elif method == 'nemu_ipc':
-            self.swipe_nemu_ipc(p1, p2)
+            self.control_telemetry_call(name, self.swipe_nemu_ipc, p1, p2)
         else:
-            self.swipe_adb(p1, p2, duration=duration)
+            self.control_telemetry_call('ADB swipe', self.swipe_adb, p1, p2, duration=duration)
+        self.screenshot_on_control()
 
     def swipe_vector(self, vector, box=(123, 159, 1175, 628), random_range=(0, 0, 0, 0), padding=15,
                      duration=(0.1, 0.2), whitelist_area=None, blacklist_area=None, name='SWIPE', distance_check=True):
@@ -155,20 +166,23 @@ class Control(Hermit, Minitouch, Scrcpy, MaaTouch, NemuIpc):
             'Drag %s -> %s' % (point2str(*p1), point2str(*p2))
         )
         method = self.config.Emulator_ControlMethod
+        name = f'{method} drag'
         if method == 'minitouch':
-            self.drag_minitouch(p1, p2, point_random=point_random)
+            self.control_telemetry_call(name, self.drag_minitouch, p1, p2, point_random=point_random)
         elif method == 'uiautomator2':
-            self.drag_uiautomator2(
+            self.control_telemetry_call(
+                name, self.drag_uiautomator2,
                 p1, p2, segments=segments, shake=shake, point_random=point_random, shake_random=shake_random,
                 swipe_duration=swipe_duration, shake_duration=shake_duration)
         elif method == 'scrcpy':
-            self.drag_scrcpy(p1, p2, point_random=point_random)
+            self.control_telemetry_call(name, self.drag_scrcpy, p1, p2, point_random=point_random)
         elif method == 'MaaTouch':
-            self.drag_maatouch(p1, p2, point_random=point_random)
+            self.control_telemetry_call(name, self.drag_maatouch, p1, p2, point_random=point_random)
         elif method == 'nemu_ipc':
-            self.drag_nemu_ipc(p1, p2, point_random=point_random)
+            self.control_telemetry_call(name, self.drag_nemu_ipc, p1, p2, point_random=point_random)
         else:
             logger.warning(f'Control method {method} does not support drag well, '
                            f'falling back to ADB swipe may cause unexpected behaviour')
-            self.swipe_adb(p1, p2, duration=ensure_time(swipe_duration * 2))
+            self.control_telemetry_call('ADB swipe', self.swipe_adb, p1, p2, duration=ensure_time(swipe_duration * 2))
             self.click(Button(area=(), color=(), button=area_offset(point_random, p2), name=name), False)
+        self.screenshot_on_control()
@@ -1,6 +1,7 @@
 # 此文件定义了 Device 类，是脚本与设备交互的综合管理入口。
 # 负责整合截图、点击、输入功能，并由于内置了防卡死检测和点击频率控制，能有效提高脚本自动化运行的稳定性。
 import collections
+import time
 from datetime import datetime
 
 from lxml import etree
@@ -18,6 +19,7 @@ from module.device.app_control import AppControl
 from module.device.control import Control
 from module.device.input import Input
 from module.device.screenshot import Screenshot
+from module.device.telemetry import STATELESS_SCREENSHOT_METHODS
 from module.exception import (EmulatorNotRunningError, GameNotRunningError, GameStuckError, GameTooManyClickError,
                               RequestHumanTakeover)
 from module.handler.assets import GET_MISSION
@@ -101,6 +103,8 @@ class Device(Screenshot, Control, AppControl, Input):
         # Auto-select the fastest screenshot method
         if not self.config.is_template_config and self.config.Emulator_ScreenshotMethod == 'auto':
             self.run_simple_screenshot_benchmark()
+        if not self.config.is_template_config and self.config.DEVICE_METHOD_TELEMETRY:
+            self.screenshot_method_restore()
 
         # Early init
         if self.config.is_actual_task:
@@ -127,6 +131,83 @@ class Device(Screenshot, Control, AppControl, Input):
             # if method == 'nemu_ipc':
             #     self.config.Emulator_ControlMethod = 'nemu_ipc'
 
+    def screenshot_method_probe_candidates(self):
+        """
+        Returns:
+            list[str]: Stateless screenshot methods that can be probed on current device.
+        """
+        if self.is_chinac_phone_cloud:
+            return [m for m in STATELESS_SCREENSHOT_METHODS if m != 'ADB_nc']
+        return list(STATELESS_SCREENSHOT_METHODS)
+
+    def screenshot_method_restore(self):
+        """
+        Start on the screenshot method confirmed to be the fastest in previous runs.
+        """
+        telemetry = self.method_telemetry
+        best = telemetry.best
+        current = self.screenshot_method
+        if not best or best == current or best in telemetry.banned:
+            return
+        if current not in STATELESS_SCREENSHOT_METHODS or best not in STATELESS_SCREENSHOT_METHODS:
+            return
+        logger.info(f'Screenshot method {best} is the fastest in previous runs, use it instead of {current}')
+        with self.device_lock:
+            self.screenshot_method_override = best
+
+    def screenshot_method_probe(self):
+        """
+        Take a few screenshots on an alternative screenshot method,
+        and switch to it on trial if it's consistently faster than current one.
+        Call during idle only.
+        """
+        telemetry = self.method_telemetry
+        current = self.screenshot_method
+        method = telemetry.probe_target(current, self.screenshot_method_probe_candidates())
+        if method is None:
+            return
+
+        logger.info(f'Probe screenshot method: {method}')
+        func = self.screenshot_methods[method]
+        for _ in range(telemetry.PROBE_COUNT):
+            start = time.time()
+            try:
+                with self.device_lock:
+                    func()
+            except Exception as e:
+                logger.warning(f'Screenshot method {method} failed on probe: {e}')
+                telemetry.screenshot_fail(method)
+                telemetry.ban(method)
+                break
+            telemetry.screenshot_add(method, time.time() - start)
+
+        target = telemetry.switch_target(current)
+        if target is not None:
+            with self.device_lock:
+                telemetry.trial_start(current, target)
+                self.screenshot_method_override = target
+
+    def control_telemetry_call(self, name, method, *args, **kwargs):
+        """
+        Call a control method under the device lock, record its latency and failure if telemetry enabled.
+
+        Args:
+            name (str): Control method, with the action if not a click, such as `MaaTouch swipe`
+            method (callable):
+        """
+        # Wait for the screenshot prefetched in background, they may share a connection
+        with self.device_lock:
+            if not self.config.DEVICE_METHOD_TELEMETRY:
+                return method(*args, **kwargs)
+            start = time.time()
+            try:
+                result = method(*args, **kwargs)
+            except Exception:
+                self.method_telemetry.control_fail(name)
+                raise
+            self.method_telemetry.control_add(name, time.time() - start)
+            return result
+
     def method_check(self):
         """
         Check combinations of screenshot method and control methods
@@ -210,6 +291,15 @@ class Device(Screenshot, Control, AppControl, Input):
         return super().dump_hierarchy()
 
     def release_during_wait(self):
+        if self.config.SCREENSHOT_PREFETCH:
+            self.screenshot_prefetch.cancel()
+            self.screenshot_prefetch.show()
+        if self.config.SCREENSHOT_ADAPTIVE_INTERVAL:
+            self.screenshot_pacer.show()
+        if self.config.DEVICE_METHOD_TELEMETRY:
+            self.screenshot_method_probe()
+            self.method_telemetry.show()
+            self.method_telemetry.save()
         # Scrcpy server is still sending video stream,
         # stop it during wait
         if self.config.Emulator_ScreenshotMethod == 'scrcpy':
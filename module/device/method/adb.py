@@ -87,16 +87,17 @@ def retry(func):
 def load_screencap(data):
     """
     Args:
-        data: Raw data from `screencap`
+        data (bytes, memoryview): Raw data from `screencap`
 
     Returns:
         np.ndarray:
     """
     # Load data
-    header = np.frombuffer(data[0:12], dtype=np.uint32)
+    header = np.frombuffer(data, dtype=np.uint32, count=3)
     channel = 4  # screencap sends an RGBA image
     width, height, _ = header  # Usually to be 1280, 720, 1
 
+    # A view of data, no copy
     image = np.frombuffer(data, dtype=np.uint8)
     if image is None:
         raise ImageTruncated('Empty image after reading from buffer')
@@ -107,6 +108,7 @@ def load_screencap(data):
         # ValueError: cannot reshape array of size 0 into shape (720,1280,4)
         raise ImageTruncated(str(e))
 
+    # Drop alpha channel, the only copy from data to a new image
     image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
     if image is None:
         raise ImageTruncated('Empty image after cv2.cvtColor')
@@ -120,6 +122,17 @@ class Adb(Connection):
 
     @staticmethod
     def __load_screenshot(screenshot, method):
+        if isinstance(screenshot, memoryview):
+            # Decode from buffer directly, unless data need to be fixed
+            if method == 0 and screenshot[:20].tobytes() != b'long long=8 fun*=10\n':
+                image = np.frombuffer(screenshot, np.uint8)
+                image = cv2.imdecode(image, cv2.IMREAD_COLOR)
+                if image is None:
+                    raise ImageTruncated('Empty image after cv2.imdecode')
+                cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=image)
+                return image
+            screenshot = bytes(screenshot)
+
         if method == 0:
             pass
         elif method == 1:
@@ -159,15 +172,15 @@ class Adb(Connection):
 
         self.__screenshot_method_fixed = self.__screenshot_method
         if len(screenshot) < 500:
-            logger.warning(f'Unexpected screenshot: {screenshot}')
+            logger.warning(f'Unexpected screenshot: {bytes(screenshot)}')
         raise OSError(f'cannot load screenshot')
 
     @retry
     @Config.when(DEVICE_OVER_HTTP=False)
     def screenshot_adb(self):
-        data = self.adb_shell(['screencap', '-p'], stream=True)
+        data = self.adb_shell(['screencap', '-p'], stream=True, buffer=self.screenshot_buffer)
         if len(data) < 500:
-            logger.warning(f'Unexpected screenshot: {data}')
+            logger.warning(f'Unexpected screenshot: {bytes(data)}')
 
         return self.__process_screenshot(data)
 
@@ -182,9 +195,9 @@ class Adb(Connection):
 
     @retry
     def screenshot_adb_nc(self):
-        data = self.adb_shell_nc(['screencap'])
+        data = self.adb_shell_nc(['screencap'], buffer=self.screenshot_buffer)
         if len(data) < 500:
-            logger.warning(f'Unexpected screenshot: {data}')
+            logger.warning(f'Unexpected screenshot: {bytes(data)}')
 
         return load_screencap(data)
 
@@ -5,7 +5,6 @@ import time
 import typing as t
 from time import sleep
 
-import numpy as np
 from adbutils import AdbError, Network
 
 from module.base.decorator import cached_property
@@ -22,14 +21,46 @@ class ScrcpyError(Exception):
     pass
 
 
+def h264_keyframe(data):
+    """
+    Args:
+        data: A parsed H.264 packet in Annex B format, bytes-like
+
+    Returns:
+        bool: True if packet is an IDR frame, False if it's a non-IDR frame,
+            None if it has no video frame, like SPS/PPS only, or frame is not found in header.
+    """
+    # Frame NAL unit comes after SPS, PPS and SEI, which are short
+    data = bytes(memoryview(data)[:256])
+    index = data.find(b'\x00\x00\x01')
+    while 0 <= index < len(data) - 3:
+        nal_type = data[index + 3] & 0x1F
+        # 5: Coded slice of an IDR picture
+        if nal_type == 5:
+            return True
+        # 1~4: Coded slice of a non-IDR picture and its partitions
+        if 1 <= nal_type <= 4:
+            return False
+        index = data.find(b'\x00\x00\x01', index + 3)
+    return None
+
+
 class ScrcpyCore(Connection):
     """
     Scrcpy: https://github.com/Genymobile/scrcpy
     Module from https://github.com/leng-yue/py-scrcpy-client
     """
 
-    _scrcpy_last_frame: t.Optional[np.ndarray] = None
+    # av.VideoFrame, converted to np.ndarray in screenshot_scrcpy() only when needed
+    _scrcpy_last_frame = None
     _scrcpy_last_frame_time: float = 0.
+    # Notified when a new frame is decoded
+    _scrcpy_frame_cond = threading.Condition()
+    # If screenshot_scrcpy() is waiting for a new frame
+    _scrcpy_frame_wanted = False
+    # Decode at least once in this amount of packets in lazy decode,
+    # in case encoder ignores key_i_frame_interval=0 and there are few keyframes
+    SCRCPY_PENDING_LIMIT = 30
 
     _scrcpy_alive = False
     _scrcpy_server_stream: t.Optional[AdbConnection] = None
@@ -131,7 +162,8 @@ class ScrcpyCore(Connection):
         self._scrcpy_resolution = struct.unpack(">HH", ret)
         logger.attr('Scrcpy Resolution', self._scrcpy_resolution)
 
-        self._scrcpy_video_socket.setblocking(False)
+        # Block on receiving instead of polling, timeout to check if alive
+        self._scrcpy_video_socket.settimeout(0.1)
         self._scrcpy_alive = True
 
         logger.info('Start video stream loop thread')
@@ -208,6 +240,8 @@ class ScrcpyCore(Connection):
             raise RequestHumanTakeover
 
         codec = CodecContext.create("h264", "r")
+        # Packets not decoded yet in lazy decode, starting from a keyframe
+        pending = []
         while self._scrcpy_alive:
             try:
                 raw_h264 = self._scrcpy_video_socket.recv(0x10000)
@@ -215,17 +249,27 @@ class ScrcpyCore(Connection):
                     if self._scrcpy_alive:
                         raise ScrcpyError("_scrcpy_stream_loop_thread: Video stream disconnected")
                 packets = codec.parse(raw_h264)
+                if not packets:
+                    continue
+                if not self.config.SCRCPY_LAZY_DECODE:
+                    self._scrcpy_decode(codec, packets)
+                    continue
+
+                force = False
                 for packet in packets:
-                    frames = codec.decode(packet)
-                    for frame in frames:
-                        # logger.info('frame received')
-                        frame = frame.to_ndarray(format="rgb24")
-                        self._scrcpy_last_frame = frame
-                        self._scrcpy_last_frame_time = time.time()
-                        self._scrcpy_resolution = (frame.shape[1], frame.shape[0])
-            except (BlockingIOError, InvalidDataError):
-                # only return nonempty frames, may block cv2 render thread
-                time.sleep(0.001)
+                    key = h264_keyframe(packet)
+                    if key:
+                        # Frames before a keyframe are not needed to decode it
+                        pending = []
+                    elif key is None:
+                        # SPS/PPS must be decoded
+                        force = True
+                    pending.append(packet)
+                if force or self._scrcpy_frame_wanted or len(pending) > self.SCRCPY_PENDING_LIMIT:
+                    packets, pending = pending, []
+                    self._scrcpy_decode(codec, packets)
+            except (socket.timeout, BlockingIOError, InvalidDataError):
+                continue
             except (ConnectionError, OSError) as e:  # Socket Closed
                 if self._scrcpy_alive:
                     logger.error(f'_scrcpy_stream_loop_thread: {repr(e)}')
@@ -235,3 +279,23 @@ class ScrcpyCore(Connection):
                 raise
 
         raise ScrcpyError('_scrcpy_stream_loop stopped')
+
+    def _scrcpy_decode(self, codec, packets):
+        """
+        Decode packets in order and keep the last frame without converting.
+
+        Args:
+            codec (av.codec.CodecContext):
+            packets (list[av.Packet]):
+        """
+        last = None
+        for packet in packets:
+            for frame in codec.decode(packet):
+                last = frame
+        if last is None:
+            return
+        with self._scrcpy_frame_cond:
+            self._scrcpy_last_frame = last
+            self._scrcpy_last_frame_time = time.time()
+            self._scrcpy_resolution = (last.width, last.height)
+            self._scrcpy_frame_cond.notify_all()
@@ -101,15 +101,20 @@ class Scrcpy(ScrcpyCore, Uiautomator2):
         with self._scrcpy_control_socket_lock:
             # Wait new frame
             now = time.time()
-            while 1:
-                time.sleep(0.001)
-                thread = self._scrcpy_stream_loop_thread
-                if thread is None or not thread.is_alive():
-                    raise ScrcpyError('_scrcpy_stream_loop_thread died')
-                if self._scrcpy_last_frame_time > now:
-                    # no copy
-                    screenshot = self._scrcpy_last_frame
-                    return screenshot
+            with self._scrcpy_frame_cond:
+                self._scrcpy_frame_wanted = True
+                try:
+                    while self._scrcpy_last_frame_time <= now:
+                        thread = self._scrcpy_stream_loop_thread
+                        if thread is None or not thread.is_alive():
+                            raise ScrcpyError('_scrcpy_stream_loop_thread died')
+                        self._scrcpy_frame_cond.wait(0.1)
+                    frame = self._scrcpy_last_frame
+                finally:
+                    self._scrcpy_frame_wanted = False
+
+        # Convert the wanted frame only, outside of lock to let decoding continue
+        return frame.to_ndarray(format='rgb24')
 
     @retry
     def click_scrcpy(self, x, y):
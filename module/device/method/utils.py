@@ -163,6 +163,108 @@ def recv_all(stream, chunk_size=4096, recv_interval=0.000) -> bytes:
         raise AdbTimeout('adb read timeout')
 
 
+class RecvBuffer:
+    """
+    A reusable buffer to receive screenshots without joining chunks into new bytes objects.
+
+    Received data is a memoryview of the buffer, only valid until the next receive,
+    so it must be decoded into a new array before receiving again.
+    One capture at a time.
+    """
+    # Shell warnings that may appear before data, see remove_shell_warning()
+    SHELL_WARNING = (b'WARNING: linker:', b'Failed to create', b'[Warning] Multiple displays')
+
+    def __init__(self, size=4194304):
+        """
+        Args:
+            size (int): Initial size in bytes, default to 4MB, enough for a raw 1280x720 RGBA screenshot.
+        """
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+
+    def _ensure(self, length, free):
+        """
+        Grow the buffer if free space after `length` is less than `free`, received data are kept.
+        """
+        size = len(self.buffer)
+        if size - length >= free:
+            return
+        while size - length < free:
+            size *= 2
+        buffer = bytearray(size)
+        buffer[:length] = self.view[:length]
+        self.buffer = buffer
+        self.view = memoryview(buffer)
+
+    def _result(self, length, shell=True):
+        """
+        Args:
+            length (int): Length of received data
+            shell (bool): If data is from shell, remove shell warnings.
+
+        Returns:
+            memoryview | bytes: Received data
+        """
+        if shell and self.buffer.startswith(self.SHELL_WARNING):
+            # Rare, just copy
+            return remove_shell_warning(bytes(self.view[:length]))
+        return self.view[:length]
+
+    def recv_all(self, stream, chunk_size=4096, recv_interval=0.000):
+        """
+        The same as recv_all() but receive into buffer.
+
+        Args:
+            stream:
+            chunk_size:
+            recv_interval (float): Default to 0.000, use 0.001 if receiving as server
+
+        Returns:
+            memoryview | bytes:
+
+        Raises:
+            AdbTimeout
+        """
+        if isinstance(stream, AdbConnection):
+            stream = stream.conn
+        stream.settimeout(10)
+
+        length = 0
+        try:
+            while 1:
+                self._ensure(length, chunk_size)
+                n = stream.recv_into(self.view[length:length + chunk_size])
+                if n:
+                    length += n
+                    time.sleep(recv_interval)
+                else:
+                    break
+        except socket.timeout:
+            raise AdbTimeout('adb read timeout')
+        return self._result(length)
+
+    def read_all(self, fp, chunk_size=262144):
+        """
+        Receive from a file-like object, such as the `raw` of a streamed requests.Response.
+
+        Args:
+            fp: Object with readinto()
+            chunk_size:
+
+        Returns:
+            memoryview | bytes:
+        """
+        length = 0
+        while 1:
+            self._ensure(length, chunk_size)
+            n = fp.readinto(self.view[length:length + chunk_size])
+            if n:
+                length += n
+            else:
+                break
+        return self._result(length, shell=False)
+
+
 def possible_reasons(*args):
     """
     Show possible reasons
@@ -13,6 +13,8 @@ import cv2
 import numpy as np
 
 from module.base.decorator import cached_property
+from module.base.frame import Frame
+from module.base.status import INSTANCE_STATUS
 from module.base.timer import Timer
 from module.base.utils import get_color, image_size, limit_in, save_image
 from module.device.method.adb import Adb
@@ -22,9 +24,417 @@ from module.device.method.ldopengl import LDOpenGL
 from module.device.method.nemu_ipc import NemuIpc
 from module.device.method.scrcpy import Scrcpy
 from module.device.method.wsa import WSA
+from module.device.telemetry import MethodTelemetry
 from module.exception import RequestHumanTakeover, ScriptError
 from module.logger import logger
 
+class ScreenshotPrefetch:
+    """
+    Capture the next screenshot in background while the current one is being analysed.
+
+    Only one capture is in flight at a time, a new one is requested after each screenshot() returns.
+    Frames whose capture started before the last click/swipe are dropped,
+    so decisions are never made on the screen before a control.
+    Frames older than MAX_AGE are dropped as well, in case analysis took long.
+
+    Captures and controls hold the same device lock, so they never use the same connection at once.
+    In click loops every prefetched frame would be stale,
+    so prefetch pauses after CONTROL_STREAK screenshots each following a control,
+    and resumes on the first screenshot without a control before it.
+    """
+    MAX_AGE = 0.5
+    CONTROL_STREAK = 2
+
+    def __init__(self, capture, interval, lock):
+        """
+        Args:
+            capture (callable): Function that returns a raw screenshot.
+            interval (Timer): Minimum interval between 2 screenshots, shared with Screenshot.
+            lock (threading.RLock): Device lock, held by captures and controls.
+        """
+        self.capture = capture
+        self.interval = interval
+        self.lock = lock
+        self.cond = threading.Condition()
+        self.thread = None
+        # If a capture is requested and not taken yet
+        self.pending = False
+        # (start_time, end_time, image or exception)
+        self.result = None
+        # Start time of the capture in flight, or None
+        self.capture_start = None
+        # Increased when a request is dropped, so its capture result is discarded
+        self.generation = 0
+        self.control_time = 0.
+        self.last_get = 0.
+        # Consecutive screenshots that have a control before them
+        self.control_streak = 0
+        # If the last request was skipped in a click loop
+        self.paused = False
+
+        # Metrics
+        self.hit = 0
+        self.stale = 0
+        self.miss = 0
+        self.skip = 0
+        # Seconds of capture latency hidden behind analysis
+        self.hidden = 0.
+
+    def _loop(self):
+        while 1:
+            with self.cond:
+                while not self.pending or self.result is not None:
+                    self.cond.wait()
+                generation = self.generation
+            self.interval.wait()
+            with self.cond:
+                if generation != self.generation:
+                    continue
+                self.interval.reset()
+                start = time.time()
+                self.capture_start = start
+            try:
+                with self.lock:
+                    image = self.capture()
+            except Exception as e:
+                image = e
+            with self.cond:
+                self.capture_start = None
+                if generation == self.generation:
+                    self.result = (start, time.time(), image)
+                self.cond.notify_all()
+
+    def request(self):
+        """
+        Request to capture the next screenshot in background.
+        """
+        self.paused = self.control_streak >= self.CONTROL_STREAK
+        if self.paused:
+            return
+        with self.cond:
+            if self.pending:
+                return
+            self.pending = True
+            self.result = None
+            self.cond.notify_all()
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._loop, name='ScreenshotPrefetch', daemon=True)
+            self.thread.start()
+
+    def on_control(self):
+        """
+        Call after each click/swipe, frames captured before are considered stale.
+        """
+        self.control_time = time.time()
+
+    def _drop(self):
+        """
+        Drop the request, its capture result will be discarded if in flight.
+        """
+        self.generation += 1
+        self.pending = False
+        self.result = None
+
+    def get(self):
+        """
+        Returns:
+            np.ndarray: A raw screenshot whose capture started after the last control.
+        """
+        if self.control_time > self.last_get:
+            self.control_streak += 1
+        else:
+            self.control_streak = 0
+
+        result = None
+        wait_start = time.time()
+        with self.cond:
+            if self.pending:
+                # Wait only for a capture started after the last control, drop the others
+                while self.result is None \
+                        and self.capture_start is not None and self.capture_start >= self.control_time:
+                    self.cond.wait()
+                result = self.result
+                self._drop()
+        waited = time.time() - wait_start
+
+        if result is not None:
+            start, end, image = result
+            if not isinstance(image, Exception) \
+                    and start >= self.control_time and time.time() - end < self.MAX_AGE:
+                self.hit += 1
+                self.hidden += max(end - start - waited, 0.)
+                self.last_get = time.time()
+                return image
+            self.stale += 1
+        elif self.paused:
+            self.skip += 1
+        else:
+            self.miss += 1
+
+        # Capture in foreground, let errors raise as usual
+        self.interval.wait()
+        self.interval.reset()
+        self.last_get = time.time()
+        with self.lock:
+            return self.capture()
+
+    def cancel(self):
+        """
+        Wait for the capture in flight and drop it.
+        Call before releasing screenshot resources.
+        """
+        with self.cond:
+            self._drop()
+        # Capture in flight holds the device lock
+        with self.lock:
+            pass
+
+    def show(self):
+        total = self.hit + self.stale + self.miss + self.skip
+        if not total:
+            return
+        logger.info(f'Screenshot prefetch: {self.hit}/{total} hit, {self.stale} stale, {self.miss} miss, '
+                    f'{self.skip} skipped in click loops, '
+                    f'latency hidden {self.hidden:.3f}s in total, '
+                    f'{self.hidden / total * 1000:.1f}ms per screenshot')
+
+
+class ScreenshotPacer:
+    """
+    Adaptive screenshot interval.
+
+    The interval from Screenshot.screenshot_interval_set() is used as long as the screen is changing,
+    and right after each click/swipe since the screen is about to change.
+    When screenshots stay pixel-identical, like waiting for auto search, enemy searching or loading,
+    interval is stretched to MAX_STRETCH times the capture cycle.
+    The screenshot that first sees a change is taken on a stretched interval,
+    so the stretch is kept small, a change is noticed at most one cycle later.
+
+    Battle animations keep the screen changing, combat is never paced here,
+    its load is limited by Optimization_CombatScreenshotInterval only.
+    """
+    # Start stretching after this amount of consecutive unchanged screenshots
+    STATIC_THRESHOLD = 2
+    # Stretched interval is at most this multiple of the capture cycle
+    MAX_STRETCH = 2
+    # Upper bound of stretched interval, or the base interval if it's larger
+    MAX_INTERVAL = 1.5
+
+    def __init__(self, interval):
+        """
+        Args:
+            interval (Timer): Screenshot interval, shared with Screenshot.
+        """
+        self.interval = interval
+        # Interval set by screenshot_interval_set()
+        self.base = interval.limit
+        # Consecutive unchanged screenshots
+        self.static = 0
+        # Moving average of capture latency of current screenshot method
+        self.latency = 0.
+
+        # Metrics
+        self.frame = 0
+        self.stretched = 0
+        # Seconds of interval added on unchanged screens
+        self.added = 0.
+
+    def set_base(self, interval):
+        self.base = interval
+        self.static = 0
+        self.interval.limit = interval
+
+    def on_capture(self, cost):
+        """
+        Args:
+            cost (float): Seconds that a capture takes.
+        """
+        if self.latency <= 0:
+            self.latency = cost
+        else:
+            self.latency = self.latency * 0.9 + cost * 0.1
+
+    def on_frame(self, unchanged):
+        """
+        Args:
+            unchanged (bool): If the new screenshot is pixel-identical to the previous one.
+        """
+        self.frame += 1
+        if unchanged:
+            self.static += 1
+        else:
+            self.static = 0
+        limit = self.get_interval()
+        if limit > self.base:
+            self.stretched += 1
+            self.added += limit - max(self.base, self.latency)
+        self.interval.limit = limit
+
+    def on_control(self):
+        """
+        Screen is going to change after a click/swipe, check it at full speed.
+        """
+        self.static = 0
+        self.interval.limit = self.base
+
+    def get_interval(self):
+        """
+        Returns:
+            float: Interval before the next screenshot.
+        """
+        if self.static < self.STATIC_THRESHOLD:
+            return self.base
+        # Methods slower than the interval are paced by their own latency,
+        # so stretch on the real cycle
+        cycle = max(self.base, self.latency)
+        return min(cycle * self.MAX_STRETCH, max(self.MAX_INTERVAL, self.base))
+
+    def show(self):
+        if not self.frame:
+            return
+        logger.info(f'Screenshot pacer: {self.stretched}/{self.frame} on stretched interval, '
+                    f'{self.added:.1f}s added in total, '
+                    f'capture latency {self.latency * 1000:.1f}ms')
+        self.frame = 0
+        self.stretched = 0
+        self.added = 0.
+
+
+class ScreenshotRing:
+    """
+    Screenshots before an error, encoded as PNG in background and kept within a memory budget.
+
+    Used as Screenshot.screenshot_deque if Error_ScreenshotMemory > 0.
+    Iterating it takes a snapshot and yields the same {'time': datetime, 'image': np.ndarray}
+    as the raw deque, images are decoded losslessly on the way.
+    A screenshot identical to the previous one is stored as a reference, costing no memory.
+    """
+    # Raw screenshots waiting to be encoded, older ones are dropped if encoding falls behind
+    PENDING_LIMIT = 30
+    # Fast compression, a 1280x720 screenshot takes about 10ms and 0.5~1MB
+    PNG_COMPRESSION = 1
+
+    def __init__(self, budget):
+        """
+        Args:
+            budget (int): Memory budget in bytes.
+        """
+        self.budget = budget
+        # Total bytes of encoded screenshots
+        self.size = 0
+        # [time, encoded], encoded is None if identical to the previous one
+        self.entries = deque()
+        # (time, image) to encode
+        self.pending = deque(maxlen=self.PENDING_LIMIT)
+        self.cond = threading.Condition()
+        self.thread = None
+        # The last image encoded
+        self.last = None
+
+    def append(self, data):
+        """
+        Args:
+            data (dict): {'time': datetime, 'image': np.ndarray}
+        """
+        with self.cond:
+            self.pending.append((data['time'], data['image']))
+            self.cond.notify_all()
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._loop, name='ScreenshotRing', daemon=True)
+            self.thread.start()
+
+    def _loop(self):
+        while 1:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                time_, image = self.pending.popleft()
+            try:
+                encoded = self.encode(image)
+            except Exception as e:
+                logger.warning(f'Failed to encode error screenshot: {e}')
+                self.last = None
+                continue
+            with self.cond:
+                self._push(time_, encoded)
+
+    def encode(self, image):
+        """
+        Args:
+            image (np.ndarray):
+
+        Returns:
+            np.ndarray: PNG data, or None if image is identical to the last one.
+        """
+        last = self.last
+        self.last = image
+        if last is not None and last.shape == image.shape and cv2.norm(last, image, cv2.NORM_INF) == 0:
+            return None
+        # Channels are kept as they are, imdecode() gives them back in the same order
+        ret, encoded = cv2.imencode('.png', image, [cv2.IMWRITE_PNG_COMPRESSION, self.PNG_COMPRESSION])
+        if not ret:
+            raise ScriptError('cv2.imencode failed')
+        return encoded
+
+    @staticmethod
+    def decode(encoded):
+        """
+        Args:
+            encoded (np.ndarray): PNG data.
+
+        Returns:
+            np.ndarray:
+        """
+        return cv2.imdecode(encoded, cv2.IMREAD_UNCHANGED)
+
+    def _push(self, time_, encoded):
+        if encoded is None and not self.entries:
+            # The one it refers to was dropped, nothing to refer
+            return
+        self.entries.append([time_, encoded])
+        if encoded is not None:
+            self.size += encoded.nbytes
+        # Keep at least one
+        while self.size > self.budget and len(self.entries) > 1:
+            _, dropped = self.entries.popleft()
+            if self.entries[0][1] is None:
+                # The next one refers to the dropped one, hand over data
+                self.entries[0][1] = dropped
+            else:
+                self.size -= dropped.nbytes
+
+    def snapshot(self):
+        """
+        Returns:
+            list[tuple[datetime, np.ndarray, bool]]: (time, data, encoded) of all screenshots, oldest first.
+        """
+        with self.cond:
+            entries = [(time_, encoded, True) for time_, encoded in self.entries]
+            pending = [(time_, image, False) for time_, image in self.pending]
+        # Resolve references
+        data = None
+        for index, (time_, encoded, _) in enumerate(entries):
+            if encoded is None:
+                entries[index] = (time_, data, True)
+            else:
+                data = encoded
+        return entries + pending
+
+    def __iter__(self):
+        # Take snapshot now and decode lazily,
+        # so new screenshots taken during iteration don't interfere.
+        snapshot = self.snapshot()
+        return ({'time': time_, 'image': self.decode(data) if encoded else data}
+                for time_, data, encoded in snapshot)
+
+    def __len__(self):
+        with self.cond:
+            return len(self.entries) + len(self.pending)
+
+    def __str__(self):
+        return f'ScreenshotRing({len(self)} screenshots, {self.size / 1048576:.1f}/{self.budget / 1048576:.0f}MB)'
+
+
 class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
     
     def __init__(self, *args, **kwargs):
@@ -55,22 +465,107 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
     def screenshot_method_override(self) -> str:
         return ''
 
+    @property
+    def screenshot_method(self) -> str:
+        """
+        Returns:
+            str: Name of current screenshot method
+        """
+        if self.screenshot_method_override:
+            method = self.screenshot_method_override
+        else:
+            method = self.config.Emulator_ScreenshotMethod
+        if method not in self.screenshot_methods:
+            method = 'ADB'
+        return method
+
+    @cached_property
+    def method_telemetry(self):
+        return MethodTelemetry(serial=self.serial)
+
+    def screenshot_capture(self):
+        """
+        Returns:
+            np.ndarray: Raw screenshot from current screenshot method
+        """
+        name = self.screenshot_method
+        method = self.screenshot_methods[name]
+        pacer = self.config.SCREENSHOT_ADAPTIVE_INTERVAL
+        telemetry = self.config.DEVICE_METHOD_TELEMETRY
+        if not pacer and not telemetry:
+            return method()
+
+        start = time.time()
+        try:
+            image = method()
+        except Exception:
+            if telemetry:
+                self.method_telemetry.screenshot_fail(name)
+                # Roll back before retries, so they run on the previous method
+                self.screenshot_method_trial_check()
+            raise
+        cost = time.time() - start
+        if pacer:
+            self.screenshot_pacer.on_capture(cost)
+        if telemetry:
+            self.method_telemetry.screenshot_add(name, cost)
+        return image
+
+    def screenshot_method_trial_check(self):
+        """
+        Roll back screenshot method if the one on trial fails or turns out slower.
+        Called after each capture, successful or not, on main thread or prefetch thread.
+        """
+        # Under device lock, so screenshot method never changes during a capture
+        with self.device_lock:
+            method = self.method_telemetry.trial_check()
+            if method is not None:
+                self.screenshot_method_override = method
+
+    @cached_property
+    def screenshot_prefetch(self):
+        return ScreenshotPrefetch(
+            capture=self.screenshot_capture, interval=self._screenshot_interval, lock=self.device_lock)
+
+    @cached_property
+    def device_lock(self):
+        """
+        Held by screenshot captures and controls,
+        so a background capture never shares a connection with a control running at the same time.
+        """
+        return threading.RLock()
+
+    @cached_property
+    def screenshot_pacer(self):
+        return ScreenshotPacer(interval=self._screenshot_interval)
+
+    def screenshot_on_control(self):
+        """
+        Call after each click/swipe, so prefetched screenshots before it are dropped,
+        and the next screenshot is taken without stretched interval.
+        """
+        if self.config.SCREENSHOT_PREFETCH:
+            self.screenshot_prefetch.on_control()
+        if self.config.SCREENSHOT_ADAPTIVE_INTERVAL:
+            self.screenshot_pacer.on_control()
+
     def screenshot(self):
         """
         Returns:
             np.ndarray:
         """
-        self._screenshot_interval.wait()
-        self._screenshot_interval.reset()
+        prefetch = self.config.SCREENSHOT_PREFETCH
+        if not prefetch:
+            self._screenshot_interval.wait()
+            self._screenshot_interval.reset()
 
         for _ in range(2):
-            if self.screenshot_method_override:
-                method = self.screenshot_method_override
+            start = time.perf_counter()
+            if prefetch:
+                self.image = self.screenshot_prefetch.get()
             else:
-                method = self.config.Emulator_ScreenshotMethod
-            method = self.screenshot_methods.get(method, self.screenshot_adb)
-
-            self.image = method()
+                self.image = self.screenshot_capture()
+            INSTANCE_STATUS.set_screenshot_latency(time.perf_counter() - start)
 
             if self.config.Emulator_ScreenshotDedithering:
                 # This will take 40-60ms
@@ -85,8 +580,24 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
             else:
                 continue
 
+        if self.config.DEVICE_METHOD_TELEMETRY:
+            self.screenshot_method_trial_check()
+        if prefetch:
+            self.screenshot_prefetch.request()
+        frame = Frame.set(self.image)
+        if self.config.SCREENSHOT_ADAPTIVE_INTERVAL:
+            self.screenshot_pacer.on_frame(frame.unchanged)
         return self.image
 
+    @property
+    def frame_unchanged(self):
+        """
+        Returns:
+            bool: If the latest screenshot is pixel-identical to the previous one
+        """
+        frame = Frame.of(self.image) if self.has_cached_image else None
+        return frame is not None and frame.unchanged
+
     @property
     def has_cached_image(self):
         return hasattr(self, 'image') and self.image is not None
@@ -119,6 +630,17 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
 
     @cached_property
     def screenshot_deque(self):
+        """
+        Returns:
+            deque | ScreenshotRing: Screenshots to save on error
+        """
+        try:
+            memory = float(self.config.Error_ScreenshotMemory)
+        except ValueError:
+            logger.error(f'Error_ScreenshotMemory={self.config.Error_ScreenshotMemory} is not a number')
+            raise RequestHumanTakeover
+        if memory > 0:
+            return ScreenshotRing(budget=int(memory * 1048576))
         try:
             length = int(self.config.Error_ScreenshotLength)
         except ValueError:
@@ -196,6 +718,11 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
         if self.config.Emulator_ScreenshotMethod == 'scrcpy':
             interval = 0.1
 
+        if self.config.SCREENSHOT_ADAPTIVE_INTERVAL:
+            if interval != self.screenshot_pacer.base:
+                logger.info(f'Screenshot interval set to {interval}s, adaptive')
+                self.screenshot_pacer.set_base(interval)
+            return
         if interval != self._screenshot_interval.limit:
             logger.info(f'Screenshot interval set to {interval}s')
             self._screenshot_interval.limit = interval
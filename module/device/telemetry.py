@@ -0,0 +1,282 @@
+import json
+import os
+import re
+import threading
+from collections import deque
+
+import numpy as np
+
+from module.logger import logger
+
+TELEMETRY_FOLDER = './config/telemetry'
+# Screenshot methods that need no setup or release outside themselves,
+# so they are safe to probe during idle and to switch between in runtime.
+# uiautomator2, aScreenCap and DroidCast push binaries or start servers on the device on first use,
+# nemu_ipc, ldopengl and scrcpy are bound to Emulator_ScreenshotMethod in many places, never switched.
+STATELESS_SCREENSHOT_METHODS = ['ADB', 'ADB_nc']
+
+
+class MethodRecord:
+    """
+    Latency and failures of a screenshot or control method.
+    """
+    # Keep latency of the latest calls only
+    SAMPLES = 50
+
+    def __init__(self, latency=(), success=0, failure=0):
+        self.latency = deque(latency, maxlen=self.SAMPLES)
+        self.success = success
+        self.failure = failure
+
+    def add(self, cost):
+        self.latency.append(cost)
+        self.success += 1
+
+    def fail(self):
+        self.failure += 1
+
+    @property
+    def median(self):
+        """
+        Returns:
+            float: Median latency, or None if no records.
+        """
+        if not self.latency:
+            return None
+        return float(np.median(self.latency))
+
+    @property
+    def failure_rate(self):
+        total = self.success + self.failure
+        if not total:
+            return 0.
+        return self.failure / total
+
+    def to_dict(self):
+        return {
+            'latency': [round(cost, 4) for cost in self.latency],
+            'success': self.success,
+            'failure': self.failure,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            latency=data.get('latency', []),
+            success=data.get('success', 0),
+            failure=data.get('failure', 0),
+        )
+
+    def __str__(self):
+        median = self.median
+        median = f'{median * 1000:.1f}ms' if median is not None else '-'
+        return f'{median} ({self.success} ok, {self.failure} failed)'
+
+
+class MethodTelemetry:
+    """
+    Per-call latency and failures of screenshot and control methods, persisted per device serial.
+
+    Screenshot methods in STATELESS_SCREENSHOT_METHODS are probed a few times during idle,
+    if one is consistently faster than the current method, it's put on trial.
+    A trial is confirmed after CONFIRM_COUNT live captures,
+    or rolled back if the new method fails or is slower than the previous one.
+
+    Captures may run on the prefetch thread, so all methods are under a lock.
+    """
+    # Minimum samples of a method before comparing it
+    MIN_SAMPLES = 5
+    # Switch only if the candidate is faster by this ratio
+    SWITCH_MARGIN = 0.2
+    # Captures on one alternative in each idle probe
+    PROBE_COUNT = 3
+    # Live captures to confirm a switch
+    CONFIRM_COUNT = 20
+
+    def __init__(self, serial):
+        """
+        Args:
+            serial (str): Device serial.
+        """
+        self.serial = serial
+        name = re.sub(r'[^\w.-]', '_', serial)
+        self.file = os.path.join(TELEMETRY_FOLDER, f'{name}.json')
+        # Key: method name, value: MethodRecord
+        self.screenshot = {}
+        self.control = {}
+        # Screenshot method confirmed to be the fastest on this device
+        self.best = ''
+        # Methods that failed in probe or were rolled back, never tried again
+        self.banned = set()
+        # [previous_method, new_method, live captures since switch], or None if not on trial
+        self.trial = None
+        self.lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f'Failed to load method telemetry {self.file}: {e}')
+            return
+        self.screenshot = {k: MethodRecord.from_dict(v) for k, v in data.get('screenshot', {}).items()}
+        self.control = {k: MethodRecord.from_dict(v) for k, v in data.get('control', {}).items()}
+        self.best = data.get('best', '')
+        self.banned = set(data.get('banned', []))
+
+    def save(self):
+        with self.lock:
+            data = {
+                'serial': self.serial,
+                'screenshot': {k: v.to_dict() for k, v in self.screenshot.items()},
+                'control': {k: v.to_dict() for k, v in self.control.items()},
+                'best': self.best,
+                'banned': sorted(self.banned),
+            }
+        try:
+            os.makedirs(TELEMETRY_FOLDER, exist_ok=True)
+            with open(self.file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+        except Exception as e:
+            logger.warning(f'Failed to save method telemetry {self.file}: {e}')
+
+    @staticmethod
+    def _get(records, method):
+        try:
+            return records[method]
+        except KeyError:
+            record = MethodRecord()
+            records[method] = record
+            return record
+
+    def screenshot_add(self, method, cost):
+        with self.lock:
+            self._get(self.screenshot, method).add(cost)
+
+    def screenshot_fail(self, method):
+        with self.lock:
+            self._get(self.screenshot, method).fail()
+
+    def control_add(self, method, cost):
+        with self.lock:
+            self._get(self.control, method).add(cost)
+
+    def control_fail(self, method):
+        with self.lock:
+            self._get(self.control, method).fail()
+
+    def ban(self, method):
+        """
+        Never probe or switch to a method again.
+        """
+        with self.lock:
+            self.banned.add(method)
+
+    def probe_target(self, current, candidates):
+        """
+        Args:
+            current (str): Current screenshot method.
+            candidates (list[str]): Screenshot methods available on this device.
+
+        Returns:
+            str: The alternative with the least samples, or None if nothing to probe.
+        """
+        with self.lock:
+            if current not in STATELESS_SCREENSHOT_METHODS or self.trial is not None:
+                return None
+            candidates = [m for m in candidates
+                          if m != current and m in STATELESS_SCREENSHOT_METHODS and m not in self.banned]
+            if not candidates:
+                return None
+
+            def samples(method):
+                record = self.screenshot.get(method)
+                return len(record.latency) if record is not None else 0
+
+            return min(candidates, key=samples)
+
+    def switch_target(self, current):
+        """
+        Args:
+            current (str): Current screenshot method.
+
+        Returns:
+            str: An alternative consistently faster than current method, or None.
+        """
+        with self.lock:
+            if current not in STATELESS_SCREENSHOT_METHODS or self.trial is not None:
+                return None
+            record = self.screenshot.get(current)
+            if record is None or len(record.latency) < self.MIN_SAMPLES:
+                return None
+            limit = record.median * (1 - self.SWITCH_MARGIN)
+            best, best_cost = None, limit
+            for method, other in self.screenshot.items():
+                if method == current or method in self.banned or method not in STATELESS_SCREENSHOT_METHODS:
+                    continue
+                if len(other.latency) < self.MIN_SAMPLES or other.failure:
+                    continue
+                if other.median < best_cost:
+                    best, best_cost = method, other.median
+            return best
+
+    def trial_start(self, previous, method):
+        with self.lock:
+            logger.info(f'Screenshot method {method} is faster than {previous}, switch on trial: '
+                        f'{method} {self.screenshot[method]}, {previous} {self.screenshot[previous]}')
+            self.trial = [previous, method, 0]
+
+    def trial_check(self):
+        """
+        Call after each live capture.
+
+        Returns:
+            str: Method to roll back to, or None to keep the current one.
+        """
+        with self.lock:
+            if self.trial is None:
+                return None
+            previous, method, count = self.trial
+            count += 1
+            self.trial[2] = count
+            record = self._get(self.screenshot, method)
+            if record.failure:
+                logger.warning(f'Screenshot method {method} failed on trial, roll back to {previous}')
+                return self.trial_end(rollback=True)
+            if count < self.CONFIRM_COUNT:
+                return None
+            prev = self.screenshot.get(previous)
+            if prev is not None and prev.median is not None and record.median >= prev.median:
+                logger.warning(f'Screenshot method {method} is not faster than {previous} on trial, '
+                               f'{record} vs {prev}, roll back')
+                return self.trial_end(rollback=True)
+            logger.info(f'Screenshot method {method} confirmed: {record}')
+            self.trial_end(rollback=False)
+            return None
+
+    def trial_end(self, rollback):
+        """
+        Returns:
+            str: Method to use after trial.
+        """
+        with self.lock:
+            previous, method, _ = self.trial
+            self.trial = None
+            if rollback:
+                self.banned.add(method)
+                if self.best == method:
+                    self.best = ''
+                self.save()
+                return previous
+            self.best = method
+            self.save()
+            return method
+
+    def show(self):
+        with self.lock:
+            for name, records in [('Screenshot', self.screenshot), ('Control', self.control)]:
+                for method, record in records.items():
+                    logger.attr(f'{name} {method}', str(record))
@@ -2,9 +2,10 @@ import datetime
 import logging
 import os
 import sys
+import time
 from typing import Callable, List
 
-from rich.console import Console, ConsoleOptions, ConsoleRenderable, NewLine
+from rich.console import Console, ConsoleOptions, ConsoleRenderable, Group, NewLine
 from rich.highlighter import NullHighlighter, RegexHighlighter
 from rich.logging import RichHandler
 from rich.rule import Rule
@@ -247,7 +248,151 @@ def set_func_logger(func):
     )
     hdlr.setFormatter(web_formatter)
     logger.handlers = [h for h in logger.handlers if not isinstance(
-        h, RichRenderableHandler)]
+        h, (RichRenderableHandler, StructuredLogHandler))]
+    logger.addHandler(hdlr)
+
+
+class StructuredLog:
+    """
+    A log line in plain data, cheap to pickle and send to GUI process.
+    Rendered into rich renderable on demand, by rich.console.Console.print() through __rich__().
+    """
+    __slots__ = ('levelno', 'levelname', 'created', 'message', 'markup', 'trace', 'objects')
+
+    def __init__(self, levelno=logging.INFO, levelname='INFO', created=0., message='', markup=None, trace=None,
+                 objects=None):
+        self.levelno = levelno
+        self.levelname = levelname
+        self.created = created
+        self.message = message
+        # `markup` flag of record from extra={"markup": True}, None if not set.
+        # If True, tags in message such as `[bold]` are rendered as style instead of text
+        self.markup = markup
+        # rich.traceback.Trace, extracted from exception
+        self.trace = trace
+        # Objects from logger.print(), such as rich.rule.Rule
+        self.objects = objects
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+    def __str__(self):
+        return self.message
+
+    def __rich__(self):
+        hdlr = _get_web_renderer()
+        if self.objects is not None:
+            renderables = _get_renderables(hdlr.console, *self.objects)
+            return Group(*renderables)
+
+        record = logging.makeLogRecord({
+            'name': logger.name,
+            'levelno': self.levelno,
+            'levelname': self.levelname,
+            'msg': self.message,
+            'created': self.created,
+            'msecs': (self.created - int(self.created)) * 1000,
+        })
+        if self.markup is not None:
+            record.markup = self.markup
+        traceback = None
+        if self.trace is not None:
+            traceback = Traceback(
+                trace=self.trace,
+                width=hdlr.tracebacks_width,
+                extra_lines=hdlr.tracebacks_extra_lines,
+                theme=hdlr.tracebacks_theme,
+                word_wrap=hdlr.tracebacks_word_wrap,
+                show_locals=hdlr.tracebacks_show_locals,
+                locals_max_length=hdlr.locals_max_length,
+                locals_max_string=hdlr.locals_max_string,
+            )
+        message = hdlr.format(record)
+        message_renderable = hdlr.render_message(record, message)
+        return hdlr.render(record=record, traceback=traceback, message_renderable=message_renderable)
+
+
+class StructuredLogHandler(logging.Handler):
+    """
+    Pass StructuredLog into a function, rendering is left to the receiver.
+    """
+
+    def __init__(self, func: Callable[[StructuredLog], None], show_locals=True):
+        super().__init__()
+        self._func = func
+        self.show_locals = show_locals
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            trace = None
+            if record.exc_info and record.exc_info != (None, None, None):
+                exc_type, exc_value, exc_traceback = record.exc_info
+                trace = Traceback.extract(exc_type, exc_value, exc_traceback, show_locals=self.show_locals)
+            log = StructuredLog(
+                levelno=record.levelno,
+                levelname=record.levelname,
+                created=record.created,
+                message=record.getMessage(),
+                markup=getattr(record, 'markup', None),
+                trace=trace,
+            )
+            self._func(log)
+        except Exception:
+            self.handleError(record)
+
+    def print(self, *objects):
+        self._func(StructuredLog(created=time.time(), objects=objects))
+
+
+_web_renderer = None
+
+
+def _get_web_renderer() -> RichRenderableHandler:
+    """
+    Returns:
+        RichRenderableHandler: Handler that renders StructuredLog the same as set_func_logger()
+    """
+    global _web_renderer
+    if _web_renderer is None:
+        console = HTMLConsole(
+            force_terminal=False,
+            force_interactive=False,
+            width=80,
+            color_system='truecolor',
+            markup=False,
+            safe_box=False,
+            highlighter=Highlighter(),
+            theme=WEB_THEME
+        )
+        hdlr = RichRenderableHandler(
+            console=console,
+            show_path=False,
+            show_time=False,
+            show_level=True,
+            rich_tracebacks=True,
+            tracebacks_show_locals=True,
+            tracebacks_extra_lines=2,
+            highlighter=Highlighter(),
+        )
+        hdlr.setFormatter(web_formatter)
+        _web_renderer = hdlr
+    return _web_renderer
+
+
+def set_structured_logger(func):
+    """
+    Like set_func_logger(), but pass StructuredLog instead of rendered renderables.
+
+    Args:
+        func (Callable[[StructuredLog], None]):
+    """
+    hdlr = StructuredLogHandler(func=func)
+    logger.handlers = [h for h in logger.handlers if not isinstance(
+        h, (RichRenderableHandler, StructuredLogHandler))]
     logger.addHandler(hdlr)
 
 
@@ -278,7 +423,9 @@ def _get_renderables(
 
 def print(*objects: ConsoleRenderable, **kwargs):
     for hdlr in logger.handlers:
-        if isinstance(hdlr, RichRenderableHandler):
+        if isinstance(hdlr, StructuredLogHandler):
+            hdlr.print(*objects)
+        elif isinstance(hdlr, RichRenderableHandler):
             for renderable in _get_renderables(hdlr.console, *objects, **kwargs):
                 hdlr._func(renderable)
         elif isinstance(hdlr, RichHandler):
@@ -352,6 +499,7 @@ logger.attr = attr
 logger.attr_align = attr_align
 logger.set_file_logger = set_file_logger
 logger.set_func_logger = set_func_logger
+logger.set_structured_logger = set_structured_logger
 logger.rule = rule
 logger.print = print
 logger.log_file: str
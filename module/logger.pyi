@@ -28,6 +28,22 @@ def set_func_logger(
     func: Callable[[ConsoleRenderable], None],
 ) -> None: ...
 
+class StructuredLog:
+    levelno: int
+    levelname: str
+    created: float
+    message: str
+    markup: Any
+    trace: Any
+    objects: Any
+    def __rich__(self) -> ConsoleRenderable: ...
+
+class StructuredLogHandler(logging.Handler): ...
+
+def set_structured_logger(
+    func: Callable[[StructuredLog], None],
+) -> None: ...
+
 class __logger(logging.Logger):
     def rule(
         self,
@@ -63,6 +79,10 @@ class __logger(logging.Logger):
         self,
         func: Callable[[ConsoleRenderable], None],
     ) -> None: ...
+    def set_structured_logger(
+        self,
+        func: Callable[[StructuredLog], None],
+    ) -> None: ...
     def print(
         self,
         *objects: ConsoleRenderable,
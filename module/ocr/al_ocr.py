@@ -92,31 +92,36 @@ class AlOcr(CnOcr):
 
         self._mod = self._get_module(AlOcr.CNOCR_CONTEXT)
 
+    def load(self):
+        """
+        Load model if it's not loaded yet.
+
+        Returns:
+            bool: True if model is loaded in this call, False if it was loaded already.
+        """
+        if self._model_loaded:
+            return False
+        self.init(*self._args)
+        self._model_loaded = True
+        return True
+
     def ocr(self, img_fp):
-        if not self._model_loaded:
-            self.init(*self._args)
-            self._model_loaded = True
+        self.load()
 
         return super().ocr(img_fp)
 
     def ocr_for_single_line(self, img_fp):
-        if not self._model_loaded:
-            self.init(*self._args)
-            self._model_loaded = True
+        self.load()
 
         return super().ocr_for_single_line(img_fp)
 
     def ocr_for_single_lines(self, img_list):
-        if not self._model_loaded:
-            self.init(*self._args)
-            self._model_loaded = True
+        self.load()
 
         return super().ocr_for_single_lines(img_list)
 
     def set_cand_alphabet(self, cand_alphabet):
-        if not self._model_loaded:
-            self.init(*self._args)
-            self._model_loaded = True
+        self.load()
 
         return super().set_cand_alphabet(cand_alphabet)
 
@@ -126,27 +131,21 @@ class AlOcr(CnOcr):
     """
 
     def atomic_ocr(self, img_fp, cand_alphabet=None):
-        if not self._model_loaded:
-            self.init(*self._args)
-            self._model_loaded = True
+        self.load()
 
         super().set_cand_alphabet(cand_alphabet)
 
         return super().ocr(img_fp)
 
     def atomic_ocr_for_single_line(self, img_fp, cand_alphabet=None):
-        if not self._model_loaded:
-            self.init(*self._args)
-            self._model_loaded = True
+        self.load()
 
         super().set_cand_alphabet(cand_alphabet)
 
         return super().ocr_for_single_line(img_fp)
 
     def atomic_ocr_for_single_lines(self, img_list, cand_alphabet=None):
-        if not self._model_loaded:
-            self.init(*self._args)
-            self._model_loaded = True
+        self.load()
 
         super().set_cand_alphabet(cand_alphabet)
 
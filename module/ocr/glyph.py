@@ -0,0 +1,237 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+import module.config.server as server
+from module.base.utils import load_image, rgb2gray, save_image
+from module.logger import logger
+from module.statistics.utils import load_folder
+
+# Folder: ./assets/ocr_glyph/<server>
+# Image name: the character, such as `0`, or its name in GLYPH_NAME. Suffix in name will be ignore,
+# For example, `0` and `0_2` are different templates of `0`.
+# Image shape: (GLYPH_HEIGHT, GLYPH_WIDTH), dark letter on white background, generated by glyph_canvas().
+GLYPH_FOLDER = './assets/ocr_glyph'
+GLYPH_NAME = {'/': 'slash', ':': 'colon'}
+GLYPH_HEIGHT = 24
+GLYPH_WIDTH = 24
+
+
+def glyph_segment(image, threshold=128):
+    """
+    Split a pre_processed image into glyphs by column projection.
+
+    Args:
+        image (np.ndarray): Pre_processed image, dark letters on white background, shape (height, width).
+        threshold (int): Pixels darker than it are letters.
+
+    Returns:
+        list[np.ndarray]: Bool images of each glyph, cropped to the height of text line.
+    """
+    mask = image < threshold
+    columns = mask.any(axis=0).astype(np.int8)
+    edges = np.diff(np.concatenate([[0], columns, [0]]))
+    runs = list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+    if not runs:
+        return []
+
+    # Drop noise like dots of the background, which are much smaller than a letter.
+    # `:` has two dots, each of them is larger than stroke width squared.
+    rows = np.flatnonzero(mask.any(axis=1))
+    height = rows[-1] - rows[0] + 1
+    runs = [(start, end) for start, end in runs if mask[:, start:end].sum() >= height * 0.5]
+    if not runs:
+        return []
+
+    rows = np.flatnonzero(mask[:, runs[0][0]:runs[-1][1]].any(axis=1))
+    mask = mask[rows[0]:rows[-1] + 1]
+    return [mask[:, start:end] for start, end in runs]
+
+
+def glyph_canvas(glyph):
+    """
+    Args:
+        glyph (np.ndarray): Bool image of a glyph, cropped to the height of text line.
+
+    Returns:
+        np.ndarray: Glyph resized to GLYPH_HEIGHT keeping aspect ratio, centered in GLYPH_WIDTH,
+            shape (GLYPH_HEIGHT, GLYPH_WIDTH), float32, 1 for letter, 0 for background.
+    """
+    h, w = glyph.shape
+    width = int(min(GLYPH_WIDTH, max(1, round(w * GLYPH_HEIGHT / h))))
+    resized = cv2.resize(glyph.astype(np.float32), (width, GLYPH_HEIGHT), interpolation=cv2.INTER_AREA)
+    canvas = np.zeros((GLYPH_HEIGHT, GLYPH_WIDTH), dtype=np.float32)
+    left = (GLYPH_WIDTH - width) // 2
+    canvas[:, left:left + width] = resized
+    return canvas
+
+
+def glyph_vector(canvas):
+    """
+    Args:
+        canvas (np.ndarray): Output of glyph_canvas()
+
+    Returns:
+        np.ndarray: Zero mean, unit norm vector, so dot product is normalized correlation.
+    """
+    vector = canvas.ravel().astype(np.float32)
+    vector = vector - vector.mean()
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class GlyphClassifier:
+    """
+    Classify digits in the fixed font of the game without OCR model.
+
+    A pre_processed image is split into glyphs by column projection,
+    each glyph is matched against templates by normalized correlation.
+    Returns None if any glyph is not confident, so caller can fall back to cnocr.
+    """
+    # Min correlation of the best template.
+    # Bold digits of an unseen font match `0` at 0.86~0.88, so it's higher than that.
+    MIN_SCORE = 0.9
+    # Min gap between the best character and the second best one
+    MIN_MARGIN = 0.05
+    # Glyphs wider than this are letters stuck together
+    MAX_ASPECT = 1.0
+
+    def __init__(self, templates):
+        """
+        Args:
+            templates (dict[str, list[np.ndarray]]): Key: character, value: canvases from glyph_canvas()
+        """
+        self.chars = sorted(templates.keys())
+        index, vectors = [], []
+        for i, char in enumerate(self.chars):
+            for canvas in templates[char]:
+                index.append(i)
+                vectors.append(glyph_vector(canvas))
+        # Character index of each template
+        self.index = np.array(index, dtype=np.int32)
+        self.vectors = np.array(vectors, dtype=np.float32).reshape(len(vectors), GLYPH_HEIGHT * GLYPH_WIDTH)
+
+    @classmethod
+    def from_folder(cls, folder):
+        """
+        Args:
+            folder (str):
+
+        Returns:
+            GlyphClassifier:
+        """
+        names = {v: k for k, v in GLYPH_NAME.items()}
+        templates = {}
+        for name, file in load_folder(folder).items():
+            char = name.split('_')[0]
+            char = names.get(char, char)
+            image = load_image(file)
+            if image.ndim == 3:
+                image = rgb2gray(image)
+            if image.shape != (GLYPH_HEIGHT, GLYPH_WIDTH):
+                logger.warning(f'Glyph template {file} has unexpected shape {image.shape}')
+                continue
+            canvas = 1. - image.astype(np.float32) / 255
+            templates.setdefault(char, []).append(canvas)
+        return cls(templates)
+
+    @staticmethod
+    def save_template(canvas, folder, char, suffix=''):
+        """
+        Args:
+            canvas (np.ndarray): Output of glyph_canvas(), or mean of them.
+            folder (str):
+            char (str):
+            suffix (str):
+        """
+        os.makedirs(folder, exist_ok=True)
+        image = np.clip((1. - canvas) * 255, 0, 255).astype(np.uint8)
+        name = GLYPH_NAME.get(char, char)
+        save_image(image, os.path.join(folder, f'{name}{suffix}.png'))
+
+    def __bool__(self):
+        return len(self.chars) > 0
+
+    def classify(self, image, alphabet=None):
+        """
+        Args:
+            image (np.ndarray): Pre_processed image, dark letters on white background.
+            alphabet (str): Alphabet white list, characters without templates are never returned.
+
+        Returns:
+            str: Result, or None if not confident.
+        """
+        if not self:
+            return None
+        chars = self.chars
+        if alphabet is not None:
+            allow = np.array([char in alphabet for char in chars])
+            if not allow.any():
+                return None
+        else:
+            allow = np.ones(len(chars), dtype=bool)
+
+        glyphs = glyph_segment(image)
+        if not glyphs:
+            return None
+        for glyph in glyphs:
+            h, w = glyph.shape
+            if w > h * self.MAX_ASPECT:
+                return None
+        vectors = np.array([glyph_vector(glyph_canvas(glyph)) for glyph in glyphs])
+        # Shape (glyphs, templates)
+        scores = vectors @ self.vectors.T
+        # Best score of each character, shape (glyphs, chars)
+        best = np.full((len(glyphs), len(chars)), -1., dtype=np.float32)
+        for i in range(len(chars)):
+            if allow[i]:
+                best[:, i] = scores[:, self.index == i].max(axis=1)
+
+        top2 = np.sort(best, axis=1)[:, -2:] if len(chars) > 1 \
+            else np.concatenate([np.full_like(best, -1.), best], axis=1)
+        if np.any(top2[:, 1] < self.MIN_SCORE) or np.any(top2[:, 1] - top2[:, 0] < self.MIN_MARGIN):
+            return None
+        return ''.join(chars[i] for i in np.argmax(best, axis=1))
+
+
+class GlyphClassifiers:
+    """
+    Glyph classifiers of each server, loaded on first use.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def get(self, name=None):
+        """
+        Args:
+            name (str): Server name, default to current server.
+
+        Returns:
+            GlyphClassifier: Classifier that may have no templates.
+        """
+        if name is None:
+            name = server.server
+        with self.lock:
+            try:
+                return self.data[name]
+            except KeyError:
+                pass
+            folder = os.path.join(GLYPH_FOLDER, name)
+            try:
+                classifier = GlyphClassifier.from_folder(folder)
+            except Exception as e:
+                logger.warning(f'Failed to load glyph templates from {folder}: {e}')
+                classifier = GlyphClassifier({})
+            if classifier:
+                logger.info(f'Glyph templates loaded: {"".join(classifier.chars)}')
+            self.data[name] = classifier
+            return classifier
+
+
+GLYPH_CLASSIFIERS = GlyphClassifiers()
@@ -1,12 +1,18 @@
+import hashlib
+import threading
 import time
+from collections import OrderedDict
 from datetime import timedelta
 from typing import TYPE_CHECKING
 
 import module.config.server as server
 from module.base.button import Button
 from module.base.decorator import cached_property
+from module.base.frame import Frame
 from module.base.utils import *
+from module.config.config_manual import ManualConfig
 from module.logger import logger
+from module.ocr.glyph import GLYPH_CLASSIFIERS
 from module.ocr.rpc import ModelProxyFactory
 from module.webui.setting import State
 
@@ -19,9 +25,104 @@ else:
     OCR_MODEL = ModelProxyFactory()
 
 
+class OcrCache:
+    """
+    LRU cache of OCR model results, shared by all Ocr instances.
+
+    Key is the hash of a pre_processed image plus lang and alphabet,
+    value is the raw string from model before after_process().
+    Counters like oil, coins and action points are read from the same pixels many times,
+    which then costs a hash instead of a model inference.
+    """
+
+    def __init__(self, size):
+        """
+        Args:
+            size (int): Max entries, 0 to disable.
+        """
+        self.size = size
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+        # Key: OCR name, value: [hit, miss, glyph]
+        self.stats = {}
+
+    @staticmethod
+    def key(image, lang, alphabet):
+        """
+        Args:
+            image (np.ndarray): Pre_processed image.
+            lang (str):
+            alphabet (str):
+
+        Returns:
+            tuple:
+        """
+        image = np.ascontiguousarray(image)
+        digest = hashlib.blake2b(image.data, digest_size=16).digest()
+        return digest, image.shape, image.dtype.str, lang, alphabet
+
+    def get(self, key):
+        """
+        Returns:
+            str: Cached result, or None.
+        """
+        with self.lock:
+            try:
+                result = self.data[key]
+            except KeyError:
+                return None
+            self.data.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self.lock:
+            self.data[key] = result
+            self.data.move_to_end(key)
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+    def record(self, name, hit=0, miss=0, glyph=0):
+        """
+        Args:
+            name (str): OCR name.
+            hit (int): Images found in cache.
+            miss (int): Images sent to OCR model.
+            glyph (int): Images classified by GlyphClassifier.
+        """
+        with self.lock:
+            stats = self.stats.setdefault(name, [0, 0, 0])
+            stats[0] += hit
+            stats[1] += miss
+            stats[2] += glyph
+
+    def stats_show(self):
+        """
+        Log hit/miss of each OCR since last call and reset them.
+        """
+        with self.lock:
+            stats, self.stats = self.stats, {}
+        for name, (hit, miss, glyph) in sorted(stats.items(), key=lambda item: -sum(item[1])):
+            text = f'OCR cache {name}: {hit}/{hit + miss} hit'
+            if glyph:
+                text += f', {glyph} by glyph'
+            logger.info(text)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+OCR_CACHE = OcrCache(size=ManualConfig.OCR_CACHE_SIZE)
+
+
 class Ocr:
     SHOW_LOG = True
     SHOW_REVISE_WARNING = False
+    # True to classify digits by glyph templates in ./assets/ocr_glyph before OCR model.
+    # Only for the digit font of the game, see module.ocr.glyph.
+    # Off by default, opt in on a call site only with a held-out accuracy and speed report
+    # from dev_tools/ocr_glyph_test.py against the OCR model.
+    GLYPH = False
 
     def __init__(self, buttons, lang='azur_lane', letter=(255, 255, 255), threshold=128, alphabet=None, name=None):
         """
@@ -79,17 +180,15 @@ class Ocr:
         """
         return result
 
-    def ocr(self, image, direct_ocr=False):
+    def _ocr(self, image, direct_ocr=False):
         """
         Args:
             image (np.ndarray, list[np.ndarray]):
             direct_ocr (bool): True to skip preprocess.
 
         Returns:
-
+            list: Results of each button
         """
-        start_time = time.time()
-
         if direct_ocr:
             image_list = [self.pre_process(i) for i in image]
         else:
@@ -98,9 +197,86 @@ class Ocr:
         # This will show the images feed to OCR model
         # self.cnocr.debug(image_list)
 
-        result_list = self.cnocr.atomic_ocr_for_single_lines(image_list, self.alphabet)
-        result_list = [''.join(result) for result in result_list]
+        result_list = self._ocr_model(image_list)
         result_list = [self.after_process(result) for result in result_list]
+        return result_list
+
+    @property
+    def glyph_enabled(self):
+        # Glyph templates are the font of model azur_lane, other models are used on other fonts
+        return self.GLYPH and self.lang.startswith('azur_lane')
+
+    def _ocr_model(self, image_list):
+        """
+        Classify images by glyph templates if enabled, run OCR model on the others.
+
+        Args:
+            image_list (list[np.ndarray]): Pre_processed images.
+
+        Returns:
+            list[str]: Raw results of each image
+        """
+        if not self.glyph_enabled:
+            return self._ocr_cnocr(image_list)
+        classifier = GLYPH_CLASSIFIERS.get()
+        if not classifier:
+            return self._ocr_cnocr(image_list)
+
+        result_list = [classifier.classify(image, self.alphabet) for image in image_list]
+        missing = [index for index, result in enumerate(result_list) if result is None]
+        OCR_CACHE.record(self.name, glyph=len(image_list) - len(missing))
+        if missing:
+            results = self._ocr_cnocr([image_list[i] for i in missing])
+            for index, result in zip(missing, results):
+                result_list[index] = result
+        return result_list
+
+    def _ocr_cnocr(self, image_list):
+        """
+        Run OCR model on images that are not in OCR_CACHE.
+
+        Args:
+            image_list (list[np.ndarray]): Pre_processed images.
+
+        Returns:
+            list[str]: Raw results of each image
+        """
+        if OCR_CACHE.size <= 0:
+            result_list = self.cnocr.atomic_ocr_for_single_lines(image_list, self.alphabet)
+            return [''.join(result) for result in result_list]
+
+        keys = [OCR_CACHE.key(image, self.lang, self.alphabet) for image in image_list]
+        result_list = [OCR_CACHE.get(key) for key in keys]
+        missing = [index for index, result in enumerate(result_list) if result is None]
+        if missing:
+            results = self.cnocr.atomic_ocr_for_single_lines([image_list[i] for i in missing], self.alphabet)
+            for index, result in zip(missing, results):
+                result = ''.join(result)
+                OCR_CACHE.put(keys[index], result)
+                result_list[index] = result
+        OCR_CACHE.record(self.name, hit=len(image_list) - len(missing), miss=len(missing))
+        return result_list
+
+    def ocr(self, image, direct_ocr=False):
+        """
+        Args:
+            image (np.ndarray, list[np.ndarray]):
+            direct_ocr (bool): True to skip preprocess.
+
+        Returns:
+
+        """
+        start_time = time.time()
+
+        frame = None if direct_ocr else Frame.of(image)
+        if frame is None:
+            result_list = self._ocr(image, direct_ocr=direct_ocr)
+        else:
+            # Reuse results on the same or identical screenshots
+            key = ('ocr', id(self), tuple(tuple(area) for area in self.buttons),
+                   self.lang, self.alphabet, tuple(self.letter), self.threshold)
+            _, result_list = frame.memo(key, lambda: (self, self._ocr(image)))
+            result_list = list(result_list)
 
         if len(self.buttons) == 1:
             result_list = result_list[0]
@@ -1,16 +1,269 @@
 import argparse
+import mmap
 import multiprocessing
+import os
 import pickle
+import secrets
+import tempfile
+import threading
 
 from module.logger import logger
 from module.webui.setting import State
 
 process: multiprocessing.Process = None
 
+# Max images in one batch of model inference
+BATCH_SIZE = 64
+# Seconds to wait for requests from other clients before running a batch, 0 to disable batching
+BATCH_LATENCY = 0.005
+# Bytes of shared memory that each client writes images into, if server is on the same host
+SHARED_MEMORY_SIZE = 4 * 1024 * 1024
+SHARED_MEMORY_PREFIX = 'alas_ocr_'
+# Max shared memory attached by server, the oldest one is detached
+SHARED_MEMORY_ATTACH_LIMIT = 16
+LOCAL_HOSTS = ['127.0.0.1', 'localhost', '::1']
+
+
+class OcrBatcher:
+    """
+    Collect atomic_ocr_for_single_lines() requests from all clients for BATCH_LATENCY seconds,
+    and run them in one ocr_for_single_lines() pass.
+
+    Requests are grouped by (lang, cand_alphabet, image shape).
+    Alphabet is a state of the model, and images of the same shape need no padding in a batch,
+    so a result never depends on the requests from other clients.
+    Runs in the gevent loop of zerorpc server.
+    """
+
+    def __init__(self, model, batch_size=BATCH_SIZE, latency=BATCH_LATENCY):
+        """
+        Args:
+            model (OcrModel):
+            batch_size (int):
+            latency (float):
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.latency = latency
+        # Key: (lang, cand_alphabet, shape), value: list of (image, AsyncResult)
+        self.queue = {}
+        self.flusher = None
+
+        # Metrics
+        self.batch = 0
+        self.image = 0
+
+    def submit(self, lang, img_list, cand_alphabet=None):
+        """
+        Args:
+            lang (str):
+            img_list (list[np.ndarray]):
+            cand_alphabet (str):
+
+        Returns:
+            list: Results of each image, the same as AlOcr.atomic_ocr_for_single_lines()
+        """
+        if self.latency <= 0 or not img_list:
+            cnocr = self.model.__getattribute__(lang)
+            return cnocr.atomic_ocr_for_single_lines(img_list, cand_alphabet)
+
+        import gevent
+        from gevent.event import AsyncResult
+        results = []
+        for image in img_list:
+            result = AsyncResult()
+            key = (lang, cand_alphabet, image.shape)
+            requests = self.queue.setdefault(key, [])
+            requests.append((image, result))
+            if len(requests) >= self.batch_size:
+                self.flush(key)
+            results.append(result)
+        if self.queue and self.flusher is None:
+            self.flusher = gevent.spawn_later(self.latency, self.flush_all)
+        return [result.get() for result in results]
+
+    def flush_all(self):
+        self.flusher = None
+        for key in list(self.queue.keys()):
+            self.flush(key)
+
+    def flush(self, key):
+        requests = self.queue.pop(key, [])
+        if not requests:
+            return
+        lang, cand_alphabet, _ = key
+        self.batch += 1
+        self.image += len(requests)
+        try:
+            cnocr = self.model.__getattribute__(lang)
+            outputs = cnocr.atomic_ocr_for_single_lines([image for image, _ in requests], cand_alphabet)
+        except Exception as e:
+            for _, result in requests:
+                result.set_exception(e)
+            return
+        for (_, result), output in zip(requests, outputs):
+            result.set(output)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Batches run and images processed
+        """
+        return {'batch': self.batch, 'image': self.image}
+
+
+def shared_memory_path(name):
+    """
+    Args:
+        name (str): Name of SharedMemoryArena
+
+    Returns:
+        str: File that backs the shared memory on non-Windows hosts.
+    """
+    if os.path.basename(name) != name or not name.startswith(SHARED_MEMORY_PREFIX):
+        raise ValueError(f'Invalid OCR shared memory name: {name}')
+    folder = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(folder, name)
+
+
+def shared_memory_map(name, create=False):
+    """
+    Map shared memory of SHARED_MEMORY_SIZE bytes.
+    Built on mmap instead of multiprocessing.shared_memory, which requires Python 3.8,
+    but toolkit ships Python 3.7.6.
+
+    Args:
+        name (str): Name of SharedMemoryArena
+        create (bool): True on the client that owns the memory, False on the server that attaches it.
+
+    Returns:
+        mmap.mmap:
+    """
+    if os.name == 'nt':
+        # Named file mapping backed by the page file, freed when the last handle is closed
+        return mmap.mmap(-1, SHARED_MEMORY_SIZE, tagname=name)
+
+    path = shared_memory_path(name)
+    if create:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600)
+    else:
+        fd = os.open(path, os.O_RDWR)
+    try:
+        if create:
+            os.ftruncate(fd, SHARED_MEMORY_SIZE)
+        return mmap.mmap(fd, SHARED_MEMORY_SIZE)
+    finally:
+        # Mapping keeps its own reference
+        os.close(fd)
+
+
+class SharedMemoryArena:
+    """
+    Shared memory owned by an OCR client.
+    Images are written into the arena and sent as (offset, shape, dtype) descriptors,
+    so the local OCR server reads them as zero-copy views instead of pickles.
+
+    Images of a request are written from the start of the arena,
+    so the arena must be locked from writing until the request returns.
+    """
+
+    def __init__(self):
+        self.name = f'{SHARED_MEMORY_PREFIX}{os.getpid()}_{secrets.token_hex(4)}'
+        self.size = SHARED_MEMORY_SIZE
+        self.buf = shared_memory_map(self.name, create=True)
+        self.lock = threading.Lock()
+
+    def write(self, img_list):
+        """
+        Args:
+            img_list (list[np.ndarray]):
+
+        Returns:
+            list[tuple[int, list[int], str]]: (offset, shape, dtype) of each image,
+                or None if images exceed the arena.
+        """
+        import numpy as np
+        descriptors = []
+        offset = 0
+        for image in img_list:
+            end = offset + image.nbytes
+            if end > self.size:
+                return None
+            view = np.ndarray(image.shape, dtype=image.dtype, buffer=self.buf, offset=offset)
+            view[...] = image
+            descriptors.append((offset, list(image.shape), image.dtype.str))
+            # Align to 64 bytes
+            offset = (end + 63) // 64 * 64
+        return descriptors
+
+    def close(self):
+        try:
+            self.buf.close()
+            if os.name != 'nt':
+                os.remove(shared_memory_path(self.name))
+        except Exception as e:
+            logger.warning(f'Failed to release OCR shared memory {self.name}: {e}')
+
+
+class SharedMemoryViews:
+    """
+    Shared memory of clients attached by the OCR server.
+    """
+
+    def __init__(self, limit=SHARED_MEMORY_ATTACH_LIMIT):
+        self.limit = limit
+        # Key: shared memory name, value: mmap.mmap
+        self.attached = {}
+
+    def attach(self, name):
+        """
+        Args:
+            name (str): Name of SharedMemoryArena
+
+        Returns:
+            mmap.mmap:
+        """
+        try:
+            return self.attached[name]
+        except KeyError:
+            pass
+
+        buf = shared_memory_map(name, create=False)
+        while len(self.attached) >= self.limit:
+            self.detach(next(iter(self.attached)))
+        self.attached[name] = buf
+        return buf
+
+    def detach(self, name):
+        buf = self.attached.pop(name, None)
+        if buf is None:
+            return
+        try:
+            buf.close()
+        except BufferError:
+            # Views still in use, released when they are garbage collected
+            pass
+
+    def load(self, name, descriptors):
+        """
+        Args:
+            name (str): Name of SharedMemoryArena
+            descriptors (list): (offset, shape, dtype) of each image
+
+        Returns:
+            list[np.ndarray]: Views on the shared memory, valid until the request returns.
+        """
+        import numpy as np
+        buf = self.attach(name)
+        return [np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=buf, offset=offset)
+                for offset, shape, dtype in descriptors]
+
 
 class ModelProxy:
     client = None
     online = True
+    # SharedMemoryArena if OCR server is on the same host
+    arena = None
 
     @classmethod
     def init(cls, address="127.0.0.1:22268"):
@@ -25,9 +278,37 @@ class ModelProxy:
         except:
             cls.online = False
             logger.warning("Ocr server not running")
+            return
+        if address.rsplit(':', 1)[0].strip('[]') in LOCAL_HOSTS:
+            cls.arena_init()
+
+    @classmethod
+    def arena_init(cls):
+        """
+        Send images through shared memory if server supports it, otherwise keep using pickles.
+        """
+        try:
+            arena = SharedMemoryArena()
+        except Exception as e:
+            logger.warning(f'Failed to create OCR shared memory: {e}')
+            return
+        try:
+            attached = cls.client('shm_attach', arena.name)
+        except:
+            # Server of older version
+            attached = False
+        if attached:
+            logger.info(f'OCR server transport: shared memory {arena.name}')
+            cls.arena = arena
+        else:
+            logger.info('OCR server transport: pickle')
+            arena.close()
 
     @classmethod
     def close(cls):
+        if cls.arena is not None:
+            cls.arena.close()
+            cls.arena = None
         if cls.client is not None:
             logger.info('Disconnect to OCR server')
             cls.client.close()
@@ -143,8 +424,15 @@ class ModelProxy:
 
         """
         if self.online:
-            img_str_list = [img_fp.dumps() for img_fp in img_list]
             try:
+                arena = self.arena
+                if arena is not None:
+                    with arena.lock:
+                        descriptors = arena.write(img_list)
+                        if descriptors is not None:
+                            return self.client("atomic_ocr_for_single_lines_shm",
+                                               self.lang, arena.name, descriptors, cand_alphabet)
+                img_str_list = [img_fp.dumps() for img_fp in img_list]
                 return self.client("atomic_ocr_for_single_lines", self.lang, img_str_list, cand_alphabet)
             except:
                 self.online = False
@@ -182,16 +470,42 @@ class ModelProxyFactory:
         ModelProxy.close()
 
 
-def start_ocr_server(port=22268):
+def start_ocr_server(port=22268, batch_size=BATCH_SIZE, batch_latency=BATCH_LATENCY):
     import zerorpc
     import zmq
     from module.ocr.al_ocr import AlOcr
     from module.ocr.models import OcrModel
 
     class OCRServer(OcrModel):
+        def __init__(self):
+            self.batcher = OcrBatcher(self, batch_size=batch_size, latency=batch_latency)
+            self.shm = SharedMemoryViews()
+
         def hello(self):
             return "hello"
 
+        def shm_attach(self, name):
+            try:
+                self.shm.attach(name)
+                return True
+            except Exception as e:
+                logger.warning(f'Failed to attach OCR shared memory {name}: {e}')
+                return False
+
+        def transport_echo(self, img_list):
+            """
+            Load images without OCR, to benchmark transports.
+            """
+            img_list = [pickle.loads(img_fp) for img_fp in img_list]
+            return [int(image.sum()) for image in img_list]
+
+        def transport_echo_shm(self, name, descriptors):
+            img_list = self.shm.load(name, descriptors)
+            return [int(image.sum()) for image in img_list]
+
+        def batch_stats(self):
+            return self.batcher.stats()
+
         def ocr(self, lang, img_fp):
             img_fp = pickle.loads(img_fp)
             cnocr: AlOcr = self.__getattribute__(lang)
@@ -223,8 +537,11 @@ def start_ocr_server(port=22268):
 
         def atomic_ocr_for_single_lines(self, lang, img_list, cand_alphabet):
             img_list = [pickle.loads(img_fp) for img_fp in img_list]
-            cnocr: AlOcr = self.__getattribute__(lang)
-            return cnocr.atomic_ocr_for_single_lines(img_list, cand_alphabet)
+            return self.batcher.submit(lang, img_list, cand_alphabet)
+
+        def atomic_ocr_for_single_lines_shm(self, lang, name, descriptors, cand_alphabet):
+            img_list = self.shm.load(name, descriptors)
+            return self.batcher.submit(lang, img_list, cand_alphabet)
 
         def debug(self, lang, img_list):
             img_list = [pickle.loads(img_fp) for img_fp in img_list]
@@ -238,6 +555,8 @@ def start_ocr_server(port=22268):
         logger.error(f"Ocr server cannot bind on port {port}")
         return
     logger.info(f"Ocr server listen on port {port}")
+    if batch_latency > 0:
+        logger.info(f"Ocr server batching: size {batch_size}, latency {batch_latency * 1000:.1f}ms")
     server.run()
 
 
@@ -271,6 +590,19 @@ if __name__ == "__main__":
         type=int,
         help="Port to listen. Default to OcrServerPort in deploy setting",
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help=f"Max images in one batch. Default to {BATCH_SIZE}",
+    )
+    parser.add_argument(
+        "--batch-latency",
+        type=float,
+        default=BATCH_LATENCY,
+        help=f"Seconds to collect requests before running a batch, 0 to disable batching. "
+             f"Default to {BATCH_LATENCY}",
+    )
     args, _ = parser.parse_known_args()
     port = args.port or State.deploy_config.OcrServerPort
-    start_ocr_server(port=port)
+    start_ocr_server(port=port, batch_size=args.batch_size, batch_latency=args.batch_latency)
@@ -1,5 +1,8 @@
 import traceback
 
+import module.config.server as server
+from module.base.frame import get_frame_color
+from module.base.utils import color_similar
 from module.coalition.assets import *
 from module.event_hospital.assets import HOSIPITAL_CHECK
 from module.freebies.assets import MAIL_ENTER
@@ -74,6 +77,87 @@ class Page:
         self.links[destination] = button
 
 
+class PageClassifier:
+    """
+    Order known pages by how likely they appear on a screenshot,
+    so UI.ui_get_current_page() runs full template matching on the likely ones first.
+
+    Probes are the average colors of check buttons, which cost O(1) on the summed-area table of a frame.
+    Pages are never ruled out by probes, they only decide the order of full matches:
+    1. The last known page
+    2. Pages that have a similar probe, in the order of Page.iter_pages()
+    3. The rest, in the order of Page.iter_pages()
+    """
+    # Looser than Button.appear_on(), since check buttons are matched with offset
+    THRESHOLD = 30
+
+    def __init__(self, probes):
+        """
+        Args:
+            probes (dict[Page, list[Button]]): Buttons to probe on each page
+        """
+        self.probes = [
+            (page, [(button.area, button.color) for button in buttons])
+            for page, buttons in probes.items()
+        ]
+
+    @classmethod
+    def from_pages(cls):
+        """
+        Compile probes from check buttons of all pages,
+        following the special cases in UI.ui_page_appear().
+
+        Returns:
+            PageClassifier:
+        """
+        probes = {}
+        for page in Page.iter_pages():
+            if page.check_button is None:
+                continue
+            if page == page_main:
+                probes[page] = [page_main_white.check_button, page_main.check_button]
+            elif server.server == 'en' and page == page_academy:
+                probes[page] = [ACADEMY_GOTO_MUNITIONS, page.check_button]
+            else:
+                probes[page] = [page.check_button]
+        return cls(probes)
+
+    def probe(self, image, probes):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+            probes (list[tuple]): [(area, color), ...]
+
+        Returns:
+            bool: If any probe is similar.
+        """
+        for area, color in probes:
+            if color_similar(get_frame_color(image, area), color, threshold=self.THRESHOLD):
+                return True
+        return False
+
+    def candidates(self, image, prior=None):
+        """
+        Args:
+            image (np.ndarray): Screenshot.
+            prior (Page): The last known page.
+
+        Yields:
+            Page: All known pages, likely ones first
+        """
+        if prior is not None and prior.check_button is not None:
+            yield prior
+        rest = []
+        for page, probes in self.probes:
+            if page == prior:
+                continue
+            if self.probe(image, probes):
+                yield page
+            else:
+                rest.append(page)
+        yield from rest
+
+
 """
 Define UI pages
 """
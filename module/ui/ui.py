@@ -1,5 +1,5 @@
 from module.base.button import Button
-from module.base.decorator import run_once
+from module.base.decorator import cached_property, run_once
 from module.base.timer import Timer
 from module.combat.assets import GET_ITEMS_1, GET_ITEMS_2, GET_SHIP
 from module.exception import (GameNotRunningError, GamePageUnknownError,
@@ -17,7 +17,8 @@ from module.ocr.ocr import Ocr
 from module.os_handler.assets import (AUTO_SEARCH_REWARD, EXCHANGE_CHECK, RESET_FLEET_PREPARATION, RESET_TICKET_POPUP)
 from module.raid.assets import *
 from module.ui.assets import *
-from module.ui.page import Page, page_academy, page_campaign, page_event, page_main, page_main_white, page_sp
+from module.ui.page import (Page, PageClassifier, page_academy, page_campaign, page_event, page_main, page_main_white,
+                            page_sp)
 from module.ui_white.assets import *
 
 
@@ -44,6 +45,10 @@ class UI(InfoHandler):
                 return True
         return self.appear(page.check_button, offset=offset, interval=interval)
 
+    @cached_property
+    def ui_page_classifier(self):
+        return PageClassifier.from_pages()
+
     def is_in_main(self, offset=(30, 30), interval=0):
         return self.ui_page_appear(page_main, offset=offset, interval=interval)
 
@@ -185,9 +190,8 @@ class UI(InfoHandler):
                 break
 
             # Known pages
-            for page in Page.iter_pages():
-                if page.check_button is None:
-                    continue
+            prior = getattr(self, 'ui_current', None)
+            for page in self.ui_page_classifier.candidates(self.device.image, prior=prior):
                 if self.ui_page_appear(page=page):
                     logger.attr("UI", page.name)
                     self.ui_current = page
@@ -51,6 +51,7 @@ from module.config.config import AzurLaneConfig, Function
 from module.config.deep import deep_get, deep_iter, deep_set
 from module.config.env import IS_ON_PHONE_CLOUD
 from module.config.server import to_server
+from module.config.store import is_store_enabled
 from module.config.utils import (
     alas_instance,
     alas_template,
@@ -943,6 +944,7 @@ class AlasGUI(Frame):
                     f"Save config {filepath_config(config_name)}, {dict_to_kv(modified)}"
                 )
                 config_updater.write_file(config_name, config)
+                ProcessManager.get_manager(config_name).publish_config_change(list(modified.keys()))
         except Exception as e:
             logger.exception(e)
 
@@ -2167,8 +2169,14 @@ def app_manage():
             filename = f"{config_name}.json"
         else:
             filename = f"{config_name}.{mod_name}.json"
-        with open(filepath_config(config_name, mod_name), "rb") as f:
-            download(filename, f.read())
+        if is_store_enabled(config_name, mod_name):
+            # Json file is not written or outdated when configs are in SQLite
+            config = State.config_updater.read_file(config_name)
+            content = json.dumps(config, indent=2, ensure_ascii=False, sort_keys=False, default=str)
+            download(filename, content.encode("utf-8"))
+        else:
+            with open(filepath_config(config_name, mod_name), "rb") as f:
+                download(filename, f.read())
 
     def _new():
         def get_unused_name():
@@ -4,11 +4,12 @@ import argparse
 import os
 import queue
 import threading
-from multiprocessing import Process
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
 from typing import Dict, List, Union
 
 import inflection
-from rich.console import Console, ConsoleRenderable
+from rich.console import ConsoleRenderable
 
 # Since this file does not run under the same process or subprocess of app.py
 # the following code needs to be repeated
@@ -17,19 +18,69 @@ from module.webui.fake_pil_module import *
 
 import_fake_pil_module()
 
-from module.logger import logger, set_file_logger, set_func_logger
+from module.base.status import INSTANCE_STATUS, ExitReason, InstanceState, InstanceStatus, StatusData
+from module.logger import StructuredLog, logger, set_file_logger, set_structured_logger
 from module.submodule.submodule import load_mod
 from module.submodule.utils import get_available_func, get_available_mod, get_available_mod_func, get_config_mod, \
     get_func_mod, list_mod_instance
 from module.webui.setting import State
 
 
+class LogBatchSender:
+    """
+    Buffer logs in Alas process and send them to GUI in batches through a pipe,
+    so logging doesn't wait for GUI or a manager process.
+    """
+    # Send when this many logs are buffered
+    BATCH_SIZE = 200
+    # Or after this many seconds
+    BATCH_INTERVAL = 0.05
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self.buffer: List[StructuredLog] = []
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()
+        self.event = threading.Event()
+        self.thread = threading.Thread(target=self._thread_send, name="LogBatchSender", daemon=True)
+        self.thread.start()
+
+    def put(self, log: StructuredLog) -> None:
+        with self.lock:
+            self.buffer.append(log)
+            if len(self.buffer) >= self.BATCH_SIZE:
+                self.event.set()
+
+    def flush(self) -> None:
+        with self.send_lock:
+            with self.lock:
+                batch, self.buffer = self.buffer, []
+            if not batch:
+                return
+            try:
+                self.conn.send(batch)
+            except (OSError, EOFError):
+                # GUI closed the pipe
+                pass
+
+    def _thread_send(self) -> None:
+        while 1:
+            self.event.wait(self.BATCH_INTERVAL)
+            self.event.clear()
+            self.flush()
+
+
 class ProcessManager:
     _processes: Dict[str, "ProcessManager"] = {}
 
     def __init__(self, config_name: str = "alas") -> None:
         self.config_name = config_name
-        self._renderable_queue: queue.Queue[ConsoleRenderable] = State.manager.Queue()
+        # Receiving end of log pipe, batches of StructuredLog, see LogBatchSender
+        self._log_reader: Connection = None
+        # Modified key paths of config, see ConfigWatcher.wait_change()
+        self._config_queue: queue.Queue[List[str]] = State.manager.Queue()
+        # Written by Alas process in shared memory
+        self.status = InstanceStatus(shared=True)
         self.renderables: List[ConsoleRenderable] = []
         self.renderables_max_length = 400
         self.renderables_reduce_length = 80
@@ -41,27 +92,49 @@ class ProcessManager:
         if not self.alive:
             if func is None:
                 func = get_config_mod(self.config_name)
+            reader, writer = Pipe(duplex=False)
+            self.status.reset()
+            self.status.set_state(InstanceState.STARTING)
             args = (
                 self.config_name,
                 func,
-                self._renderable_queue,
+                writer,
                 ev,
+                self._config_queue,
+                self.status.data,
             )
             self._process = Process(
                 target=ProcessManager.run_process,
                 args=args,
             )
             self._process.start()
+            # Keep the writing end in Alas process only, so reader gets EOF when it exits
+            writer.close()
+            self._log_reader = reader
             self.start_log_queue_handler()
 
-    def start_log_queue_handler(self):
-        if (
-            self.thd_log_queue_handler is not None
-            and self.thd_log_queue_handler.is_alive()
-        ):
+    def publish_config_change(self, keys: List[str]) -> None:
+        """
+        Notify running Alas that config is modified, so it doesn't need to wait for the next polling.
+
+        Args:
+            keys: Modified key paths, such as `Commission.Scheduler.Enable`
+        """
+        if not keys or not self.alive:
             return
+        # Mods don't listen to it
+        if get_config_mod(self.config_name) != "alas":
+            return
+        try:
+            self._config_queue.put(list(keys))
+        except Exception as e:
+            logger.warning(f"[{self.config_name}] Failed to publish config change: {e}")
+
+    def start_log_queue_handler(self):
+        # Each run has its own pipe and handler, handler of the previous run
+        # may still be draining its pipe and exits by itself
         self.thd_log_queue_handler = threading.Thread(
-            target=self._thread_log_queue_handler
+            target=self._thread_log_queue_handler, args=(self._log_reader, self._process)
         )
         self.thd_log_queue_handler.start()
 
@@ -75,6 +148,7 @@ class ProcessManager:
         with lock:
             if self.alive:
                 self._process.kill()
+                self.status.set_exit(ExitReason.MANUAL_STOP)
                 self.renderables.append(
                     f"[{self.config_name}] exited. Reason: Manual stop\n"
                 )
@@ -86,15 +160,27 @@ class ProcessManager:
                     )
         logger.info(f"[{self.config_name}] exited")
 
-    def _thread_log_queue_handler(self) -> None:
-        while self.alive:
+    def _thread_log_queue_handler(self, reader: Connection, process: Process) -> None:
+        """
+        Args:
+            reader: Receiving end of the log pipe of process
+            process: Alas process of this run, not self._process which is replaced on restart
+        """
+        while 1:
             try:
-                log = self._renderable_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-            self.renderables.append(log)
+                if not reader.poll(1):
+                    if process.is_alive():
+                        continue
+                    # Drain logs sent before exit
+                    if not reader.poll(0):
+                        break
+                batch = reader.recv()
+            except (EOFError, OSError):
+                break
+            self.renderables.extend(batch)
             if len(self.renderables) > self.renderables_max_length:
                 self.renderables = self.renderables[self.renderables_reduce_length :]
+        reader.close()
         logger.info("End of log queue handler loop")
 
     @property
@@ -106,23 +192,22 @@ class ProcessManager:
 
     @property
     def state(self) -> int:
+        """
+        Returns:
+            int: 1 running, 2 not running, 3 stopped unexpectedly, 4 stopped for update
+        """
         if self.alive:
             return 1
-        elif len(self.renderables) == 0:
+        status = self.status
+        if status.state == InstanceState.NONE:
+            return 2
+        reason = status.reason
+        if reason in (ExitReason.FINISH, ExitReason.MANUAL_STOP):
             return 2
+        elif reason == ExitReason.UPDATE:
+            return 4
         else:
-            console = Console(no_color=True)
-            with console.capture() as capture:
-                console.print(self.renderables[-1])
-            s = capture.get().strip()
-            if s.endswith("Reason: Manual stop"):
-                return 2
-            elif s.endswith("Reason: Finish"):
-                return 2
-            elif s.endswith("Reason: Update"):
-                return 4
-            else:
-                return 3
+            return 3
 
     @classmethod
     def get_manager(cls, config_name: str) -> "ProcessManager":
@@ -135,7 +220,12 @@ class ProcessManager:
 
     @staticmethod
     def run_process(
-        config_name, func: str, q: queue.Queue, e: threading.Event = None
+        config_name,
+        func: str,
+        q: Connection,
+        e: threading.Event = None,
+        c: queue.Queue = None,
+        s: StatusData = None,
     ) -> None:
         parser = argparse.ArgumentParser()
         parser.add_argument(
@@ -151,7 +241,10 @@ class ProcessManager:
             logger.info("Electron detected, remove log output to stdout")
             from module.logger import console_hdlr
             logger.removeHandler(console_hdlr)
-        set_func_logger(func=q.put)
+        if s is not None:
+            INSTANCE_STATUS.bind(s)
+        sender = LogBatchSender(q)
+        set_structured_logger(func=sender.put)
 
         from module.config.config import AzurLaneConfig
 
@@ -159,6 +252,7 @@ class ProcessManager:
         remove_fake_pil_module()
 
         AzurLaneConfig.stop_event = e
+        AzurLaneConfig.change_queue = c
         try:
             # Run alas
             if func == "alas":
@@ -182,8 +276,18 @@ class ProcessManager:
             else:
                 logger.critical(f"No function matched: {func}")
             logger.info(f"[{config_name}] exited. Reason: Finish\n")
+            INSTANCE_STATUS.set_exit(ExitReason.FINISH)
+        except SystemExit as e:
+            if e.code in (0, None):
+                INSTANCE_STATUS.set_exit(ExitReason.FINISH)
+            else:
+                INSTANCE_STATUS.set_exit(ExitReason.ERROR)
+            raise
         except Exception as e:
             logger.exception(e)
+            INSTANCE_STATUS.set_exit(ExitReason.ERROR)
+        finally:
+            sender.flush()
 
     @classmethod
     def running_instances(cls) -> List["ProcessManager"]: